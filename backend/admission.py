@@ -0,0 +1,113 @@
+'''
+Admission control for the solve endpoints.
+Before any search work starts, a request is given an estimated cost (roughly the number of node expansions,
+from the grid cells, the number of goals, the algorithm and the depth limit) and is:
++ rejected with 413 when the cost is above max_cost, since it would hold a worker for minutes;
++ admitted when its algorithm has a free slot (bounded concurrency per algorithm);
++ queued when all the slots are taken but a queue slot is free;
++ rejected with 429 when the queue of its algorithm is full too.
+The 429 rejections carry a Retry-After estimated from the recent solve times of the algorithm, and all the rejections
+are counted by algorithm and reason. Expensive algorithms (IDS, IDA*, backtracking) get few slots, so they cannot
+take all the workers from the cheap BFS and A* requests.
+'''
+from contextlib import asynccontextmanager
+import asyncio
+import math
+import time
+
+
+''' Define a function to estimate the node expansions of a solve, every leg may explore the whole grid '''
+def estimate_cost(cells, goals, algorithm, depth_limit=None):
+    goals = max(1, goals)
+    # IDS / IDA* repeat a depth first search for every depth (or threshold) up to the limit
+    limit = depth_limit or 100
+    if algorithm in ('ids', 'idas'):
+        return cells * goals * limit
+    return cells * goals
+
+
+''' Define a function to read the limits from a string like 'ids=1:2,idas=1:2,default=4:32' (concurrency:queue) '''
+def parse_limits(text):
+    limits = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        algorithm, slots = item.split('=')
+        concurrency, queue = slots.split(':')
+        limits[algorithm.strip()] = (int(concurrency), int(queue))
+    return limits
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code, detail, retry_after):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after # seconds, None when retrying cannot help
+
+
+"""
+An AlgorithmGate holds the slots of one algorithm: at most concurrency solves run, at most queue requests wait.
+It also keeps a moving average of the solve times to estimate when a slot will be free again.
+"""
+class AlgorithmGate:
+    def __init__(self, concurrency, queue):
+        self.concurrency = concurrency
+        self.queue = queue
+        self.running = 0
+        self.waiting = 0
+        self.average_seconds = 1.0
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    def retry_after(self):
+        # the requests already waiting go first, and each round frees `concurrency` slots
+        rounds = (self.waiting + 1) / max(1, self.concurrency)
+        return max(1, math.ceil(rounds * self.average_seconds))
+
+    def observe(self, seconds):
+        self.average_seconds = 0.8 * self.average_seconds + 0.2 * seconds
+
+
+class AdmissionController:
+    def __init__(self, max_cost=20_000_000, limits=None, default_limit=(4, 32)):
+        self.max_cost = max_cost
+        self.limits = dict(limits or {})
+        self.default_limit = self.limits.pop('default', default_limit)
+        self.gates = {}
+        self.rejections = {} # (algorithm, reason) -> count
+
+    def gate(self, algorithm):
+        if algorithm not in self.gates:
+            self.gates[algorithm] = AlgorithmGate(*self.limits.get(algorithm, self.default_limit))
+        return self.gates[algorithm]
+
+    def queued(self):
+        return {(algorithm,): gate.waiting for algorithm, gate in self.gates.items()}
+
+    def _reject(self, algorithm, reason, status_code, detail, retry_after):
+        self.rejections[(algorithm, reason)] = self.rejections.get((algorithm, reason), 0) + 1
+        raise AdmissionRejected(status_code, detail, retry_after)
+
+    @asynccontextmanager
+    async def admit(self, algorithm, cost):
+        '''Wait for a slot of the algorithm, or raise AdmissionRejected right away'''
+        gate = self.gate(algorithm)
+        if cost > self.max_cost:
+            self._reject(algorithm, 'too_large', 413,
+                         f'The estimated cost of this solve ({cost}) is above the limit of {self.max_cost}. '
+                         'Use a smaller maze, fewer goals or a lower depth limit.', None)
+        if gate.semaphore.locked() and gate.waiting >= gate.queue:
+            self._reject(algorithm, 'queue_full', 429,
+                         f'Too many {algorithm} solves are running or waiting. Please retry later.', gate.retry_after())
+
+        gate.waiting += 1
+        try:
+            await gate.semaphore.acquire()
+        finally:
+            gate.waiting -= 1
+        gate.running += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            gate.observe(time.perf_counter() - started)
+            gate.running -= 1
+            gate.semaphore.release()
@@ -0,0 +1,86 @@
+'''
+The 'auto' algorithm: pick the engine expected to be the fastest among the ones that return a shortest path.
++ maze_features() measures a few cheap features of the maze: the number of cells, the wall density, the number
+of goals, the terrain costs and the corridor ratio (the share of the free cells with exactly two free neighbors,
+high in drawn mazes and low in open maps). Large grids are measured on a sample of the cells, so the features
+always cost much less than a search.
++ choose_engine() maps the features to an engine with rules calibrated by 'python benchmark.py auto' on the test
+folder and on generated open maps and drawn mazes of 400 to 26k cells, with 1, 4 or 16 goals, with and without
+terrain costs (see candidate_engines for the engines that can be chosen):
+    - one goal: A* (was with weight 1), 10 to 20 times faster than BFS on open maps and about as fast as the
+      others on drawn mazes, where the heuristic helps less
+    - several goals on a grid of corridors (no costs): BFS on the reduced graph (dead ends filled, corridors
+      contracted), which is built once for all the legs and was 1.3 to 1.9 times faster than UCS with 16 goals
+    - otherwise UCS (Dijkstra on Dial's bucket queue), faster than BFS on every group of the corpus since its
+      frontier is not scanned to check whether a cell is already in it
+The wall density is reported with the other features but did not separate the engines on the corpus. The depth
+first searches (dfs, backtracking, depthlimited, ids, idas) and the 'as' solver are never chosen (see
+candidate_engines), and neither is plain BFS, which UCS beats on unit costs too.
+'''
+
+# grids with more cells than this are measured on a sample of SAMPLE_CELLS cells
+SAMPLE_CELLS = 4096
+
+# calibrated thresholds, see 'python benchmark.py auto'
+CORRIDOR_RATIO = 0.6 # above it, the reduced graph pays for its construction when there are several goals
+REDUCE_MIN_CELLS = 400 # below it, the grid is too small for the reduced graph to pay off
+
+
+''' Define a function to measure the features of a maze used to choose the engine '''
+def maze_features(maze):
+    rows, cols = maze.size
+    cells = rows * cols
+    walls = maze.walls
+    step = max(1, cells // SAMPLE_CELLS)
+    sampled = walled = corridors = 0
+    for index in range(0, cells, step):
+        y, x = divmod(index, cols)
+        sampled += 1
+        if (x, y) in walls:
+            walled += 1
+            continue
+        free = 0
+        for nx, ny in ((x, y - 1), (x - 1, y), (x, y + 1), (x + 1, y)):
+            if 0 <= nx < cols and 0 <= ny < rows and (nx, ny) not in walls:
+                free += 1
+        if free == 2:
+            corridors += 1
+    free_cells = sampled - walled
+    return {
+        'cells': cells,
+        'wall_density': walled / sampled if sampled else 0.0,
+        'goals': len(maze.goals),
+        'corridor_ratio': corridors / free_cells if free_cells else 0.0,
+        'costs': 1 if maze.costs else 0
+    }
+
+
+''' Define a function to list the engines that return a shortest path for the features: name -> (algorithm, options, preprocess) '''
+def candidate_engines(features):
+    # every leg reaches the nearest remaining goal by path (the cheapest with costs), like BFS
+    candidates = {'ucs': ('ucs', {}, False)}
+    if features['goals'] <= 1:
+        # A* on the costs keeps the lowest cost of every cell, so it is exact (the 'as' solver keeps the first
+        # cost found for a cell in the frontier, which can be a few steps too long), but it aims at the closest
+        # goal by Manhattan distance, so it is only a candidate with one goal
+        candidates['was'] = ('was', {'weight': 1.0}, False)
+    if not features['costs']:
+        # the reduced graph has the lengths of the corridors, not their terrain costs
+        candidates['bfs'] = ('bfs', {}, False)
+        candidates['bfs+preprocess'] = ('bfs', {}, True)
+        candidates['as+preprocess'] = ('as', {'nearest_goal': True}, True)
+    return candidates
+
+
+''' Define a function to choose the engine for the features: returns (algorithm, solver options, whether to preprocess) '''
+def choose_engine(features):
+    if features['goals'] <= 1:
+        return 'was', {'weight': 1.0}, False
+    if not features['costs'] and features['cells'] >= REDUCE_MIN_CELLS and features['corridor_ratio'] >= CORRIDOR_RATIO:
+        return 'bfs', {}, True
+    return 'ucs', {}, False
+
+
+''' Define a function to name an engine as reported in the responses, e.g. 'as+preprocess' '''
+def engine_name(algorithm, preprocess):
+    return f'{algorithm}+preprocess' if preprocess else algorithm
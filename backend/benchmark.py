@@ -0,0 +1,234 @@
+'''
+Benchmarks of the search engines on generated large mazes.
+    python benchmark.py parallel [--size N] [--density D] [--workers 1,2,4] [--repeat R] [--json FILE]
+compares the serial BFS with the tile-partitioned parallel BFS (see parallel.py) for every worker count:
+the time of the search (the worker processes are started before the timer), the speedup against the
+serial BFS and against one worker, and the number of CPU cores of the machine, since the speedup is bounded by it.
+Every parallel path is checked to have the length of the serial BFS path.
+    python benchmark.py auto [--repeat R] [--json FILE]
+times every engine that returns a shortest path (see autoselect.py) on a corpus of mazes: a sample of the test
+folder, generated open maps and drawn mazes of several sizes, with one or several goals, with and without terrain
+costs. For every group of mazes it prints the mean time of each engine, the engine chosen by the 'auto' rules,
+and how much slower 'auto' is than the fastest engine of each maze (its regret). The thresholds of autoselect.py
+come from this table.
+'''
+import json
+import os
+import random
+import sys
+import time
+
+from autoselect import candidate_engines, choose_engine, engine_name, maze_features
+from grid import OccupancyGrid
+from maze import Maze
+from parallel import ParallelBFS
+from utils import read_maze
+
+# the columns of the 'auto' table
+AUTO_ENGINES = ('bfs', 'ucs', 'was', 'bfs+preprocess', 'as+preprocess')
+
+
+''' Define a function to generate a size x size grid with random walls and a free path from the top-left to the bottom-right corner '''
+def generate_grid(size, density=0.3, seed=0):
+    rng = random.Random(seed)
+    buffer = bytearray(1 if rng.random() < density else 0 for _ in range(size * size))
+    x = y = 0
+    buffer[0] = 0
+    while (x, y) != (size - 1, size - 1):
+        if y == size - 1 or (x < size - 1 and rng.random() < 0.5):
+            x += 1
+        else:
+            y += 1
+        buffer[y * size + x] = 0
+    return OccupancyGrid(buffer, (size, size))
+
+
+''' Define a function to generate a drawn maze (a perfect maze of one-cell corridors), with a share of its walls opened to add loops '''
+def generate_maze_grid(size, loops=0.0, seed=0):
+    rng = random.Random(seed)
+    size |= 1
+    buffer = bytearray(b'\x01' * (size * size))
+    buffer[0] = 0
+    stack = [(0, 0)]
+    while stack:
+        x, y = stack[-1]
+        options = [(x + dx, y + dy, dx, dy) for dx, dy in ((2, 0), (-2, 0), (0, 2), (0, -2))
+                   if 0 <= x + dx < size and 0 <= y + dy < size and buffer[(y + dy) * size + x + dx]]
+        if not options:
+            stack.pop()
+            continue
+        nx, ny, dx, dy = rng.choice(options)
+        buffer[(y + dy // 2) * size + x + dx // 2] = 0
+        buffer[ny * size + nx] = 0
+        stack.append((nx, ny))
+    for index in range(size * size):
+        y, x = divmod(index, size)
+        if buffer[index] and (x + y) % 2 == 1 and rng.random() < loops:
+            buffer[index] = 0
+    return OccupancyGrid(buffer, (size, size))
+
+
+''' Define a function to build the corpus of the 'auto' calibration: (group, maze) pairs '''
+def auto_corpus(seed=0, test_dir=None, test_every=10, per_group=3):
+    rng = random.Random(seed)
+    # the test folder next to this file, whatever the working directory
+    test_dir = test_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test')
+    corpus = []
+    for name in sorted(os.listdir(test_dir))[::test_every]:
+        size, start, goals, walls = read_maze(os.path.join(test_dir, name))
+        corpus.append(('test', Maze(tuple(size), start, goals, set(walls))))
+
+    def free_cells(grid, count):
+        rows, cols = grid.size
+        cells = []
+        while len(cells) < count:
+            cell = (rng.randrange(cols), rng.randrange(rows))
+            if cell not in grid:
+                cells.append(cell)
+        return cells
+
+    grids = []
+    for size in (20, 40, 80, 160):
+        for _ in range(per_group):
+            for density in (0.1, 0.3):
+                grids.append((f'open {size} d{density}', generate_grid(size, density, rng.randrange(2 ** 30))))
+            for loops in (0.0, 0.1):
+                grids.append((f'maze {size} l{loops}', generate_maze_grid(size, loops, rng.randrange(2 ** 30))))
+    for group, grid in grids:
+        rows, cols = grid.size
+        walls = set(grid)
+        # the corner is free in both kinds of grids (the drawn mazes have an odd size)
+        corner = (cols - 1, rows - 1)
+        corpus.append((f'{group} g1', Maze(grid.size, (0, 0), [corner], walls)))
+        corpus.append((f'{group} g4', Maze(grid.size, (0, 0), free_cells(grid, 4), walls)))
+        corpus.append((f'{group} g16', Maze(grid.size, (0, 0), free_cells(grid, 16), walls)))
+        costs = {cell: rng.randint(1, 9) for cell in free_cells(grid, rows * cols // 3)}
+        corpus.append((f'{group} g1 costs', Maze(grid.size, (0, 0), [corner], walls, costs=costs)))
+        corpus.append((f'{group} g4 costs', Maze(grid.size, (0, 0), free_cells(grid, 4), walls, costs=costs)))
+    return corpus
+
+
+''' Define a function to time one engine on a maze, the preprocessing included, and return (seconds, cost of the first leg) '''
+def time_engine(maze, algorithm, options, preprocess, repeat=1):
+    best = None
+    for _ in range(repeat):
+        instance = Maze(maze.size, maze.start, list(maze.goals), maze.walls, costs=maze.costs)
+        begin = time.perf_counter()
+        if preprocess:
+            instance.preprocess()
+        success = instance.solve(algorithm, **options)
+        seconds = time.perf_counter() - begin
+        best = seconds if best is None else min(best, seconds)
+    # with several goals at the same distance, the engines may reach them in another order, so only the first leg is compared
+    return best, instance.path_cost_single[0] if success and instance.path_cost_single else None
+
+
+''' Define a function to run the 'auto' calibration benchmark and return its rows (one per maze) '''
+def benchmark_auto(repeat=1, seed=0):
+    rows = []
+    for group, maze in auto_corpus(seed):
+        features = maze_features(maze)
+        times, costs = {}, {}
+        for name, (algorithm, options, preprocess) in candidate_engines(features).items():
+            times[name], costs[name] = time_engine(maze, algorithm, options, preprocess, repeat)
+        if len(set(costs.values())) > 1:
+            raise AssertionError(f'{group}: the engines found first legs of different costs {costs}')
+        algorithm, _, preprocess = choose_engine(features)
+        chosen = engine_name(algorithm, preprocess)
+        fastest = min(times, key=times.get)
+        rows.append({'group': group, 'features': features, 'seconds': times, 'fastest': fastest,
+                     'auto': chosen, 'regret': times[chosen] / times[fastest]})
+    return rows
+
+
+''' Define a function to print the 'auto' benchmark by group of mazes '''
+def print_auto(rows):
+    names = AUTO_ENGINES
+    print(f"{'group':<26}{'n':>4}{'cells':>7}{'walls':>6}{'corr':>6}" + ''.join(f'{name:>16}' for name in names) + f"{'auto':>16}{'regret':>8}")
+    groups = {}
+    for row in rows:
+        groups.setdefault(row['group'], []).append(row)
+    for group, members in groups.items():
+        mean = lambda values: sum(values) / len(values)
+        cells = mean([row['features']['cells'] for row in members])
+        walls = mean([row['features']['wall_density'] for row in members])
+        corridors = mean([row['features']['corridor_ratio'] for row in members])
+        timings = ''.join(f"{mean([row['seconds'][name] for row in members]) * 1000:>14.2f}ms" if name in members[0]['seconds'] else f"{'-':>16}" for name in names)
+        chosen = max(set(row['auto'] for row in members), key=[row['auto'] for row in members].count)
+        print(f'{group:<26}{len(members):>4}{cells:>7.0f}{walls:>6.2f}{corridors:>6.2f}{timings}{chosen:>16}{mean([row["regret"] for row in members]):>8.2f}')
+    auto_total = sum(row['seconds'][row['auto']] for row in rows)
+    best_total = sum(row['seconds'][row['fastest']] for row in rows)
+    # the fixed choices fall back to ucs where they are not candidates (bfs with costs, was with several goals)
+    always = lambda name: sum(row['seconds'].get(name, row['seconds']['ucs']) for row in rows)
+    print(f'total: auto {auto_total:.3f}s, fastest per maze {best_total:.3f}s, '
+          + ', '.join(f'always {name} {always(name):.3f}s' for name in names))
+
+
+''' Define a function to run the parallel BFS benchmark and return its rows '''
+def benchmark_parallel(size=600, density=0.3, workers=(1, 2, 4), repeat=3, seed=0):
+    grid = generate_grid(size, density, seed)
+    start, goal = (0, 0), (size - 1, size - 1)
+
+    serial = []
+    for _ in range(repeat):
+        maze = Maze(grid.size, start, [goal], grid)
+        maze.trace = 'none'
+        begin = time.perf_counter()
+        maze.solve('bfs')
+        serial.append(time.perf_counter() - begin)
+    serial_seconds = min(serial)
+    expected = maze.path_length_multiple if maze.solution_single else None
+
+    rows = [{'engine': 'serial', 'workers': 1, 'seconds': serial_seconds, 'path_length': expected}]
+    for count in workers:
+        with ParallelBFS(grid, count) as search:
+            times = []
+            for _ in range(repeat):
+                begin = time.perf_counter()
+                result = search.search(start, [goal])
+                times.append(time.perf_counter() - begin)
+        length = len(result['path']) if result['goal'] is not None else None
+        if length != expected:
+            raise AssertionError(f'parallel BFS with {count} workers found a path of {length}, the serial BFS {expected}')
+        rows.append({'engine': 'parallel', 'workers': count, 'seconds': min(times), 'path_length': length})
+
+    one_worker = next((row['seconds'] for row in rows if row['engine'] == 'parallel' and row['workers'] == 1), None)
+    for row in rows:
+        row['speedup_vs_serial'] = serial_seconds / row['seconds']
+        row['speedup_vs_one_worker'] = one_worker / row['seconds'] if one_worker else None
+        row['cores'] = os.cpu_count()
+    return rows
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('parallel', 'auto'):
+        print("The command should follow 'python benchmark.py parallel [--size N] [--density D] [--workers 1,2,4] [--repeat R] [--json FILE]' "
+              "or 'python benchmark.py auto [--repeat R] [--json FILE]'")
+        return
+    options = dict(zip(sys.argv[2::2], sys.argv[3::2]))
+    if sys.argv[1] == 'auto':
+        rows = benchmark_auto(repeat=int(options.get('--repeat', 1)))
+        print_auto(rows)
+        if '--json' in options:
+            with open(options['--json'], 'w') as file:
+                json.dump(rows, file, indent=2)
+        return
+    rows = benchmark_parallel(
+        size=int(options.get('--size', 600)),
+        density=float(options.get('--density', 0.3)),
+        workers=[int(count) for count in options.get('--workers', '1,2,4').split(',')],
+        repeat=int(options.get('--repeat', 3))
+    )
+
+    print(f"{'engine':<10}{'workers':>8}{'cores':>7}{'seconds':>10}{'vs serial':>11}{'vs 1 worker':>13}{'path':>8}")
+    for row in rows:
+        vs_one = f"{row['speedup_vs_one_worker']:.2f}x" if row['speedup_vs_one_worker'] else '-'
+        print(f"{row['engine']:<10}{row['workers']:>8}{row['cores']:>7}{row['seconds']:>10.3f}"
+              f"{row['speedup_vs_serial']:>10.2f}x{vs_one:>13}{str(row['path_length']):>8}")
+    if '--json' in options:
+        with open(options['--json'], 'w') as file:
+            json.dump(rows, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
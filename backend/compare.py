@@ -0,0 +1,147 @@
+'''
+Run several algorithms on the same maze at the same time, one worker process per algorithm.
+The occupancy grid is written once into multiprocessing.shared_memory, and every worker attaches to it
+and reads the walls straight from the shared buffer (see grid.OccupancyGrid) instead of receiving a copy.
+The component labels used by the depth first solvers are computed once in the parent and shared the same way.
+Each algorithm has its own timeout: a worker that is still running when its time is up is terminated and
+reported as a timeout, so slow IDS or backtracking runs do not hold back the others.
+'''
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+import os
+import threading
+import time
+
+from components import GridLabels
+from grid import OccupancyGrid
+from maze import Maze
+from workers import CONTEXT
+
+# the solvers that repeat their search on unreachable goals, so the component labels pay off for them
+LABELED_ALGORITHMS = ('backtracking', 'depthlimited', 'ids', 'idas')
+
+# number of comparison workers waiting for a free slot, summed over all the running comparisons
+# (the comparisons run in threads of the server, so the count only changes under the lock)
+queued_workers = 0
+queued_lock = threading.Lock()
+
+
+''' Define a function to change the number of queued workers from any thread '''
+def _add_queued(count):
+    global queued_workers
+    with queued_lock:
+        queued_workers += count
+
+
+''' Define the function run in each worker process '''
+def _compare_worker(shm_name, size, start, goals, algorithm, limit, connection, labels_name=None, num_labels=0):
+    cells = size[0] * size[1]
+    shm = shared_memory.SharedMemory(name=shm_name)
+    buffer = shm.buf[:cells]
+    labels_shm = shared_memory.SharedMemory(name=labels_name) if labels_name is not None else None
+    # the labels block holds one int32 label per cell, then the size of every label
+    views = [labels_shm.buf[:(cells + num_labels) * 4].cast('i')] if labels_shm is not None else []
+    try:
+        maze = Maze(size, start, goals, OccupancyGrid(buffer, size))
+        # the comparison only reports counts, so the explored nodes are not recorded
+        maze.trace = 'counts'
+        if views:
+            views += [views[0][:cells], views[0][cells:]]
+            maze.label_components(GridLabels(size, views[1], views[2]))
+        result = maze.solve(algorithm, limit=limit)
+        connection.send({
+            'status': 'ok',
+            'success': result,
+            'time_taken': maze.time_taken,
+            'num_explored_multiple': maze.num_explored_multiple,
+            'num_explored_single': maze.num_explored_single,
+            'path_length_multiple': maze.path_length_multiple,
+            'path_length_single': maze.path_length_single,
+            'path_cost_multiple': maze.path_cost_multiple,
+            'solution_multiple': maze.solution_multiple,
+            'stats': maze.stats.as_dict()
+        })
+    except Exception as e:
+        connection.send({'status': 'error', 'error': str(e)})
+    finally:
+        connection.close()
+        # the memoryviews have to be released before the shared memory can be closed
+        buffer.release()
+        shm.close()
+        for view in reversed(views):
+            view.release()
+        if labels_shm is not None:
+            labels_shm.close()
+
+
+def compare_algorithms(grid, start, goals, algorithms, limit=100, timeouts=None, default_timeout=10.0, max_workers=None):
+    '''
+    grid is an OccupancyGrid, timeouts maps an algorithm to its timeout in seconds (default_timeout otherwise).
+    Returns {algorithm: result} where result has a status of 'ok', 'timeout' or 'error' and the wall time of the worker.
+    '''
+    rows, cols = grid.size
+    timeouts = timeouts or {}
+    max_workers = max_workers or os.cpu_count() or 1
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, rows * cols))
+    shm.buf[:rows * cols] = bytes(grid.buffer)
+    labels_shm, num_labels = None, 0
+    if any(algorithm in LABELED_ALGORITHMS for algorithm in algorithms):
+        labels = GridLabels.label(grid)
+        num_labels = len(labels.sizes)
+        data = labels.labels.tobytes() + labels.sizes.tobytes()
+        labels_shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        labels_shm.buf[:len(data)] = data
+    pending = list(dict.fromkeys(algorithms))
+    running = {} # connection -> (algorithm, process, started, deadline)
+    results = {}
+    _add_queued(len(pending))
+    try:
+        while pending or running:
+            # start workers while there are free slots
+            while pending and len(running) < max_workers:
+                algorithm = pending.pop(0)
+                _add_queued(-1)
+                receiver, sender = CONTEXT.Pipe(duplex=False)
+                process = CONTEXT.Process(
+                    target=_compare_worker,
+                    args=(shm.name, (rows, cols), start, goals, algorithm, limit, sender,
+                          labels_shm.name if labels_shm is not None and algorithm in LABELED_ALGORITHMS else None, num_labels),
+                    daemon=True
+                )
+                process.start()
+                sender.close()
+                started = time.perf_counter()
+                running[receiver] = (algorithm, process, started, started + timeouts.get(algorithm, default_timeout))
+
+            next_deadline = min(deadline for _, _, _, deadline in running.values())
+            for receiver in wait(list(running), timeout=max(0.0, next_deadline - time.perf_counter())):
+                algorithm, process, started, _ = running.pop(receiver)
+                try:
+                    results[algorithm] = receiver.recv()
+                except EOFError:
+                    results[algorithm] = {'status': 'error', 'error': f'worker exited with code {process.exitcode}'}
+                results[algorithm]['wall_time'] = time.perf_counter() - started
+                receiver.close()
+                process.join()
+
+            # terminate the workers that are past their own timeout
+            now = time.perf_counter()
+            for receiver, (algorithm, process, started, deadline) in list(running.items()):
+                if now >= deadline:
+                    process.terminate()
+                    process.join()
+                    receiver.close()
+                    del running[receiver]
+                    results[algorithm] = {'status': 'timeout', 'wall_time': now - started}
+    finally:
+        _add_queued(-len(pending))
+        for receiver, (_, process, _, _) in running.items():
+            process.terminate()
+            receiver.close()
+        shm.close()
+        shm.unlink()
+        if labels_shm is not None:
+            labels_shm.close()
+            labels_shm.unlink()
+    return {algorithm: results[algorithm] for algorithm in dict.fromkeys(algorithms)}
@@ -0,0 +1,189 @@
+'''
+Connected component labels of the free cells of a maze.
+The labels are computed once with a union-find pass over the grid (row by row, joining every free cell
+with its free left and up neighbors). Afterwards, whether a goal can be reached from a cell is a
+dictionary lookup, and the size of a region is known without searching it.
+The labels are kept up to date when walls change:
++ open_cell (a wall is removed): the cell gets its own label and is merged with its free neighbors,
+relabeling the smaller component into the larger one.
++ close_cell (a wall is added): the component of the cell may split, so only that component is flood filled again.
+GridLabels answers the same queries for a fixed OccupancyGrid, from flat int32 arrays that can be placed in
+shared memory, so worker processes read the labels of the parent instead of building their own.
+'''
+from array import array
+from collections import deque
+
+MOVES = ((0, -1), (-1, 0), (0, 1), (1, 0))
+
+
+class ComponentLabels:
+    def __init__(self, size, walls):
+        self.size = size # size is a tuple (rows, columns)
+        self.labels = {} # (x, y) -> label of its component, only for free cells
+        self.members = {} # label -> set of the cells in the component
+        self.next_label = 0
+        self._label_all(walls)
+
+    def _label_all(self, walls):
+        rows, cols = self.size
+        parent = {}
+
+        def find(cell):
+            root = cell
+            while parent[root] != root:
+                root = parent[root]
+            # path compression
+            while parent[cell] != root:
+                parent[cell], cell = root, parent[cell]
+            return root
+
+        for y in range(rows):
+            for x in range(cols):
+                if (x, y) in walls:
+                    continue
+                parent[(x, y)] = (x, y)
+                for neighbor in ((x - 1, y), (x, y - 1)):
+                    if neighbor in parent:
+                        root_a, root_b = find(neighbor), find((x, y))
+                        if root_a != root_b:
+                            parent[root_b] = root_a
+
+        roots = {}
+        for cell in parent:
+            root = find(cell)
+            if root not in roots:
+                roots[root] = self._new_label(set())
+            label = roots[root]
+            self.labels[cell] = label
+            self.members[label].add(cell)
+
+    def _new_label(self, cells):
+        label = self.next_label
+        self.next_label += 1
+        self.members[label] = cells
+        return label
+
+    def copy(self):
+        other = ComponentLabels.__new__(ComponentLabels)
+        other.size = self.size
+        other.labels = dict(self.labels)
+        other.members = {label: set(cells) for label, cells in self.members.items()}
+        other.next_label = self.next_label
+        return other
+
+    def reachable(self, a, b):
+        if a == b:
+            return True
+        if a in self.labels:
+            return self.labels[a] == self.labels.get(b)
+        # a start on a wall still moves into its free neighbors
+        return any(self.labels[neighbor] == self.labels.get(b) for neighbor in self._free_neighbors(a))
+
+    def component_size(self, cell):
+        label = self.labels.get(cell)
+        return len(self.members[label]) if label is not None else 1
+
+    def _free_neighbors(self, cell):
+        x, y = cell
+        return [(x + dx, y + dy) for dx, dy in MOVES if (x + dx, y + dy) in self.labels]
+
+    def open_cell(self, cell):
+        '''Update the labels after cell stopped being a wall'''
+        if cell in self.labels:
+            return
+        label = self._new_label({cell})
+        self.labels[cell] = label
+        for neighbor in self._free_neighbors(cell):
+            label_a, label_b = self.labels[cell], self.labels[neighbor]
+            if label_a == label_b:
+                continue
+            # relabel the smaller component into the larger one
+            if len(self.members[label_a]) < len(self.members[label_b]):
+                label_a, label_b = label_b, label_a
+            for member in self.members[label_b]:
+                self.labels[member] = label_a
+            self.members[label_a] |= self.members.pop(label_b)
+
+    def close_cell(self, cell):
+        '''Update the labels after cell became a wall'''
+        label = self.labels.pop(cell, None)
+        if label is None:
+            return
+        remaining = self.members.pop(label)
+        remaining.discard(cell)
+        # flood fill what is left of the old component, it may have split into up to four parts
+        while remaining:
+            seed = remaining.pop()
+            part = {seed}
+            stack = [seed]
+            while stack:
+                current = stack.pop()
+                for neighbor in self._free_neighbors(current):
+                    if neighbor in remaining:
+                        remaining.discard(neighbor)
+                        part.add(neighbor)
+                        stack.append(neighbor)
+            new_label = self._new_label(part)
+            for member in part:
+                self.labels[member] = new_label
+
+
+"""
+GridLabels holds the labels of an OccupancyGrid that never changes:
++ labels: one int32 per cell, row by row, -1 for the walls
++ sizes: the number of cells of each label
+Both can be an array('i') or a memoryview cast to 'i' (e.g. over shared memory).
+"""
+class GridLabels:
+    def __init__(self, size, labels, sizes):
+        self.size = size # size is a tuple (rows, columns)
+        self.labels = labels
+        self.sizes = sizes
+
+    @classmethod
+    def label(cls, grid):
+        '''Flood fill the free cells of grid, reading its buffer directly'''
+        rows, cols = grid.size
+        buffer = grid.buffer
+        labels = array('i', [-1]) * (rows * cols)
+        sizes = array('i')
+        for seed in range(rows * cols):
+            if buffer[seed] or labels[seed] != -1:
+                continue
+            label = len(sizes)
+            labels[seed] = label
+            queue = deque([seed])
+            count = 0
+            while queue:
+                index = queue.popleft()
+                count += 1
+                y, x = divmod(index, cols)
+                for neighbor, inside in ((index - cols, y > 0), (index - 1, x > 0), (index + cols, y < rows - 1), (index + 1, x < cols - 1)):
+                    if inside and not buffer[neighbor] and labels[neighbor] == -1:
+                        labels[neighbor] = label
+                        queue.append(neighbor)
+            sizes.append(count)
+        return cls(grid.size, labels, sizes)
+
+    def _label_of(self, cell):
+        x, y = cell
+        rows, cols = self.size
+        if not (0 <= x < cols and 0 <= y < rows):
+            return -1
+        return self.labels[y * cols + x]
+
+    def reachable(self, a, b):
+        if a == b:
+            return True
+        label = self._label_of(b)
+        if label == -1:
+            return False
+        if self._label_of(a) != -1:
+            return self._label_of(a) == label
+        # a start on a wall still moves into its free neighbors
+        x, y = a
+        return any(self._label_of(neighbor) == label for neighbor in ((x, y - 1), (x - 1, y), (x, y + 1), (x + 1, y)))
+
+    def component_size(self, cell):
+        label = self._label_of(cell)
+        return self.sizes[label] if label != -1 else 1
@@ -0,0 +1,328 @@
+'''
+External-memory (out-of-core) BFS for grids that are too large for Maze.walls tuples and Node trees,
+in the style of Munagala and Ranade:
++ the grid is bit-packed (one bit per cell, 1 is a wall) in a file that is memory-mapped, see PackedGrid,
+so a 50k x 50k map is about 300 MB of file pages instead of billions of wall tuples
++ a BFS layer is a file of sorted cell indices (y * cols + x); the next layer is built by writing the
+neighbors of the current layer in sorted runs that fit in the RAM budget, then merging the runs while
+removing the duplicates and the cells of the two previous layers (on a grid, a neighbor of a cell of
+layer t is in layer t - 1, t or t + 1), so no visited set is ever held in memory
++ the goal and its path are the ones of serial BFS: a backward pass from the goals of the last layer keeps,
+in every layer, the cells on a shortest path to them (the cone), then a forward pass from the start takes
+the first move (up, left, down, right) into the cone, found by binary search in the memory-mapped cone files
+The memory budget bounds the sort runs and the I/O blocks; the pages of the grid and of the layer files
+are left to the OS page cache.
+'''
+from array import array
+from bisect import bisect_left
+import heapq
+import mmap
+import os
+import re
+import shutil
+import struct
+import tempfile
+
+MAGIC = b'PGB1'
+HEADER = struct.Struct('=4sII') # magic, rows, cols
+
+# bytes held in memory for every cell index in a sort run (the Python int and its list slot)
+BYTES_PER_SORTED_ITEM = 40
+
+
+class PackedGrid:
+    def __init__(self, size, buffer, path=None):
+        self.size = size # size is a tuple (rows, columns)
+        self.buffer = buffer # mmap of the file: the header, then one bit per cell, row by row
+        self.path = path
+
+    @classmethod
+    def create(cls, path, size):
+        '''Create a grid file with every cell free (a sparse file, the blocks are only written with the walls)'''
+        rows, cols = size
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, rows, cols))
+            file.truncate(HEADER.size + (rows * cols + 7) // 8)
+        return cls.load(path, writable=True)
+
+    @classmethod
+    def load(cls, path, writable=False):
+        with open(path, 'r+b' if writable else 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        magic, rows, cols = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            buffer.close()
+            raise ValueError(f'{path} is not a packed grid')
+        return cls((rows, cols), buffer, path)
+
+    @classmethod
+    def from_walls(cls, path, size, walls):
+        '''Write walls of any kind (a set of tuples, an OccupancyGrid) to a grid file'''
+        grid = cls.create(path, size)
+        for x, y in walls:
+            grid.add_block(x, y, 1, 1)
+        return grid
+
+    @classmethod
+    def from_maze_file(cls, maze_path, path):
+        '''Convert a maze text file (see utils.read_maze) line by line, return (grid, start, goals)'''
+        with open(maze_path) as file:
+            size = tuple(map(int, re.findall(r'\d+', file.readline())))
+            start = tuple(map(int, re.findall(r'\d+', file.readline())))
+            goals = [tuple(map(int, re.findall(r'\d+', part))) for part in file.readline().split('|')]
+            grid = cls.create(path, size)
+            for line in file:
+                block = list(map(int, re.findall(r'\d+', line)))
+                if len(block) >= 4:
+                    # (x, y, width, height), like read_maze
+                    grid.add_block(*block[:4])
+        return grid, start, goals
+
+    def add_block(self, x, y, width, height):
+        rows, cols = self.size
+        x0, x1 = max(0, x), min(cols, x + width)
+        for row in range(max(0, y), min(rows, y + height)):
+            if x0 < x1:
+                self._set_bits(row * cols + x0, x1 - x0)
+
+    def _set_bits(self, start, count):
+        end = start + count
+        buffer = self.buffer
+        while start < end and start & 7:
+            buffer[HEADER.size + (start >> 3)] |= 1 << (start & 7)
+            start += 1
+        full = (end - start) >> 3
+        if full:
+            offset = HEADER.size + (start >> 3)
+            buffer[offset:offset + full] = b'\xff' * full
+            start += full * 8
+        while start < end:
+            buffer[HEADER.size + (start >> 3)] |= 1 << (start & 7)
+            start += 1
+
+    def is_wall(self, index):
+        return self.buffer[HEADER.size + (index >> 3)] >> (index & 7) & 1
+
+    def __contains__(self, state):
+        # like the set of wall tuples, so the grid can be the walls of a Maze
+        x, y = state
+        rows, cols = self.size
+        return 0 <= x < cols and 0 <= y < rows and self.is_wall(y * cols + x) == 1
+
+    def index(self, state):
+        return state[1] * self.size[1] + state[0]
+
+    def cell(self, index):
+        return (index % self.size[1], index // self.size[1])
+
+    def free_neighbors(self, index):
+        rows, cols = self.size
+        y, x = divmod(index, cols)
+        neighbors = []
+        if y > 0 and not self.is_wall(index - cols):
+            neighbors.append(index - cols)
+        if x > 0 and not self.is_wall(index - 1):
+            neighbors.append(index - 1)
+        if y < rows - 1 and not self.is_wall(index + cols):
+            neighbors.append(index + cols)
+        if x < cols - 1 and not self.is_wall(index + 1):
+            neighbors.append(index + 1)
+        return neighbors
+
+    def close(self, remove=False):
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+        if remove and self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class ExternalBFS:
+    def __init__(self, grid, memory_budget=64 * 2 ** 20, workdir=None):
+        self.grid = grid # a PackedGrid
+        self.memory_budget = memory_budget # bytes for the sort runs and the I/O blocks
+        self.workdir = workdir # where the layer files are written (the system temporary directory by default)
+        rows, cols = grid.size
+        self.code = 'I' if rows * cols <= 0xFFFFFFFF else 'Q'
+        self.itemsize = array(self.code).itemsize
+        # half of the budget sorts the runs, the other half is shared by the blocks of the files being merged
+        self.run_items = max(1024, memory_budget // 2 // BYTES_PER_SORTED_ITEM)
+
+    def _block_items(self, streams):
+        return max(256, self.memory_budget // 2 // (self.itemsize * max(1, streams)))
+
+    def _read(self, path, block_items):
+        with open(path, 'rb') as file:
+            while True:
+                block = array(self.code)
+                try:
+                    block.fromfile(file, block_items)
+                except EOFError:
+                    pass # the last block is shorter
+                if not block:
+                    return
+                yield from block
+
+    def _write_run(self, path, values):
+        with open(path, 'wb') as file:
+            array(self.code, sorted(set(values))).tofile(file)
+        return path
+
+    def _neighbor_runs(self, layer, directory, depth):
+        # the neighbors of the layer, written in sorted runs of at most run_items cells
+        runs = []
+        buffer = []
+        for index in self._read(layer, self._block_items(1)):
+            buffer.extend(self.grid.free_neighbors(index))
+            if len(buffer) >= self.run_items:
+                runs.append(self._write_run(os.path.join(directory, f'run_{depth}_{len(runs)}.bin'), buffer))
+                buffer = []
+        if buffer:
+            runs.append(self._write_run(os.path.join(directory, f'run_{depth}_{len(runs)}.bin'), buffer))
+        return runs
+
+    def _merge_layer(self, runs, excluded, path, targets):
+        # merge the runs into the next layer, without the duplicates and the cells of the excluded (previous) layers
+        block_items = self._block_items(len(runs) + len(excluded) + 1)
+        merged = heapq.merge(*(self._read(run, block_items) for run in runs))
+        streams = [self._read(layer, block_items) for layer in excluded]
+        heads = [next(stream, None) for stream in streams]
+        count = 0
+        found = []
+        last = None
+        out = array(self.code)
+        with open(path, 'wb') as file:
+            for value in merged:
+                if value == last:
+                    continue
+                last = value
+                seen = False
+                for k, stream in enumerate(streams):
+                    while heads[k] is not None and heads[k] < value:
+                        heads[k] = next(stream, None)
+                    if heads[k] == value:
+                        seen = True
+                if seen:
+                    continue
+                out.append(value)
+                count += 1
+                if value in targets:
+                    found.append(value)
+                if len(out) >= block_items:
+                    out.tofile(file)
+                    out = array(self.code)
+            out.tofile(file)
+        return count, found
+
+    def _in_layer(self, path, values):
+        # binary search of the values in the memory-mapped sorted layer file
+        with open(path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(buffer).cast(self.code)
+        try:
+            for value in values:
+                position = bisect_left(view, value)
+                if position < len(view) and view[position] == value:
+                    return value
+            return None
+        finally:
+            view.release()
+            buffer.close()
+
+    def _cone(self, layers, goals, directory):
+        # the cells of every layer that are on a shortest path to one of the goals (all in the last layer),
+        # built backward: the cone in layer t is made of the neighbors of the cone in layer t + 1 that are in layer t
+        depth = len(layers) - 1
+        cone = {depth: self._write_run(os.path.join(directory, f'cone_{depth}.bin'), goals)}
+        for t in range(depth - 1, 0, -1):
+            runs = self._neighbor_runs(cone[t + 1], directory, f'cone_{t}')
+            cone[t] = os.path.join(directory, f'cone_{t}.bin')
+            self._intersect(runs, layers[t], cone[t])
+            for run in runs:
+                os.remove(run)
+        return cone
+
+    def _intersect(self, runs, layer, path):
+        # merge the runs into the cells that are also in the sorted layer file
+        block_items = self._block_items(len(runs) + 2)
+        merged = heapq.merge(*(self._read(run, block_items) for run in runs))
+        cells = self._read(layer, block_items)
+        head = next(cells, None)
+        last = None
+        out = array(self.code)
+        with open(path, 'wb') as file:
+            for value in merged:
+                if value == last:
+                    continue
+                last = value
+                while head is not None and head < value:
+                    head = next(cells, None)
+                if head == value:
+                    out.append(value)
+                    if len(out) >= block_items:
+                        out.tofile(file)
+                        out = array(self.code)
+            out.tofile(file)
+
+    def _first_path(self, layers, goals, start, directory):
+        # Serial BFS dequeues the cells of a layer in the order of their paths from the start, compared move by
+        # move (up, left, down, right), so the goal it reaches first and its path are found by walking forward
+        # from the start and always taking the first move that stays in the cone of the goals
+        cone = self._cone(layers, goals, directory)
+        path = []
+        current = start
+        for t in range(1, len(layers)):
+            current = self._in_layer(cone[t], self.grid.free_neighbors(current))
+            path.append(current)
+        return [self.grid.cell(index) for index in path]
+
+    def search(self, start, goals=()):
+        '''
+        BFS from start until the nearest goal is reached, or over the whole region of start when goals is empty.
+        Among the goals at the same distance, the one serial BFS dequeues first is reached, with the same path.
+        Returns a dict with the goal reached (None if none), its distance, the path (the cells after start),
+        the number of layers and of explored cells (the cells of all the layers written).
+        Raises a ValueError when start or a goal is outside of the grid.
+        '''
+        grid = self.grid
+        rows, cols = grid.size
+        outside = [cell for cell in [start, *goals] if not (0 <= cell[0] < cols and 0 <= cell[1] < rows)]
+        if outside:
+            # grid.index would wrap them onto other cells of the grid
+            raise ValueError(f'Cells outside of the {rows}x{cols} grid: {outside}')
+        result = {'goal': None, 'distance': None, 'path': [], 'layers': 0, 'explored': 0}
+        if start in grid:
+            return result
+        targets = {grid.index(goal) for goal in goals if goal not in grid}
+        directory = tempfile.mkdtemp(prefix='external-bfs-', dir=self.workdir)
+        try:
+            layers = [os.path.join(directory, 'layer_0.bin')]
+            with open(layers[0], 'wb') as file:
+                array(self.code, [grid.index(start)]).tofile(file)
+            result['explored'] = 1
+            found = [grid.index(start)] if grid.index(start) in targets else []
+
+            while not found:
+                depth = len(layers) - 1
+                runs = self._neighbor_runs(layers[-1], directory, depth)
+                path = os.path.join(directory, f'layer_{depth + 1}.bin')
+                count, found = self._merge_layer(runs, layers[-2:], path, targets)
+                for run in runs:
+                    os.remove(run)
+                if count == 0:
+                    os.remove(path)
+                    break
+                layers.append(path)
+                result['explored'] += count
+                if not targets and len(layers) >= 3:
+                    # without goals there is no path to recover, only the last two layers are needed
+                    os.remove(layers[-3])
+
+            result['layers'] = len(layers)
+            if found:
+                result['path'] = self._first_path(layers, found, grid.index(start), directory)
+                result['goal'] = result['path'][-1] if result['path'] else start
+                result['distance'] = len(layers) - 1
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        return result
@@ -0,0 +1,226 @@
+'''
+Compressed first-move tables (a compressed path database) for mazes that are queried many times.
+For every free cell (the source), the table stores the first move of an optimal path toward every other
+free cell (the target). The targets are listed in one fixed cell ordering (a depth first traversal of the
+maze, so nearby cells are next to each other) and every row is run-length compressed along that ordering.
+When several first moves are optimal for a target, any of them may be stored, so a run keeps going as long
+as one move is optimal for all its targets, which makes the rows much shorter than one entry per target.
+A query is then a walk: look up the first move from the current cell to the goal, take it, repeat, with no search.
+
+The rows are independent, so the sources can be split across worker processes. The table is saved as
+flat arrays of unsigned ints (native byte order) and loaded back with mmap, so opening even a large table
+costs nothing until rows are read, and several processes share the same pages.
+'''
+from array import array
+from bisect import bisect_right
+from multiprocessing import Pool
+import heapq
+import mmap
+import struct
+
+# the moves in the same order as Maze.possible_actions, NONE is stored for unreachable targets
+MOVES = (('up', (0, -1)), ('left', (-1, 0)), ('down', (0, 1)), ('right', (1, 0)))
+NONE = 4
+ANY = (1 << 5) - 1
+
+MAGIC = b'FMT1'
+HEADER = struct.Struct('=4sIIII') # magic, rows, cols, number of free cells, number of runs
+NO_POSITION = 0xFFFFFFFF
+
+
+''' Define a function to order the free cells by a depth first traversal of the maze '''
+def cell_order(maze):
+    rows, cols = maze.size
+    seen = set()
+    order = []
+    for y in range(rows):
+        for x in range(cols):
+            if (x, y) in maze.walls or (x, y) in seen:
+                continue
+            seen.add((x, y))
+            stack = [(x, y)]
+            while stack:
+                state = stack.pop()
+                order.append(state)
+                # pushed in reverse so the cells are visited up, left, down, right
+                for _, next_state in reversed(maze.possible_actions(state)):
+                    if next_state not in seen:
+                        seen.add(next_state)
+                        stack.append(next_state)
+    return order
+
+
+# the graph given to the worker processes: adjacency[i] = [(move, neighbor index, cost), ...]
+_adjacency = None
+
+
+def _init_worker(adjacency):
+    global _adjacency
+    _adjacency = adjacency
+
+
+''' Define a function to compute the compressed row of one source: (run starts, run moves) '''
+def _build_row(source):
+    adjacency = _adjacency
+    count = len(adjacency)
+    distance = [None] * count
+    masks = [0] * count # bit m is set when move m starts an optimal path to the cell
+    distance[source] = 0
+    masks[source] = ANY
+    for move, neighbor, cost in adjacency[source]:
+        if distance[neighbor] is None or cost < distance[neighbor]:
+            distance[neighbor] = cost
+            masks[neighbor] = 1 << move
+        elif cost == distance[neighbor]:
+            masks[neighbor] |= 1 << move
+    heap = [(distance[neighbor], neighbor) for _, neighbor, _ in adjacency[source]]
+    heapq.heapify(heap)
+    done = [False] * count
+    done[source] = True
+
+    # Dijkstra (every cost is at least 1, so a cell is final when popped) merging the masks of all the optimal parents
+    while heap:
+        current_distance, current = heapq.heappop(heap)
+        if done[current]:
+            continue
+        done[current] = True
+        mask = masks[current]
+        for _, neighbor, cost in adjacency[current]:
+            new_distance = current_distance + cost
+            if distance[neighbor] is None or new_distance < distance[neighbor]:
+                distance[neighbor] = new_distance
+                masks[neighbor] = mask
+                heapq.heappush(heap, (new_distance, neighbor))
+            elif new_distance == distance[neighbor] and not done[neighbor]:
+                masks[neighbor] |= mask
+
+    # greedy run-length encoding: extend the run while some move stays optimal for all its targets
+    starts, moves = [], []
+    allowed = 0
+    for target in range(count):
+        mask = masks[target] if distance[target] is not None else 1 << NONE
+        if allowed & mask:
+            allowed &= mask
+            continue
+        if starts:
+            moves.append((allowed & -allowed).bit_length() - 1)
+        starts.append(target)
+        allowed = mask
+    if starts:
+        moves.append((allowed & -allowed).bit_length() - 1)
+    return starts, moves
+
+
+def _build_rows(sources):
+    return [_build_row(source) for source in sources]
+
+
+class FirstMoveTable:
+    def __init__(self, size, position, offsets, run_starts, run_moves, buffer=None):
+        self.size = size # size is a tuple (rows, columns)
+        self.position = position # rows * cols entries: index of the cell in the ordering, NO_POSITION for walls
+        self.offsets = offsets # the runs of source i are run_starts[offsets[i]:offsets[i + 1]]
+        self.run_starts = run_starts # first target index of every run
+        self.run_moves = run_moves # move of every run
+        self.buffer = buffer # the mmap the arrays point into, when the table was loaded from a file
+
+    @classmethod
+    def build(cls, maze, processes=1, chunk_size=64):
+        '''Compute the table of maze, splitting the sources over processes worker processes'''
+        rows, cols = maze.size
+        order = cell_order(maze)
+        position = array('I', [NO_POSITION]) * (rows * cols)
+        for index, (x, y) in enumerate(order):
+            position[y * cols + x] = index
+        move_index = {name: index for index, (name, _) in enumerate(MOVES)}
+        adjacency = [
+            [(move_index[action], position[y * cols + x], maze.step_cost((x, y))) for action, (x, y) in maze.possible_actions(state)]
+            for state in order
+        ]
+
+        chunks = [range(start, min(start + chunk_size, len(order))) for start in range(0, len(order), chunk_size)]
+        if processes > 1:
+            with Pool(processes, initializer=_init_worker, initargs=(adjacency,)) as pool:
+                results = pool.map(_build_rows, chunks)
+        else:
+            _init_worker(adjacency)
+            results = [_build_rows(chunk) for chunk in chunks]
+
+        offsets = array('I', [0])
+        run_starts = array('I')
+        run_moves = array('B')
+        for chunk in results:
+            for starts, moves in chunk:
+                run_starts.extend(starts)
+                run_moves.extend(moves)
+                offsets.append(len(run_starts))
+        return cls(maze.size, position, offsets, run_starts, run_moves)
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, self.size[0], self.size[1], len(self.offsets) - 1, len(self.run_starts)))
+            for values in (self.position, self.offsets, self.run_starts, self.run_moves):
+                file.write(values if isinstance(values, memoryview) else values.tobytes())
+
+    @classmethod
+    def load(cls, path):
+        '''Memory-map a saved table, the arrays are views on the file and nothing is copied'''
+        with open(path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, rows, cols, cells, runs = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            buffer.close()
+            raise ValueError(f'{path} is not a first-move table')
+        view = memoryview(buffer)
+        arrays = []
+        offset = HEADER.size
+        for length, code, itemsize in ((rows * cols, 'I', 4), (cells + 1, 'I', 4), (runs, 'I', 4), (runs, 'B', 1)):
+            arrays.append(view[offset:offset + length * itemsize].cast(code))
+            offset += length * itemsize
+        return cls((rows, cols), *arrays, buffer=buffer)
+
+    def close(self):
+        if self.buffer is not None:
+            for values in (self.position, self.offsets, self.run_starts, self.run_moves):
+                values.release()
+            self.buffer.close()
+            self.buffer = None
+
+    def index(self, state):
+        x, y = state
+        rows, cols = self.size
+        if not (0 <= x < cols and 0 <= y < rows):
+            return None
+        index = self.position[y * cols + x]
+        return None if index == NO_POSITION else index
+
+    def first_move(self, source, target):
+        '''Return the index in MOVES of the first move from source to target (ordering indices), NONE if unreachable'''
+        low, high = self.offsets[source], self.offsets[source + 1]
+        run = bisect_right(self.run_starts, target, low, high) - 1
+        return self.run_moves[run]
+
+    def path(self, start, goal):
+        '''Return (actions, cells) of an optimal path from start to goal (cells excludes start), or None if there is none'''
+        source, target = self.index(start), self.index(goal)
+        if source is None or target is None:
+            return None
+        actions, cells = [], []
+        state = start
+        while source != target:
+            move = self.first_move(source, target)
+            if move == NONE or len(cells) >= len(self.offsets):
+                return None
+            action, (dx, dy) = MOVES[move]
+            state = (state[0] + dx, state[1] + dy)
+            actions.append(action)
+            cells.append(state)
+            source = self.index(state)
+        return actions, cells
+
+    def num_runs(self):
+        return len(self.run_starts)
+
+    def summary(self):
+        cells = len(self.offsets) - 1
+        return {'cells': cells, 'runs': self.num_runs(), 'runs_per_source': self.num_runs() / max(1, cells)}
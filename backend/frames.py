@@ -0,0 +1,76 @@
+'''
+Downsample the exploration trace of a search into a bounded number of animation frames.
+Instead of one [x, y] entry per expanded node, the response carries:
++ trace_cells: the explored cells as flat indices (y * cols + x), each cell once per leg, in exploration order
++ trace_frames: [start, end) ranges into trace_cells, about max_frames of them (at least one per leg)
++ trace_leg_frames: the first frame of every leg (frames never span two legs)
+so the payload is bounded by the grid size and the client renders one update per frame, however long the search.
+Two ways to cut the frames:
++ chunks: fixed-size chunks of the exploration order
++ layers: whole layers of cells at the same distance from the start of the leg (the BFS layers),
+merged together when there are more layers than frames
+'''
+from collections import deque
+import math
+
+FRAME_MODES = ('chunks', 'layers')
+
+
+''' Define a function to compute the distance (in steps) of every reachable cell from start '''
+def layer_distances(maze, start):
+    distance = {start: 0}
+    queue = deque([start])
+    while queue:
+        state = queue.popleft()
+        for _, next_state in maze.possible_actions(state):
+            if next_state not in distance:
+                distance[next_state] = distance[state] + 1
+                queue.append(next_state)
+    return distance
+
+
+''' Define a function to split the explored nodes of the maze into its legs, with the start of each leg '''
+def split_legs(maze):
+    legs = []
+    offset = 0
+    leg_start = maze.start
+    for explored, cells in zip(maze.nodes_explored_single, maze.solution_single):
+        legs.append((leg_start, maze.nodes_explored_multiple[offset:offset + len(explored)]))
+        offset += len(explored)
+        leg_start = cells[-1] if cells else leg_start
+    # the leg that did not reach a goal is only in nodes_explored_multiple
+    if offset < len(maze.nodes_explored_multiple):
+        legs.append((leg_start, maze.nodes_explored_multiple[offset:]))
+    return legs
+
+
+def build_frames(maze, max_frames, mode='chunks'):
+    '''Return (trace_cells, trace_frames, trace_leg_frames) for the last search of maze'''
+    cols = maze.size[1]
+    legs = []
+    for leg_start, explored in split_legs(maze):
+        seen = set()
+        unique = [state for state in explored if not (state in seen or seen.add(state))]
+        legs.append((leg_start, unique))
+
+    total = sum(len(cells) for _, cells in legs)
+    trace_cells, trace_frames, trace_leg_frames = [], [], []
+    for leg_start, cells in legs:
+        trace_leg_frames.append(len(trace_frames))
+        if not cells:
+            continue
+        # each leg gets a share of the frames proportional to its size
+        budget = max(1, math.floor(max_frames * len(cells) / total))
+        target = math.ceil(len(cells) / budget) # smallest number of cells in a frame
+
+        distance = layer_distances(maze, leg_start) if mode == 'layers' else None
+        frame_start = len(trace_cells)
+        for index, state in enumerate(cells):
+            # a frame closes once it is big enough, at the next layer change in layers mode
+            size = len(trace_cells) - frame_start
+            if size >= target and (distance is None or distance.get(state) != distance.get(cells[index - 1])):
+                trace_frames.append((frame_start, len(trace_cells)))
+                frame_start = len(trace_cells)
+            trace_cells.append(state[1] * cols + state[0])
+        trace_frames.append((frame_start, len(trace_cells)))
+    return trace_cells, trace_frames, trace_leg_frames
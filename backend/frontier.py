@@ -16,16 +16,23 @@ used to get the result of the search.
 + contain_state(): to check whether the frontier contain the goal or not
 + remove(): this will be an abstract function, depending on the type of 
 search.
+The frontier also counts its pushes, pops and peak size for the search statistics.
 """
 class Frontier:
     def __init__(self):
         self.frontier = []
+        self.pushes = 0
+        self.pops = 0
+        self.peak = 0
 
     def isEmpty(self):
         return len(self.frontier) == 0
     
     def add(self, node):
         self.frontier.append(node)
+        self.pushes += 1
+        if len(self.frontier) > self.peak:
+            self.peak = len(self.frontier)
 
     def contain_state(self, state):
         return any(node.state == state for node in self.frontier)
@@ -46,6 +53,7 @@ class Stack(Frontier):
             raise Exception('The Stack Frontier is empty!!')
         else:
             node = self.frontier.pop()
+            self.pops += 1
             return node
 
 #-----------------------------QUEUE (BFS)-----------------------------#
@@ -61,6 +69,7 @@ class Queue(Frontier):
             raise Exception('The Queue Frontier is empty!!!')
         else:
             node = self.frontier.pop(0)
+            self.pops += 1
             return node
 
 #---------------------------HEURISTIC SEARCH---------------------------#
@@ -76,11 +85,65 @@ cost to choose the nodes to remove.
 class PriorityQueue(Frontier):
     def add(self, node):
         heapq.heappush(self.frontier, node)
+        self.pushes += 1
+        if len(self.frontier) > self.peak:
+            self.peak = len(self.frontier)
 
     def remove(self):
         if self.isEmpty():
             raise Exception('The Priority Queue is currently empty!!!')
         else:
             node = heapq.heappop(self.frontier)
+            self.pops += 1
             return node
     
+
+#-------------------------BUCKET QUEUE (DIAL)-------------------------#
+"""
+On weighted grids the step costs are small integers (1 to 255), so every
+priority (g, or g + h for A*) is an integer too. Dial's bucket queue keeps
+one list of nodes per priority and a cursor on the lowest non-empty bucket:
+adding and removing a node are O(1), and the cursor only moves forward over
+empty buckets, instead of paying O(log n) comparisons of Node.__lt__ in heapq.
+A node added below the cursor (e.g. weighted A* with an inconsistent heuristic)
+moves the cursor back, so the queue stays correct for any integer priorities.
+"""
+class BucketQueue(Frontier):
+    def __init__(self):
+        super().__init__()
+        self.buckets = {} # priority -> list of nodes with this priority
+        self.cursor = 0 # no bucket below the cursor holds a node
+        self.size = 0
+
+    def isEmpty(self):
+        return self.size == 0
+
+    def add(self, node):
+        priority = int(node.total_cost())
+        bucket = self.buckets.get(priority)
+        if bucket is None:
+            bucket = self.buckets[priority] = []
+        bucket.append(node)
+        if self.size == 0 or priority < self.cursor:
+            self.cursor = priority
+        self.size += 1
+        self.pushes += 1
+        if self.size > self.peak:
+            self.peak = self.size
+
+    def contain_state(self, state):
+        return any(node.state == state for bucket in self.buckets.values() for node in bucket)
+
+    def remove(self):
+        if self.isEmpty():
+            raise Exception('The Bucket Queue is currently empty!!!')
+        while self.cursor not in self.buckets:
+            self.cursor += 1
+        bucket = self.buckets[self.cursor]
+        # LIFO inside a bucket: among equal priorities the deepest node is expanded first
+        node = bucket.pop()
+        if not bucket:
+            del self.buckets[self.cursor]
+        self.size -= 1
+        self.pops += 1
+        return node
@@ -0,0 +1,103 @@
+'''
+An index over the remaining goals of a multiple goal search, for mazes with hundreds or thousands of goals.
+A plain list of goals makes every goal test and every choice of the next goal scan all the remaining goals.
+The index keeps:
++ a dictionary of the remaining goals, so a goal test is one lookup
++ the goals bucketed in a coarse grid (about one goal per bucket), so the closest remaining goal by Manhattan
+distance is found by looking at the buckets around a cell, ring after ring, instead of at every goal
+The buckets are rebuilt larger as the goals are removed, so the rings stay short until the last goal.
+The distance to the closest remaining goal is also an admissible heuristic for "reach any remaining goal".
+'''
+import math
+
+from utils import manhattan_distance
+
+
+class GoalIndex:
+    def __init__(self, goals, size):
+        self.size = size # size is a tuple (rows, columns)
+        self.positions = {} # goal -> indices in the goals list of its remaining occurrences (a goal may be listed twice)
+        for index, goal in enumerate(goals):
+            self.positions.setdefault(goal, []).append(index)
+        self.order = {goal: indices[0] for goal, indices in self.positions.items()} # ties go to the earlier goal, like min()
+        self.remaining = len(goals)
+        self._build_buckets()
+
+    def _build_buckets(self):
+        rows, cols = self.size
+        # about one goal per bucket
+        self.bucket_size = max(1, int(math.sqrt(rows * cols / max(1, len(self.positions)))))
+        self.built_for = len(self.positions)
+        self.buckets = {} # (bx, by) -> set of the goals in the bucket
+        for goal in self.positions:
+            self.buckets.setdefault(self._bucket(goal), set()).add(goal)
+        keys = list(self.buckets) or [(0, 0)]
+        self.low = (min(bx for bx, _ in keys), min(by for _, by in keys))
+        self.high = (max(bx for bx, _ in keys), max(by for _, by in keys))
+
+    def _bucket(self, state):
+        return (state[0] // self.bucket_size, state[1] // self.bucket_size)
+
+    def __contains__(self, state):
+        return state in self.positions
+
+    def __len__(self):
+        return self.remaining
+
+    def __iter__(self):
+        return iter(list(self.positions))
+
+    def remove(self, goal):
+        '''Remove one occurrence of goal, like list.remove'''
+        if goal not in self.positions:
+            raise ValueError(f'{goal} is not a remaining goal')
+        self.remaining -= 1
+        indices = self.positions[goal]
+        indices.pop(0)
+        if indices:
+            self.order[goal] = indices[0]
+            return
+        del self.positions[goal]
+        del self.order[goal]
+        bucket = self.buckets[self._bucket(goal)]
+        bucket.discard(goal)
+        if not bucket:
+            del self.buckets[self._bucket(goal)]
+        # once most goals are gone, larger buckets keep the number of rings to look at small
+        if len(self.positions) * 4 < self.built_for:
+            self._build_buckets()
+
+    def _ring(self, bx, by, ring):
+        if ring == 0:
+            yield (bx, by)
+            return
+        for dx in range(-ring, ring + 1):
+            yield (bx + dx, by - ring)
+            yield (bx + dx, by + ring)
+        for dy in range(-ring + 1, ring):
+            yield (bx - ring, by + dy)
+            yield (bx + ring, by + dy)
+
+    def nearest(self, state):
+        '''Return the remaining goal closest to state by Manhattan distance (the earliest listed on ties), None if there is none'''
+        if not self.positions:
+            return None
+        bx, by = self._bucket(state)
+        size = self.bucket_size
+        last_ring = max(bx - self.low[0], self.high[0] - bx, by - self.low[1], self.high[1] - by)
+        best = None # (distance, order, goal)
+        for ring in range(last_ring + 1):
+            # every goal in this ring is at least (ring - 1) * size + 1 away from state
+            if best is not None and best[0] <= (ring - 1) * size:
+                break
+            for key in self._ring(bx, by, ring):
+                for goal in self.buckets.get(key, ()):
+                    candidate = (manhattan_distance(state, goal), self.order[goal], goal)
+                    if best is None or candidate < best:
+                        best = candidate
+        return best[2]
+
+    def min_distance(self, state):
+        '''Return the Manhattan distance from state to the closest remaining goal (0 when there is none)'''
+        goal = self.nearest(state)
+        return 0 if goal is None else manhattan_distance(state, goal)
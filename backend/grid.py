@@ -0,0 +1,49 @@
+'''
+Occupancy grid backed by a flat buffer of one byte per cell (0 is free, anything else is a wall), stored row by row.
+The grid can be passed to Maze as its walls: it answers (x, y) in grid like the set of wall tuples does,
+but reads the buffer directly, so a grid placed in shared memory (or a memory-mapped file) can be used by
+many processes without building a set of tuples in each of them.
+'''
+
+
+class OccupancyGrid:
+    def __init__(self, buffer, size):
+        self.buffer = buffer # bytes, bytearray or memoryview of rows * cols bytes
+        self.size = size # size is a tuple (rows, columns)
+
+    @classmethod
+    def from_rows(cls, maze):
+        '''Build a grid from the 2D array of the API (1 is a wall), every row must have the same length'''
+        rows = len(maze)
+        cols = len(maze[0]) if rows > 0 else 0
+        if any(len(row) != cols for row in maze):
+            # a longer or shorter row would shift all the rows after it in the buffer
+            raise ValueError(f'The maze is not rectangular: every row should have {cols} cells')
+        buffer = bytearray(rows * cols)
+        for y, row in enumerate(maze):
+            buffer[y * cols:(y + 1) * cols] = bytes(1 if cell == 1 else 0 for cell in row)
+        return cls(buffer, (rows, cols))
+
+    @classmethod
+    def from_walls(cls, size, walls):
+        '''Build a grid from a set of wall tuples (x, y)'''
+        rows, cols = size
+        buffer = bytearray(rows * cols)
+        for x, y in walls:
+            if 0 <= x < cols and 0 <= y < rows:
+                buffer[y * cols + x] = 1
+        return cls(buffer, (rows, cols))
+
+    def __contains__(self, state):
+        x, y = state
+        rows, cols = self.size
+        return 0 <= x < cols and 0 <= y < rows and self.buffer[y * cols + x] != 0
+
+    def __iter__(self):
+        cols = self.size[1]
+        for index, value in enumerate(self.buffer):
+            if value:
+                yield (index % cols, index // cols)
+
+    def __len__(self):
+        return sum(1 for value in self.buffer if value)
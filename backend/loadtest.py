@@ -0,0 +1,270 @@
+'''
+Load test of the HTTP API under concurrent requests.
+    python loadtest.py [--concurrency C | --rps R] [--duration S] [--mix bfs=3,as=3,ids=1] [--large-share F]
+                       [--large-count K] [--large-size N] [--seed X] [--trace full|counts|none] [--server-workers W]
+                       [--url URL] [--json FILE]
++ The server is started locally (uvicorn with W worker processes, on a free port, with the environment of this
+process, so MAZE_RESULT_CACHE_PATH or MAZE_ADMISSION_LIMITS apply to it), unless --url points to a running one.
++ The requests replay the mazes of the test folder and generated large mazes (a share F of the requests, see
+benchmark.generate_grid, K of them of N x N cells), with the algorithms drawn by the weights of --mix, and are
+sent to /solve. The seed X draws the large mazes and the plan of the requests, so runs with the same seed can be compared.
++ With --concurrency, C clients send their next request as soon as the previous one is answered (closed loop).
+With --rps, the requests are sent on a fixed schedule whatever the answers (open loop), and the latency is
+counted from the scheduled time, so a server that falls behind is not hidden by the clients waiting for it.
++ The report gives the throughput, the p50/p95/p99 latency, the error rate (by status code) and the response
+sizes, in total and by algorithm and maze class. It is printed and written as JSON with --json, so the runs
+can be kept and compared over time.
+'''
+from concurrent.futures import ThreadPoolExecutor
+import http.client
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from benchmark import generate_grid
+from utils import read_maze
+
+DEFAULT_MIX = 'bfs=3,dfs=1,gbfs=2,as=3,ucs=1,ids=1,idas=1'
+
+
+''' Define a function to parse the weights of the algorithms, written as bfs=3,as=3,ids=1 '''
+def parse_mix(text):
+    mix = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        algorithm, weight = item.split('=')
+        mix[algorithm.strip()] = float(weight)
+    return mix
+
+
+''' Define a function to read a maze file of the test folder into the request of the API (a 2D array, 1 is a wall) '''
+def maze_request(path):
+    (rows, cols), start, goals, walls = read_maze(path)
+    maze = [[0] * cols for _ in range(rows)]
+    for x, y in walls:
+        if 0 <= x < cols and 0 <= y < rows:
+            maze[y][x] = 1
+    return {'maze': maze, 'start': list(start), 'goals': [list(goal) for goal in goals]}
+
+
+''' Define a function to build the mazes replayed by the load test: the test folder and a few generated large mazes '''
+def build_corpus(test_dir=None, large_count=4, large_size=150, density=0.25, seed=0):
+    # the test folder next to this script, wherever the load test is run from
+    test_dir = test_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test')
+    small = [maze_request(os.path.join(test_dir, name)) for name in sorted(os.listdir(test_dir)) if name.endswith('.txt')]
+    large = []
+    for index in range(large_count):
+        grid = generate_grid(large_size, density, seed + index)
+        rows, cols = grid.size
+        maze = [list(grid.buffer[y * cols:(y + 1) * cols]) for y in range(rows)]
+        large.append({'maze': maze, 'start': [0, 0], 'goals': [[cols - 1, rows - 1]]})
+    return {'small': small, 'large': large}
+
+
+''' Define a function to compute the nearest-rank percentile of sorted values '''
+def percentile(values, q):
+    if not values:
+        return None
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+''' Define a function to summarize a list of samples (algorithm, maze class, status, latency, response bytes) '''
+def summarize(samples, duration):
+    latencies = sorted(sample[3] for sample in samples)
+    sizes = sorted(sample[4] for sample in samples if sample[2] == 200)
+    statuses = {}
+    for sample in samples:
+        statuses[str(sample[2])] = statuses.get(str(sample[2]), 0) + 1
+    errors = sum(count for status, count in statuses.items() if status != '200')
+    return {
+        'requests': len(samples),
+        'throughput_rps': len(samples) / duration if duration else None,
+        'error_rate': errors / len(samples) if samples else None,
+        'statuses': statuses, # the status code of every answer, 'error' when the connection failed
+        'latency_ms': {
+            'mean': sum(latencies) / len(latencies) * 1000 if latencies else None,
+            **{f'p{q}': percentile(latencies, q) * 1000 if latencies else None for q in (50, 95, 99)},
+            'max': latencies[-1] * 1000 if latencies else None
+        },
+        'response_bytes': {
+            'mean': sum(sizes) / len(sizes) if sizes else None,
+            'p50': percentile(sizes, 50),
+            'p95': percentile(sizes, 95),
+            'max': sizes[-1] if sizes else None,
+            'total': sum(sizes)
+        }
+    }
+
+
+"""
+The LoadTest keeps one HTTP connection per client thread (with keep-alive) and records every answer.
+The plan of the requests (maze class, algorithm and the encoded body) is drawn from a seeded random generator,
+so two runs with the same options send the same requests.
+"""
+class LoadTest:
+    def __init__(self, url, corpus, mix, large_share=0.1, trace='full', timeout=60, seed=0):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.corpus = corpus
+        self.mix = mix
+        self.large_share = large_share if corpus['large'] else 0
+        self.trace = trace
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.plan_lock = threading.Lock()
+        self.bodies = {} # encoded body of each (maze class, maze index, algorithm)
+        self.local = threading.local()
+        self.samples = []
+        self.samples_lock = threading.Lock()
+
+    def next_request(self):
+        with self.plan_lock:
+            kind = 'large' if self.rng.random() < self.large_share else 'small'
+            index = self.rng.randrange(len(self.corpus[kind]))
+            algorithm = self.rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        key = (kind, index, algorithm)
+        body = self.bodies.get(key)
+        if body is None:
+            body = json.dumps(dict(self.corpus[kind][index], algorithm=algorithm, trace=self.trace)).encode()
+            self.bodies[key] = body
+        return kind, algorithm, body
+
+    def _connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self.local.connection = connection
+        return connection
+
+    def send(self, kind, algorithm, body, scheduled=None):
+        # the latency is counted from the scheduled time of the open loop, or from the sending time
+        start = time.perf_counter() if scheduled is None else scheduled
+        try:
+            connection = self._connection()
+            connection.request('POST', '/solve', body, {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            payload = response.read()
+            status, size = response.status, len(payload)
+        except (OSError, http.client.HTTPException):
+            # the connection is dropped, the next request of this client opens a new one
+            self.local.connection.close()
+            self.local.connection = None
+            status, size = 'error', 0
+        with self.samples_lock:
+            self.samples.append((algorithm, kind, status, time.perf_counter() - start, size))
+
+    def run_closed(self, concurrency, duration):
+        deadline = time.perf_counter() + duration
+
+        def client():
+            while time.perf_counter() < deadline:
+                self.send(*self.next_request())
+
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run_open(self, rps, duration, max_in_flight=256):
+        begin = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            for count in range(int(rps * duration)):
+                scheduled = begin + count / rps
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self.send, *self.next_request(), scheduled)
+
+    def report(self, duration):
+        report = summarize(self.samples, duration)
+        groups = {}
+        for sample in self.samples:
+            groups.setdefault(f'{sample[1]}/{sample[0]}', []).append(sample)
+        report['by_request'] = {name: summarize(samples, duration) for name, samples in sorted(groups.items())}
+        return report
+
+
+''' Define a function to start the server on a free local port and wait until it answers /health '''
+def start_server(workers=1, timeout=60):
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'server:app', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--log-level', 'warning'],
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'The server exited with code {process.returncode}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/health')
+            if connection.getresponse().status == 200:
+                connection.close()
+                return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'The server did not answer on port {port} within {timeout} seconds')
+
+
+def main():
+    options = dict(zip(sys.argv[1::2], sys.argv[2::2]))
+    if len(sys.argv) % 2 == 0 or ('--rps' in options and '--concurrency' in options):
+        print("The command should follow 'python loadtest.py [--concurrency C | --rps R] [--duration S] [--mix bfs=3,as=3,ids=1] "
+              "[--large-share F] [--large-count K] [--large-size N] [--seed X] [--trace full|counts|none] [--server-workers W] "
+              "[--url URL] [--json FILE]'")
+        return
+    duration = float(options.get('--duration', 10))
+    seed = int(options.get('--seed', 0))
+    corpus = build_corpus(large_count=int(options.get('--large-count', 4)), large_size=int(options.get('--large-size', 150)), seed=seed)
+
+    process = None
+    url = options.get('--url')
+    if url is None:
+        process, url = start_server(int(options.get('--server-workers', 1)))
+    try:
+        test = LoadTest(url, corpus, parse_mix(options.get('--mix', DEFAULT_MIX)),
+                        large_share=float(options.get('--large-share', 0.1)), trace=options.get('--trace', 'full'), seed=seed)
+        begin = time.perf_counter()
+        if '--rps' in options:
+            mode = {'mode': 'open', 'rps': float(options['--rps'])}
+            test.run_open(mode['rps'], duration)
+        else:
+            mode = {'mode': 'closed', 'concurrency': int(options.get('--concurrency', 8))}
+            test.run_closed(mode['concurrency'], duration)
+        elapsed = time.perf_counter() - begin
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    report = {
+        'config': dict(mode, duration=duration, server=url if process is None else 'local',
+                       server_workers=int(options.get('--server-workers', 1)) if process is not None else None,
+                       mix=test.mix, large_share=test.large_share, large_size=int(options.get('--large-size', 150)),
+                       trace=test.trace, seed=seed, cores=os.cpu_count(), timestamp=time.time()),
+        'elapsed': elapsed,
+        **test.report(elapsed)
+    }
+    print(f"{'requests':<22}{'count':>7}{'rps':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean bytes':>12}")
+    for name, row in [('all', report)] + list(report['by_request'].items()):
+        latency, size = row['latency_ms'], row['response_bytes']
+        print(f"{name:<22}{row['requests']:>7}{row['throughput_rps']:>9.1f}{row['error_rate']:>8.1%}"
+              f"{latency['p50']:>10.1f}{latency['p95']:>10.1f}{latency['p99']:>10.1f}{size['mean'] or 0:>12.0f}")
+    if '--json' in options:
+        with open(options['--json'], 'w') as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
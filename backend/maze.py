@@ -8,22 +8,57 @@ start is a tuple (x, y) with x as column and y as row, and walls is a set of tup
 ========= Step 1 =========
 Import necessary libraries
 '''
-from frontier import Stack, Queue, PriorityQueue
+from frontier import Stack, Queue, PriorityQueue, BucketQueue
 from utils import *
 from node import Node
-import time
+from graph import ReducedGraph
+from components import ComponentLabels
+from firstmove import FirstMoveTable
+from external import ExternalBFS, PackedGrid
+from parallel import ParallelBFS
+from grid import OccupancyGrid
+from goals import GoalIndex
+from autoselect import choose_engine, engine_name, maze_features
+from steps import Expanded, FrontierSize, LegCompleted, SolveFinished
+from stats import SearchStats, TimedFrontier, timed
+from time import perf_counter_ns
+import os
+import tempfile
+
+# the algorithms that Maze.solve() can run ('auto' picks one of them from the features of the maze, see autoselect.py)
+ALGORITHMS = ('bfs', 'dfs', 'gbfs', 'as', 'ucs', 'was', 'backtracking', 'depthlimited', 'ids', 'idas', 'auto')
+
+# how much of the exploration the solvers record, see Maze.trace
+TRACE_LEVELS = ('none', 'counts', 'full')
 
 """
 ========= Step 2 =========
 Define the Maze class
 """
 class Maze:
-    def __init__(self, size, start, goals, walls):
+    def __init__(self, size, start, goals, walls, neighbors=None, costs=None):
         self.size = size # size is a tuple (rows, columns)
         self.start = start # start is a tuple with (x, y) where x is column and y is row
         self.goals = goals # goals is a list of tuples with (x, y) where x is column and y is row
         self.walls = walls # set of tuples with (x, y) where x is column and y is row
 
+        # optional terrain costs {(x, y): cost of entering the cell}, from 1 to 255, cells that are not listed cost 1
+        self.costs = costs
+
+        # optional precomputed neighbor table {(x, y): [(action, (nx, ny)), ...]} shared between solves of the same grid
+        self.neighbors = neighbors
+
+        # optional reduced graph (dead ends filled, corridors contracted) used by BFS, DFS, GBFS and A*, see preprocess()
+        self.graph = None
+        # optional function returning a cached reduced graph for this maze (e.g. the one of a server session), see preprocess()
+        self.graph_provider = None
+
+        # optional connected component labels, used to answer unreachable goals without searching, see label_components()
+        self.components = None
+
+        # optional compressed first-move table, used to answer shortest path queries without searching, see build_first_moves()
+        self.first_moves = None
+
         # keep tract of the single and multiple goal search for representing in the frontend
         self.solution_single = [] # list of list of tuples (x, y) where x is column and y is row
         self.solution_multiple = [] # list of tuples (x, y) where x is column and y is row storing the path to all goals
@@ -43,9 +78,34 @@ class Maze:
         self.path_length_single = []
         self.path_length_multiple = 0
 
+        # keep track of the path cost single and multiple (the sum of the terrain costs of the cells entered, the length on unit cost grids)
+        self.path_cost_single = []
+        self.path_cost_multiple = 0
+
+        # keep track of the search statistics (counters and per-phase times), see stats.py
+        # phase_timing adds a timer around every frontier, neighbor and heuristic call
+        self.stats = SearchStats()
+        self.phase_timing = False
+
+        # keep track of how much of the exploration is recorded:
+        # 'full' records the explored nodes (nodes_explored_*, visited_by_depth) for the frontend,
+        # 'counts' only keeps the explored counts of every leg and 'none' only the total count,
+        # the solvers skip the per-node list work below 'full' (the reexpansion statistic needs the full trace)
+        self.trace = 'full'
+
+        # keep track of the anytime search (ARA*): the proven bound on path cost / optimal cost and whether the budget ran out
+        self.suboptimality_bound = None
+        self.budget_exhausted = False
+
+        # keep track of the engine chosen by the 'auto' algorithm (e.g. 'was' or 'bfs+preprocess') and the features it was chosen from
+        self.engine = None
+        self.engine_features = None
+
 
     ''' Define a function to check all the possible moves'''
     def possible_actions(self, state):
+        if self.neighbors is not None and state in self.neighbors:
+            return self.neighbors[state]
         x, y = state 
         actions = [
             ('up', (x, y - 1)),
@@ -58,7 +118,77 @@ class Maze:
             if 0 <= new_x < self.size[1] and 0 <= new_y < self.size[0] and (new_x, new_y) not in self.walls:
                 possible_actions.append((action, (new_x, new_y)))
         return possible_actions
+
+    ''' Define a function to precompute the possible moves of every cell so repeated solves can skip the bound and wall checks'''
+    def build_neighbors(self):
+        self.neighbors = None
+        neighbors = {}
+        for y in range(self.size[0]):
+            for x in range(self.size[1]):
+                neighbors[(x, y)] = self.possible_actions((x, y))
+        self.neighbors = neighbors
+        return neighbors
     
+    ''' Define a function to fill the dead ends and contract the corridors, so the searches run on the reduced graph'''
+    def preprocess(self, graph=None):
+        if graph is None and self.graph_provider is not None:
+            graph = self.graph_provider(self)
+        self.graph = graph if graph is not None else ReducedGraph(self, [self.start] + list(self.goals))
+        return self.graph
+
+    ''' Define a function to label the connected regions of the maze, so the solvers can detect unreachable goals instantly'''
+    def label_components(self, components=None):
+        self.components = components if components is not None else ComponentLabels(self.size, set(self.walls))
+        return self.components
+
+    ''' Define a function to precompute the first move of an optimal path between every pair of cells (offline, for static mazes)'''
+    def build_first_moves(self, processes=1, path=None):
+        self.first_moves = FirstMoveTable.build(self, processes=processes)
+        if path is not None:
+            self.first_moves.save(path)
+        return self.first_moves
+
+    ''' Define a function to use a first-move table saved by build_first_moves(), memory-mapped from the file'''
+    def load_first_moves(self, path):
+        table = FirstMoveTable.load(path)
+        if table.size != tuple(self.size):
+            table.close()
+            raise ValueError(f'The first-move table in {path} is for a {table.size} maze, not {tuple(self.size)}')
+        self.first_moves = table
+        return table
+
+    ''' Define a function to add or remove a wall, keeping the precomputed data of the maze up to date'''
+    def set_wall(self, cell, wall=True):
+        if isinstance(self.walls, frozenset):
+            # the walls (and the data computed from them) are shared with a server session, copy before changing
+            self.walls = set(self.walls)
+            self.neighbors = dict(self.neighbors) if self.neighbors is not None else None
+            self.components = self.components.copy() if self.components is not None else None
+            self.graph_provider = None # its graphs are built from the shared walls
+        elif not isinstance(self.walls, set):
+            self.walls = set(self.walls) # walls read from a file are a list
+        if wall:
+            self.walls.add(cell)
+        else:
+            self.walls.discard(cell)
+
+        if self.neighbors is not None:
+            x, y = cell
+            table, self.neighbors = self.neighbors, None
+            for state in (cell, (x, y - 1), (x - 1, y), (x, y + 1), (x + 1, y)):
+                if state in table:
+                    table[state] = self.possible_actions(state)
+            self.neighbors = table
+        if self.components is not None:
+            if wall:
+                self.components.close_cell(cell)
+            else:
+                self.components.open_cell(cell)
+        if self.graph is not None:
+            self.preprocess()
+        # the table would return paths through the old walls
+        self.first_moves = None
+
     ''' Define a function to reconstruct the path from the start to the goal'''
     def reconstruct_path(self, node):
         actions = []
@@ -93,8 +223,145 @@ class Maze:
         
         return actions
 
+    ''' Define a function to get the cost of entering a cell'''
+    def step_cost(self, state):
+        return self.costs.get(state, 1) if self.costs else 1
+
+    def _min_step_cost(self):
+        # the cells that are not listed cost 1, so the cheapest step is only above 1 when every free cell has a cost
+        if not self.costs:
+            return 1
+        rows, cols = self.size
+        return min((self.step_cost((x, y)) for y in range(rows) for x in range(cols) if (x, y) not in self.walls), default=1)
+
+    ''' Define a function to compute the cost of the paths found, leg by leg'''
+    def _path_costs(self):
+        # every solver records the cells entered after the start of the leg, so each of them costs its terrain cost
+        return [sum(self.step_cost(cell) for cell in cells) for cells in self.solution_single]
+
+    ''' Define the heuristic function used by the informed searches'''
+    def heuristic(self, state, goal):
+        return manhattan_distance(state, goal)
+
+    ''' Define a function to reset the results and the statistics before a new search'''
+    def _begin_solve(self):
+        self.stats = SearchStats()
+        self.explored = set()
+        self.solution = []
+        self.solution_single = []
+        self.solution_multiple = []
+        self.nodes_explored_single = []
+        self.nodes_explored_multiple = []
+        self.num_explored_single = []
+        self.num_explored_multiple = 0
+        self.path_length_single = []
+        self.path_length_multiple = 0
+        self.path_cost_single = []
+        self.path_cost_multiple = 0
+        self.visited_by_depth_all = []
+        self.suboptimality_bound = None
+        self.budget_exhausted = False
+        self._record = self.trace == 'full'
+
+        # shadow the methods with timed versions for this search only
+        if self.phase_timing:
+            self.possible_actions = timed(self.possible_actions, self.stats, 'neighbors')
+            self.heuristic = timed(self.heuristic, self.stats, 'heuristic')
+            self.reconstruct_path = timed(self.reconstruct_path, self.stats, 'reconstruct')
+        self.stats.add_phase('setup', self.stats.start_ns)
+
+    def _new_frontier(self, frontier_class):
+        frontier = frontier_class()
+        return TimedFrontier(frontier, self.stats) if self.phase_timing else frontier
+
+    def _goal_index(self):
+        # the remaining goals of this search: constant time goal tests and closest goal queries, see goals.py
+        return GoalIndex(self.goals, self.size)
+
+    def _leg_unreachable(self, targets, current_start):
+        return self.components is not None and not any(self.components.reachable(current_start, goal) for goal in targets)
+
+    def _fail_unreachable(self, filename, method, current_start, count_failed_leg=True):
+        # the exhaustive search would end after exploring the whole region of current_start, so count it without searching it
+        # (the depth first solvers never added the nodes of a failed leg to the total)
+        if count_failed_leg:
+            self.num_explored_multiple += self.components.component_size(current_start)
+        return self._finish(filename, method, False)
+
+    def _count_recursive_leg(self, count, explored):
+        # the recursion stack is the frontier of the depth first solvers: one push and one pop per call
+        self.stats.pushes += count
+        self.stats.pops += count
+        if self._record:
+            self.stats.reexpansions += len(explored) - len(set(explored))
+
+    ''' Define a function to run a stepwise solver to its end and return its result, the events are not used'''
+    def _run_steps(self, steps):
+        try:
+            while True:
+                next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+    def _batch_events(self, batch, frontier):
+        # the leg in progress is the one after the legs already solved
+        leg = len(self.solution_single)
+        yield Expanded(leg, batch)
+        yield FrontierSize(leg, frontier.pushes - frontier.pops)
+
+    def _leg_event(self, goal, cells):
+        leg = len(self.solution_single) - 1
+        return LegCompleted(leg, goal, cells, self.num_explored_single[leg])
+
+    def _replay_steps(self, run, batch_size):
+        # the solvers that are not stepwise run to the end first, then the recorded trace is given as events
+        result = run()
+        if not batch_size:
+            return result
+        leg_start = self.start
+        offset = 0
+        for leg, cells in enumerate(self.solution_single):
+            explored = self.nodes_explored_single[leg] if leg < len(self.nodes_explored_single) else []
+            offset += len(explored)
+            for index in range(0, len(explored), batch_size):
+                yield Expanded(leg, explored[index:index + batch_size])
+            goal = cells[-1] if cells else leg_start
+            count = self.num_explored_single[leg] if leg < len(self.num_explored_single) else len(explored)
+            yield LegCompleted(leg, goal, cells, count)
+            leg_start = goal
+        # the nodes of the leg that did not reach a goal
+        failed = self.nodes_explored_multiple[offset:]
+        for index in range(0, len(failed), batch_size):
+            yield Expanded(len(self.solution_single), failed[index:index + batch_size])
+        return result
+
+    ''' Define a function to drop what a search closed before its end still holds, the counts so far are kept'''
+    def _abandon_search(self):
+        self.explored = set()
+        self.nodes_explored_single = []
+        self.nodes_explored_multiple = []
+        self.visited_by_depth_all = []
+        self.time_taken = self.stats.elapsed()
+        for name in ('possible_actions', 'heuristic', 'reconstruct_path'):
+            self.__dict__.pop(name, None)
+
+    ''' Define a function to stop the timer, print the results outside of the measured time and return the result'''
+    def _finish(self, filename, method, result):
+        if self.trace == 'none':
+            self.num_explored_single = []
+        self.path_cost_single = self._path_costs()
+        self.path_cost_multiple = sum(self.path_cost_single)
+        self.time_taken = self.stats.elapsed()
+        for name in ('possible_actions', 'heuristic', 'reconstruct_path'):
+            self.__dict__.pop(name, None)
+        with self.stats.phase('serialize'):
+            self.print_results(filename, method)
+        return result
+
     def print_results(self, filename, method):
-        """Print results in the required assignment format"""
+        """Print results in the required assignment format (skipped when no filename is given, e.g. from the API)"""
+        if filename is None:
+            return
         if len(self.goals) == 1:
             # Single goal case
             if self.solution_single:
@@ -146,33 +413,113 @@ class Maze:
                 print(f"{filename} {method}")
                 print(f"No goal is reachable; {nodes_explored}")
 
+    ''' Define a function to run any of the algorithms by name, options are passed to the solver (e.g. the anytime budgets of A*)'''
+    def solve(self, algorithm, filename=None, limit=30, **options):
+        if algorithm in ('bfs', 'dfs'):
+            return self.solve_bfs_dfs(filename, algorithm)
+        elif algorithm in ('gbfs', 'as'):
+            return self.solve_gbfs_as(filename, algorithm, **options)
+        elif algorithm in ('ucs', 'was'):
+            return self.solve_weighted(filename, algorithm, weight=options.get('weight'))
+        elif algorithm == 'backtracking':
+            return self.solve_backtracking(filename)
+        elif algorithm == 'depthlimited':
+            return self.solve_depthlimited(filename, limit=limit)
+        elif algorithm == 'ids':
+            return self.solve_ids(filename, limit=limit)
+        elif algorithm == 'idas':
+            return self.solve_idas(filename, limit=limit)
+        elif algorithm == 'auto':
+            return self.solve_auto(filename)
+        raise ValueError(f'Unknown algorithm: {algorithm}')
+
+    ''' Define a function to run any of the algorithms step by step, as a generator of events (see steps.py)'''
+    def iter_solve(self, algorithm, filename=None, limit=30, batch_size=256, **options):
+        """
+        Yield the events of the search every batch_size expansions, then a SolveFinished event.
+        BFS, DFS, GBFS, A*, UCS and weighted A* run step by step: the search only goes on when the next event
+        is asked for, so it can be paused, interleaved with other work, or stopped early by closing the generator,
+        which frees its frontier and explored set right away. The other solvers (and the reduced graph, first-move
+        and anytime modes) run to the end at the first event, then their recorded trace is replayed as events.
+        When the generator is not closed early, the maze attributes hold the results, like after solve(), and
+        time_taken includes the time the search was paused.
+        """
+        if algorithm == 'auto':
+            # the chosen engine runs step by step when it can
+            algorithm, options = self._select_engine()
+        if algorithm in ('bfs', 'dfs'):
+            steps = self._steps_bfs_dfs(filename, algorithm, batch_size)
+        elif algorithm in ('gbfs', 'as'):
+            steps = self._steps_gbfs_as(filename, algorithm, batch_size=batch_size, **options)
+        elif algorithm in ('ucs', 'was'):
+            steps = self._steps_weighted(filename, algorithm, options.get('weight'), batch_size)
+        elif algorithm in ALGORITHMS:
+            steps = self._replay_steps(lambda: self.solve(algorithm, filename, limit, **options), batch_size)
+        else:
+            raise ValueError(f'Unknown algorithm: {algorithm}')
+        return self._iter_steps(steps)
+
+    def _iter_steps(self, steps):
+        finished = False
+        try:
+            result = yield from steps
+            finished = True
+        finally:
+            if not finished:
+                steps.close()
+                self._abandon_search()
+        yield SolveFinished(len(self.solution_single), result, self.num_explored_multiple,
+                            self.path_length_multiple, self.path_cost_multiple, self.time_taken)
+
+    ''' SOLVING WITH THE ENGINE CHOSEN FROM THE FEATURES OF THE MAZE'''
+    def solve_auto(self, filename=None):
+        """
+        Measure the features of the maze (cells, wall density, goals, corridor ratio, costs) and run the engine
+        expected to be the fastest among the ones that return a shortest path to the nearest remaining goal,
+        see autoselect.py. The engine is recorded in self.engine and the features in self.engine_features.
+        The time of the features and of the reduced graph is not counted in time_taken, like preprocess(), and the
+        reduced graph comes from graph_provider when the maze has one (e.g. the cache of a server session).
+        """
+        algorithm, options = self._select_engine()
+        return self.solve(algorithm, filename, **options)
+
+    def _select_engine(self):
+        self.engine_features = maze_features(self)
+        algorithm, options, preprocess = choose_engine(self.engine_features)
+        if preprocess and self.graph is None:
+            self.preprocess()
+        self.engine = engine_name(algorithm, preprocess)
+        return algorithm, options
+
     ''' SOLVING BFS AND DFS '''
-    def solve_bfs_dfs(self, filename, algorithm='bfs'):
-        start_time = time.time()
-        self.explored = set()
-        self.solution = []
-        self.solution_single = []
-        self.solution_multiple = []
-        self.nodes_explored_single = []
-        self.nodes_explored_multiple = []
-        self.num_explored_single = []
-        self.num_explored_multiple = 0
-        self.path_length_single = []
-        self.path_length_multiple = 0
+    def solve_bfs_dfs(self, filename=None, algorithm='bfs'):
+        return self._run_steps(self._steps_bfs_dfs(filename, algorithm))
+
+    def _steps_bfs_dfs(self, filename=None, algorithm='bfs', batch_size=None):
+        if algorithm == 'bfs' and self.first_moves is not None and not self.costs:
+            return (yield from self._replay_steps(lambda: self.solve_first_moves(filename, algorithm), batch_size))
+        if self.graph is not None:
+            return (yield from self._replay_steps(lambda: self.solve_reduced(filename, algorithm), batch_size))
+
+        self._begin_solve()
         full_actions = []
 
         Frontier = Queue if algorithm == 'bfs' else Stack
         current_start = self.start
-        remaining_goals = list(self.goals)
+        remaining_goals = self._goal_index()
         found_goals = []
 
         while remaining_goals:
-            frontier = Frontier()
+            if self._leg_unreachable(remaining_goals, current_start):
+                return self._fail_unreachable(filename, algorithm.upper(), current_start)
+            frontier = self._new_frontier(Frontier)
             start_node = Node(state=current_start, parent=None, action=None)
             frontier.add(start_node)
             current_explored = []
             num_explored_single = 0
             self.explored = set()
+            record = self._record
+            batch = [] if batch_size else None
 
             goal_found = False
 
@@ -181,23 +528,35 @@ class Maze:
                 self.num_explored_multiple += 1
                 num_explored_single += 1
                 self.explored.add(node.state)
-                current_explored.append(node.state)
-                self.nodes_explored_multiple.append(node.state)
+                if record:
+                    current_explored.append(node.state)
+                    self.nodes_explored_multiple.append(node.state)
+                if batch is not None:
+                    batch.append(node.state)
+                    if len(batch) >= batch_size:
+                        yield from self._batch_events(batch, frontier)
+                        batch = []
                 
                 # Check if the current node state is any of the remaining goals
                 if node.state in remaining_goals:
+                    if batch is not None:
+                        yield from self._batch_events(batch, frontier)
+                        batch = []
                     current_goal = node.state
                     found_goals.append(current_goal)
                     remaining_goals.remove(current_goal)  # Remove the found goal
                     current_start = current_goal
                     actions, cells = self.reconstruct_path(node)
                     full_actions.extend(actions)
-                    self.nodes_explored_single.append(current_explored)
+                    if record:
+                        self.nodes_explored_single.append(current_explored)
                     self.num_explored_single.append(num_explored_single)
                     self.solution_single.append(cells)
                     self.solution_multiple.extend(cells)
                     self.path_length_multiple += len(cells)
                     self.path_length_single.append(len(cells))
+                    if batch is not None:
+                        yield self._leg_event(current_goal, cells)
                     num_explored_single = 0
                     current_explored = []
                     goal_found = True
@@ -209,32 +568,32 @@ class Maze:
                         child = Node(state=state, parent=node, action=action)
                         frontier.add(child)
 
+            self.stats.collect_frontier(frontier)
             if not goal_found:
-                self.time_taken = time.time() - start_time
-                method = algorithm.upper()
-                self.print_results(filename, method)
-                return False
+                if batch:
+                    yield from self._batch_events(batch, frontier)
+                return self._finish(filename, algorithm.upper(), False)
             
-        self.time_taken = time.time() - start_time
-        method = algorithm.upper()
-        self.print_results(filename, method)
-        return True
+        return self._finish(filename, algorithm.upper(), True)
     
     ''' SOlVING GREEDY BEST FIRST SEARCH AND ASTAR'''
-    def solve_gbfs_as(self, filename, algorithm="as"):
-        start_time = time.time()
-        self.explored = set()
-        self.solution = []
-        self.solution_single = []
-        self.solution_multiple = []
-        self.nodes_explored_single = []
-        self.nodes_explored_multiple = []
-        self.num_explored_single = []
-        self.num_explored_multiple = 0
-        self.path_length_single = []
-        self.path_length_multiple = 0
-
-        remaining_goals = list(self.goals)
+    def solve_gbfs_as(self, filename=None, algorithm="as", time_budget=None, expansion_budget=None, weight=None, nearest_goal=False):
+        # With a time budget (seconds), an expansion budget or an inflation weight, A* runs in anytime mode (ARA*)
+        # With nearest_goal, every leg heads to any remaining goal instead of the closest one by Manhattan distance,
+        # guided by the distance to the closest remaining goal, so A* reaches the goal with the shortest path
+        return self._run_steps(self._steps_gbfs_as(filename, algorithm, time_budget, expansion_budget, weight, nearest_goal))
+
+    def _steps_gbfs_as(self, filename=None, algorithm="as", time_budget=None, expansion_budget=None, weight=None, nearest_goal=False, batch_size=None):
+        if algorithm == "as" and (time_budget is not None or expansion_budget is not None or weight is not None):
+            return (yield from self._replay_steps(lambda: self.solve_anytime(filename, time_budget, expansion_budget, weight), batch_size))
+        if algorithm == "as" and self.first_moves is not None and not self.costs:
+            return (yield from self._replay_steps(lambda: self.solve_first_moves(filename, algorithm, nearest_goal), batch_size))
+        if self.graph is not None:
+            return (yield from self._replay_steps(lambda: self.solve_reduced(filename, algorithm, nearest_goal), batch_size))
+
+        self._begin_solve()
+
+        remaining_goals = self._goal_index()
         current_start = self.start
         found_goals = []
         full_actions = []
@@ -243,14 +602,18 @@ class Maze:
             self.explored = set()
             current_explored = []
             num_explored_single = 0
-            frontier = PriorityQueue()
-
-            # Find the closest goal using Manhattan distance
-            closest_goal = min(remaining_goals, key=lambda goal: manhattan_distance(current_start, goal))
+            frontier = self._new_frontier(PriorityQueue)
+            record = self._record
+            batch = [] if batch_size else None
+
+            # Find the closest goal using Manhattan distance (None when any remaining goal will do)
+            closest_goal = None if nearest_goal else remaining_goals.nearest(current_start)
+            if self._leg_unreachable([closest_goal] if closest_goal is not None else remaining_goals, current_start):
+                return self._fail_unreachable(filename, "GBFS" if algorithm == "gbfs" else "AS", current_start)
             
             # Start node setup
             start_node = Node(state=current_start, parent=None, action=None, cost=0)
-            heuristic = manhattan_distance(current_start, closest_goal)
+            heuristic = self.heuristic(current_start, closest_goal) if closest_goal is not None else remaining_goals.min_distance(current_start)
             start_node.heuristic = heuristic
             frontier.add(start_node)
 
@@ -262,98 +625,515 @@ class Maze:
                     continue
 
                 self.explored.add(node.state)
-                current_explored.append(node.state)
-                self.nodes_explored_multiple.append(node.state)
+                if record:
+                    current_explored.append(node.state)
+                    self.nodes_explored_multiple.append(node.state)
                 num_explored_single += 1
                 self.num_explored_multiple += 1
+                if batch is not None:
+                    batch.append(node.state)
+                    if len(batch) >= batch_size:
+                        yield from self._batch_events(batch, frontier)
+                        batch = []
 
                 # Check if we reached the closest goal
-                if node.state == closest_goal:
+                if node.state == closest_goal or (closest_goal is None and node.state in remaining_goals):
+                    if batch is not None:
+                        yield from self._batch_events(batch, frontier)
+                        batch = []
                     current_goal = node.state
                     found_goals.append(current_goal)
-                    remaining_goals.remove(closest_goal)  # Remove the specific goal we found
+                    remaining_goals.remove(current_goal)  # Remove the specific goal we found
                     current_start = current_goal
 
                     actions, cells = self.reconstruct_path(node)
                     full_actions.extend(actions)
                     self.solution_single.append(cells)
                     self.solution_multiple.extend(cells)
-                    self.nodes_explored_single.append(current_explored)
+                    if record:
+                        self.nodes_explored_single.append(current_explored)
                     self.num_explored_single.append(num_explored_single)
                     self.path_length_single.append(len(cells))
                     self.path_length_multiple += len(cells)
+                    if batch is not None:
+                        yield self._leg_event(current_goal, cells)
 
                     goal_found = True
                     break
 
                 for action, state in self.possible_actions(node.state):
                     if not frontier.contain_state(state) and state not in self.explored:
-                        # Use heuristic to the closest goal
-                        heuristic = manhattan_distance(state, closest_goal)
+                        # Use heuristic to the closest goal, or to the closest remaining goal from this state
+                        heuristic = self.heuristic(state, closest_goal) if closest_goal is not None else remaining_goals.min_distance(state)
                         cost = 0 if algorithm == "gbfs" else node.cost + 1
                         child = Node(state=state, parent=node, action=action, cost=cost, heuristic=heuristic)
                         frontier.add(child)
 
+            self.stats.collect_frontier(frontier)
             if not goal_found:
-                self.time_taken = time.time() - start_time
-                method = "GBFS" if algorithm == "gbfs" else "AS"
-                self.print_results(filename, method)
-                return False
-
-        self.time_taken = time.time() - start_time
-        method = "GBFS" if algorithm == "gbfs" else "AS"
-        self.print_results(filename, method)
+                if batch:
+                    yield from self._batch_events(batch, frontier)
+                return self._finish(filename, "GBFS" if algorithm == "gbfs" else "AS", False)
+
+        return self._finish(filename, "GBFS" if algorithm == "gbfs" else "AS", True)
+
+    ''' SOLVING UNIFORM COST SEARCH AND A* ON WEIGHTED TERRAIN'''
+    def solve_weighted(self, filename=None, algorithm='ucs', weight=None):
+        """
+        Dijkstra (ucs) and A* (was) with the terrain costs: moving into a cell costs self.costs[cell].
+        All the priorities are integers, so the frontier is a BucketQueue (Dial's algorithm) instead of the heap.
+        The A* heuristic is the Manhattan distance times the cheapest cell cost, which never overestimates;
+        a weight above 1 inflates it (weighted A*), trading path cost for fewer expansions.
+        UCS stops at the cheapest remaining goal, A* heads to the closest goal like solve_gbfs_as.
+        """
+        return self._run_steps(self._steps_weighted(filename, algorithm, weight))
+
+    def _steps_weighted(self, filename=None, algorithm='ucs', weight=None, batch_size=None):
+        if algorithm == 'ucs' and self.first_moves is not None:
+            return (yield from self._replay_steps(lambda: self.solve_first_moves(filename, algorithm), batch_size))
+        self._begin_solve()
+        method = algorithm.upper()
+        weight = 1.0 if weight is None else max(1.0, weight)
+        min_cost = self._min_step_cost() if algorithm == 'was' else 1
+
+        remaining_goals = self._goal_index()
+        current_start = self.start
+
+        while remaining_goals:
+            target = remaining_goals.nearest(current_start) if algorithm == 'was' else None
+            if self._leg_unreachable([target] if target is not None else remaining_goals, current_start):
+                return self._fail_unreachable(filename, method, current_start)
+            self.explored = set()
+            current_explored = []
+            best = {current_start: 0} # lowest cost found so far for every reached cell
+            frontier = self._new_frontier(BucketQueue)
+            frontier.add(Node(state=current_start, parent=None, action=None, cost=0))
+            goal_node = None
+            record = self._record
+            batch = [] if batch_size else None
+
+            while not frontier.isEmpty():
+                node = frontier.remove()
+                if node.state in self.explored:
+                    continue # stale entry, the cell was reached again with a lower cost
+                self.explored.add(node.state)
+                if record:
+                    current_explored.append(node.state)
+                if batch is not None:
+                    batch.append(node.state)
+                    if len(batch) >= batch_size:
+                        yield from self._batch_events(batch, frontier)
+                        batch = []
+
+                if node.state == target or (target is None and node.state in remaining_goals):
+                    goal_node = node
+                    break
+
+                for action, state in self.possible_actions(node.state):
+                    cost = node.cost + self.step_cost(state)
+                    if state in self.explored or (state in best and best[state] <= cost):
+                        continue
+                    best[state] = cost
+                    child = Node(state=state, parent=node, action=action, cost=cost)
+                    if target is not None:
+                        child.heuristic = int(weight * min_cost * self.heuristic(state, target))
+                    frontier.add(child)
+
+            self.stats.collect_frontier(frontier)
+            self.nodes_explored_multiple.extend(current_explored)
+            self.num_explored_multiple += len(self.explored)
+            if batch:
+                yield from self._batch_events(batch, frontier)
+            if goal_node is None:
+                return self._finish(filename, method, False)
+
+            actions, cells = self.reconstruct_path(goal_node)
+            remaining_goals.remove(goal_node.state)
+            current_start = goal_node.state
+
+            self.solution_single.append(cells)
+            self.solution_multiple.extend(cells)
+            if record:
+                self.nodes_explored_single.append(current_explored)
+            self.num_explored_single.append(len(self.explored))
+            self.path_length_single.append(len(cells))
+            self.path_length_multiple += len(cells)
+            if batch is not None:
+                yield self._leg_event(goal_node.state, cells)
+
+        return self._finish(filename, method, True)
+
+    ''' SOLVING WITH THE FIRST-MOVE TABLE'''
+    def solve_first_moves(self, filename=None, algorithm='bfs', nearest_goal=False):
+        """
+        Follow the first-move table built by build_first_moves() instead of searching: every step is one table lookup.
+        The goals are visited in the order of the search it replaces: A* heads to the closest goal by Manhattan
+        distance (unless nearest_goal), BFS and UCS go to the cheapest remaining goal (the paths to the closest goals are walked to compare them).
+        The explored nodes are the cells looked up on the walks.
+        """
+        self._begin_solve()
+        remaining_goals = self._goal_index()
+        current_start = self.start
+        min_cost = self._min_step_cost()
+
+        while remaining_goals:
+            if algorithm == 'as' and not nearest_goal:
+                candidates = [remaining_goals.nearest(current_start)]
+            else:
+                # walk from the closest goal: a path costs at least its Manhattan distance times the cheapest step,
+                # so the farther goals are skipped once none of them can beat the cheapest walk found
+                candidates = sorted(remaining_goals, key=lambda goal: (self.heuristic(current_start, goal), remaining_goals.order[goal]))
+            current_explored = []
+            best = None
+            for goal in candidates:
+                if best is not None and min_cost * self.heuristic(current_start, goal) > best[0]:
+                    break
+                walk = self.first_moves.path(current_start, goal)
+                if walk is None:
+                    continue
+                current_explored.extend(walk[1])
+                cost = sum(self.step_cost(cell) for cell in walk[1])
+                # on equal costs, the goal listed first wins
+                if best is None or (cost, remaining_goals.order[goal]) < (best[0], remaining_goals.order[best[1]]):
+                    best = (cost, goal, walk[1])
+
+            if self._record:
+                self.nodes_explored_multiple.extend(current_explored)
+            self.num_explored_multiple += len(current_explored)
+            if best is None:
+                return self._finish(filename, algorithm.upper(), False)
+
+            _, goal, cells = best
+            remaining_goals.remove(goal)
+            current_start = goal
+
+            self.solution_single.append(cells)
+            self.solution_multiple.extend(cells)
+            if self._record:
+                self.nodes_explored_single.append(current_explored)
+            self.num_explored_single.append(len(current_explored))
+            self.path_length_single.append(len(cells))
+            self.path_length_multiple += len(cells)
+
+        return self._finish(filename, algorithm.upper(), True)
+
+    ''' SOLVING BFS OUT OF CORE'''
+    def solve_external(self, filename=None, memory_budget=64 * 2 ** 20, workdir=None):
+        """
+        BFS with its layers on disk (see external.py), for grids larger than memory. The walls should be a
+        PackedGrid; other walls are first written to a temporary packed grid in workdir. Every leg goes to the
+        nearest remaining goal that BFS reaches first, with the same path, and explores whole layers, so the counts
+        can be higher than BFS.
+        Only the counts are recorded, the explored nodes are never held in memory.
+        """
+        self._begin_solve()
+        grid = self.walls
+        if not isinstance(grid, PackedGrid):
+            handle, path = tempfile.mkstemp(prefix='packed-grid-', dir=workdir)
+            os.close(handle)
+            grid = PackedGrid.from_walls(path, self.size, self.walls)
+        search = ExternalBFS(grid, memory_budget, workdir)
+
+        remaining_goals = self._goal_index()
+        current_start = self.start
+        try:
+            while remaining_goals:
+                leg = search.search(current_start, list(remaining_goals))
+                self.num_explored_multiple += leg['explored']
+                if leg['goal'] is None:
+                    return self._finish(filename, "BFS", False)
+
+                cells = leg['path']
+                remaining_goals.remove(leg['goal'])
+                current_start = leg['goal']
+                self.solution_single.append(cells)
+                self.solution_multiple.extend(cells)
+                self.num_explored_single.append(leg['explored'])
+                self.path_length_single.append(len(cells))
+                self.path_length_multiple += len(cells)
+        finally:
+            if grid is not self.walls:
+                grid.close(remove=True)
+
+        return self._finish(filename, "BFS", True)
+
+    ''' SOLVING BFS IN PARALLEL'''
+    def solve_parallel(self, filename=None, workers=None):
+        """
+        Level-synchronous BFS over worker processes that each own a band of rows (see parallel.py).
+        Every leg goes to the nearest remaining goal that BFS reaches first, with the same path, and explores
+        whole levels, so the counts can be higher than BFS. Only the counts are recorded.
+        """
+        self._begin_solve()
+        grid = self.walls if isinstance(self.walls, OccupancyGrid) else OccupancyGrid.from_walls(self.size, self.walls)
+
+        remaining_goals = self._goal_index()
+        current_start = self.start
+        with ParallelBFS(grid, workers or os.cpu_count() or 1) as search:
+            while remaining_goals:
+                leg = search.search(current_start, list(remaining_goals))
+                self.num_explored_multiple += leg['explored']
+                if leg['goal'] is None:
+                    return self._finish(filename, "BFS", False)
+
+                cells = leg['path']
+                remaining_goals.remove(leg['goal'])
+                current_start = leg['goal']
+                self.solution_single.append(cells)
+                self.solution_multiple.extend(cells)
+                self.num_explored_single.append(leg['explored'])
+                self.path_length_single.append(len(cells))
+                self.path_length_multiple += len(cells)
+
+        return self._finish(filename, "BFS", True)
+
+    ''' SOLVING ON THE REDUCED GRAPH'''
+    def solve_reduced(self, filename=None, algorithm='bfs', nearest_goal=False):
+        """
+        Run BFS, DFS, GBFS or A* on the reduced graph built by preprocess(). The edges have a cost (the length
+        of the corridor), so BFS becomes a uniform cost search to keep returning the shortest paths.
+        The explored nodes are the junctions, and the paths are expanded back into the cells of the corridors.
+        """
+        self._begin_solve()
+        if self.graph is None:
+            self.preprocess()
+        edges = self.graph.edges
+
+        remaining_goals = self._goal_index()
+        current_start = self.start
+
+        while remaining_goals:
+            self.explored = set()
+            current_explored = []
+            frontier = self._new_frontier(Stack if algorithm == 'dfs' else PriorityQueue)
+            # A* and GBFS head to the closest goal using Manhattan distance, BFS and DFS (and nearest_goal) stop at any remaining goal
+            target = remaining_goals.nearest(current_start) if algorithm in ('gbfs', 'as') and not nearest_goal else None
+            frontier.add(Node(state=current_start, parent=None, action=[], cost=0))
+            goal_node = None
+            record = self._record
+
+            while not frontier.isEmpty():
+                node = frontier.remove()
+                if node.state in self.explored:
+                    continue # stale entry, the node was reached with a lower priority
+                self.explored.add(node.state)
+                if record:
+                    current_explored.append(node.state)
+
+                if node.state == target or (target is None and node.state in remaining_goals):
+                    goal_node = node
+                    break
+
+                for neighbor, cost, cells in edges.get(node.state, []):
+                    if neighbor in self.explored:
+                        continue
+                    # the action of a reduced graph node is the corridor of cells taken from its parent
+                    child = Node(state=neighbor, parent=node, action=cells, cost=node.cost + cost)
+                    if algorithm == 'gbfs':
+                        child.cost = 0
+                    if target is not None:
+                        child.heuristic = self.heuristic(neighbor, target)
+                    elif nearest_goal:
+                        child.heuristic = remaining_goals.min_distance(neighbor)
+                    frontier.add(child)
+
+            self.stats.collect_frontier(frontier)
+            self.nodes_explored_multiple.extend(current_explored)
+            self.num_explored_multiple += len(self.explored)
+            if goal_node is None:
+                return self._finish(filename, algorithm.upper(), False)
+
+            cells = []
+            corridors, _ = self.reconstruct_path(goal_node)
+            for corridor in corridors:
+                cells.extend(corridor)
+            remaining_goals.remove(goal_node.state)
+            current_start = goal_node.state
+
+            self.solution_single.append(cells)
+            self.solution_multiple.extend(cells)
+            if record:
+                self.nodes_explored_single.append(current_explored)
+            self.num_explored_single.append(len(self.explored))
+            self.path_length_single.append(len(cells))
+            self.path_length_multiple += len(cells)
+
+        return self._finish(filename, algorithm.upper(), True)
+
+    ''' SOLVING ANYTIME A* (ARA*)'''
+    def solve_anytime(self, filename=None, time_budget=None, expansion_budget=None, weight=None, weight_step=0.5):
+        """
+        ARA*: run weighted A* with f = g + weight * h, then lower the weight by weight_step and reuse the
+        previous search until the weight reaches 1 (plain A*) or the budget runs out. Each leg keeps the best
+        path found so far, and the bound reported is how far its cost can be above the optimal one.
+        Each leg gets an equal share of what is left of the budgets, and the budget only stops the refinement:
+        the first weighted A* search of a leg always runs until it finds a path, so every leg has one.
+        """
+        self._begin_solve()
+        weight = max(1.0, weight if weight is not None else 3.0)
+        deadline_ns = None if time_budget is None else self.stats.start_ns + int(time_budget * 1e9)
+        expansions_left = expansion_budget
+
+        remaining_goals = self._goal_index()
+        current_start = self.start
+        bound = 1.0
+
+        while remaining_goals:
+            # Find the closest goal using Manhattan distance
+            closest_goal = remaining_goals.nearest(current_start)
+            if self._leg_unreachable([closest_goal], current_start):
+                return self._fail_unreachable(filename, "AS", current_start)
+            self._current_explored = []
+            self._explored_count = 0
+            # share what is left of the budgets between this leg and the legs after it
+            legs = len(remaining_goals)
+            self._expansions_left = None if expansions_left is None else max(0, expansions_left) // legs
+            leg_deadline_ns = None if deadline_ns is None else perf_counter_ns() + max(0, deadline_ns - perf_counter_ns()) // legs
+            goal_node, leg_bound = self._ara_star_leg(current_start, closest_goal, weight, weight_step, leg_deadline_ns)
+            if expansions_left is not None:
+                expansions_left -= self._explored_count
+
+            self.nodes_explored_multiple.extend(self._current_explored)
+            self.num_explored_multiple += self._explored_count
+            if goal_node is None:
+                return self._finish(filename, "AS", False)
+
+            remaining_goals.remove(closest_goal)
+            current_start = closest_goal
+            bound = max(bound, leg_bound)
+
+            actions, cells = self.reconstruct_path(goal_node)
+            self.solution_single.append(cells)
+            self.solution_multiple.extend(cells)
+            if self._record:
+                self.nodes_explored_single.append(self._current_explored)
+            self.num_explored_single.append(self._explored_count)
+            self.path_length_single.append(len(cells))
+            self.path_length_multiple += len(cells)
+
+        self.suboptimality_bound = bound
+        return self._finish(filename, "AS", True)
+
+    def _budget_left(self, deadline_ns):
+        if self._expansions_left is not None and self._expansions_left <= 0:
+            return False
+        if deadline_ns is not None and perf_counter_ns() >= deadline_ns:
+            return False
         return True
 
+    def _ara_star_leg(self, start, goal, weight, weight_step, deadline_ns):
+        # best[state] is the Node with the lowest cost (g) found so far; its parent chain is the path
+        best = {start: Node(state=start, parent=None, action=None, cost=0)}
+        frontier = self._new_frontier(PriorityQueue)
+        frontier.add(Node(state=start, parent=None, action=None, cost=0, heuristic=weight * self.heuristic(start, goal)))
+        inconsistent = {}
+        goal_node = None
+        bound = float('inf')
+        exhausted = False
+
+        while True:
+            closed = set()
+            # improve the path: expand while some frontier node could still lead to a cheaper goal
+            while not frontier.isEmpty() and (goal not in best or frontier.frontier[0].total_cost() < best[goal].cost):
+                # the budget stops the refinement, never the search for the first path of the leg
+                if goal in best and not self._budget_left(deadline_ns):
+                    exhausted = self.budget_exhausted = True
+                    break
+                node = frontier.remove()
+                if node.cost > best[node.state].cost or node.state in closed:
+                    continue # stale entry, a cheaper one was pushed later
+                closed.add(node.state)
+                self._explored_count += 1
+                if self._record:
+                    self._current_explored.append(node.state)
+                if self._expansions_left is not None:
+                    self._expansions_left -= 1
+
+                for action, state in self.possible_actions(node.state):
+                    cost = node.cost + 1
+                    if state in best and best[state].cost <= cost:
+                        continue
+                    child = Node(state=state, parent=node, action=action, cost=cost)
+                    best[state] = child
+                    if state in closed:
+                        inconsistent[state] = child # re-opened in the next iteration, with a lower weight
+                    else:
+                        child.heuristic = weight * self.heuristic(state, goal)
+                        frontier.add(child)
+
+            if goal in best:
+                goal_node = best[goal]
+                # the optimal cost is at least the smallest g + h among the nodes that are still open
+                pending = [node for node in frontier.frontier if node.cost <= best[node.state].cost] + list(inconsistent.values())
+                lower = min([node.cost + self.heuristic(node.state, goal) for node in pending] + [goal_node.cost])
+                ratio = goal_node.cost / lower if lower > 0 else 1.0
+                # the weight only bounds the cost when this iteration finished improving the path
+                bound = min(bound, ratio) if exhausted else min(weight, ratio)
+
+            if exhausted or weight <= 1.0 or (goal_node is not None and bound <= 1.0):
+                break
+
+            # lower the weight and move the inconsistent nodes back into the re-keyed frontier
+            weight = max(1.0, weight - weight_step)
+            self.stats.collect_frontier(frontier)
+            open_nodes = [node for node in frontier.frontier if node.cost <= best[node.state].cost] + list(inconsistent.values())
+            frontier = self._new_frontier(PriorityQueue)
+            for node in open_nodes:
+                node.heuristic = weight * self.heuristic(node.state, goal)
+                frontier.add(node)
+            inconsistent = {}
+
+        self.stats.collect_frontier(frontier)
+        if goal_node is None:
+            return None, None
+        return goal_node, bound
+
     ''' SOLVING BACKTRACKING '''
-    def solve_backtracking(self, filename):
-        start_time = time.time()
-        self.solution = []
-        self.solution_single = []
-        self.solution_multiple = []
-        self.nodes_explored_single = []
-        self.nodes_explored_multiple = []
-        self.num_explored_single = []
-        self.num_explored_multiple = 0
-        self.path_length_single = []
-        self.path_length_multiple = 0
+    def solve_backtracking(self, filename=None):
+        self._begin_solve()
 
         current_start = self.start
-        remaining_goals = list(self.goals)
+        remaining_goals = self._goal_index()
 
         while remaining_goals:
+            if self._leg_unreachable(remaining_goals, current_start):
+                return self._fail_unreachable(filename, "BACKTRACKING", current_start, count_failed_leg=False)
             path = []
             self._current_explored = []
             found_goal = None
 
             # Try to find any of the remaining goals using backtracking
-            if self._backtrack_search(current_start, remaining_goals, path, visited=set()):
+            # every call visits a new cell, so the visited set also counts the explored nodes
+            visited = set()
+            found_path = self._backtrack_search(current_start, remaining_goals, path, visited)
+            self._count_recursive_leg(len(visited), self._current_explored)
+            if found_path:
                 # The found goal is stored in the last element of the path
                 found_goal = path[-1]
                 remaining_goals.remove(found_goal)
                 
-                complete_path = [current_start] + path
-                self.solution_single.append(complete_path)
-                self.solution_multiple.extend(complete_path)
-                self.nodes_explored_single.append(self._current_explored.copy())
-                self.nodes_explored_multiple.extend(self._current_explored)
-                self.num_explored_single.append(len(self._current_explored))
-                self.num_explored_multiple += len(self._current_explored)
-                self.path_length_single.append(len(complete_path))
-                self.path_length_multiple += len(complete_path)
+                # the path holds the cells entered after the start, like the paths of the other solvers
+                self.solution_single.append(path)
+                self.solution_multiple.extend(path)
+                if self._record:
+                    self.nodes_explored_single.append(self._current_explored.copy())
+                    self.nodes_explored_multiple.extend(self._current_explored)
+                self.num_explored_single.append(len(visited))
+                self.num_explored_multiple += len(visited)
+                self.path_length_single.append(len(path))
+                self.path_length_multiple += len(path)
                 current_start = found_goal
             else:
-                self.time_taken = time.time() - start_time
-                self.print_results(filename, "BACKTRACKING")
-                return False
+                return self._finish(filename, "BACKTRACKING", False)
 
-        self.time_taken = time.time() - start_time
-        self.print_results(filename, "BACKTRACKING")
-        return True
+        return self._finish(filename, "BACKTRACKING", True)
 
     def _backtrack_search(self, current, goals, path, visited):
-        self._current_explored.append(current)
+        if self._record:
+            self._current_explored.append(current)
         visited.add(current)
+        if len(path) > self.stats.peak_frontier:
+            self.stats.peak_frontier = len(path)
 
         # Check if current position is any of the goals
         if current in goals:
@@ -374,76 +1154,64 @@ class Maze:
         return False
     
     ''' SOLVING DEPTH LIMITED '''
-    def solve_depthlimited(self, filename, limit):
-        start_time = time.time()
-
-        # Reset all tracking data
-        self.solution = []
-        self.solution_single = []
-        self.solution_multiple = []
-        self.nodes_explored_single = []
-        self.nodes_explored_multiple = []
-        self.num_explored_single = []
-        self.num_explored_multiple = 0
-        self.path_length_single = []
-        self.path_length_multiple = 0
-        self.visited_by_depth_all = []
+    def solve_depthlimited(self, filename=None, limit=30):
+        self._begin_solve()
 
         current_start = self.start
-        remaining_goals = list(self.goals)
+        remaining_goals = self._goal_index()
 
         while remaining_goals:
-            found = False  # flag to break after first reachable goal
-
-            for goal in remaining_goals:
-                path = []
-                self._current_explored = []
-                visited = set()
-                visited_by_depth = {}
-
-                result, found_goal = self._dls_recursive(
-                    current=current_start,
-                    goals=remaining_goals,
-                    limit=limit,
-                    path=path,
-                    visited=visited,
-                    visited_by_depth=visited_by_depth,
-                    depth=0
-                )
-
-                if result == "found":
-                    complete_path = [current_start] + path
-                    self.solution_single.append(complete_path)
-                    self.solution_multiple.extend(complete_path)
-                    self.nodes_explored_single.append(self._current_explored.copy())
-                    self.nodes_explored_multiple.extend(self._current_explored)
-                    self.num_explored_single.append(len(self._current_explored))
-                    self.num_explored_multiple += len(self._current_explored)
-                    self.path_length_single.append(len(complete_path))
-                    self.path_length_multiple += len(complete_path)
-                    self.visited_by_depth_all.append(visited_by_depth)
-
-                    current_start = found_goal
-                    remaining_goals.remove(found_goal)
-                    found = True
-                    break
+            if self._leg_unreachable(remaining_goals, current_start):
+                return self._fail_unreachable(filename, "DLS", current_start, count_failed_leg=False)
+            # one search per leg tests every remaining goal, so it would find nothing more if it was repeated
+            path = []
+            self._current_explored = []
+            visited = set()
+            visited_by_depth = {} if self._record else None
+
+            result, found_goal = self._dls_recursive(
+                current=current_start,
+                goals=remaining_goals,
+                limit=limit,
+                path=path,
+                visited=visited,
+                visited_by_depth=visited_by_depth,
+                depth=0
+            )
+            # every call visits a new cell, so the visited set also counts the explored nodes
+            self._count_recursive_leg(len(visited), self._current_explored)
+
+            if result != "found":
+                return self._finish(filename, "DLS", False)
+
+            # the path holds the cells entered after the start, like the paths of the other solvers
+            self.solution_single.append(path)
+            self.solution_multiple.extend(path)
+            if self._record:
+                self.nodes_explored_single.append(self._current_explored.copy())
+                self.nodes_explored_multiple.extend(self._current_explored)
+                self.visited_by_depth_all.append(visited_by_depth)
+            self.num_explored_single.append(len(visited))
+            self.num_explored_multiple += len(visited)
+            self.path_length_single.append(len(path))
+            self.path_length_multiple += len(path)
 
-            if not found:
-                self.time_taken = time.time() - start_time
-                self.print_results(filename, "DLS")
-                return False
+            current_start = found_goal
+            remaining_goals.remove(found_goal)
 
-        self.time_taken = time.time() - start_time
-        self.print_results(filename, "DLS")
-        return True
+        return self._finish(filename, "DLS", True)
 
     def _dls_recursive(self, current, goals, limit, path, visited, visited_by_depth, depth):
-        self._current_explored.append(current)
         visited.add(current)
+        if depth > self.stats.peak_frontier:
+            self.stats.peak_frontier = depth
 
-        if depth not in visited_by_depth:
-            visited_by_depth[depth] = []
-        visited_by_depth[depth].append(current)
+        # visited_by_depth is None when the exploration is not recorded
+        if visited_by_depth is not None:
+            self._current_explored.append(current)
+            if depth not in visited_by_depth:
+                visited_by_depth[depth] = []
+            visited_by_depth[depth].append(current)
 
         if current in goals:
             return "found", current
@@ -478,33 +1246,25 @@ class Maze:
         return ("cutoff", None) if cutoff_occurred else ("failure", None)
 
     '''SOLVING ITERATIVE DEEPENING DEPTH FIRST SEARCH'''
-    def solve_ids(self, filename, limit):
-        start_time = time.time()
-        # Reset data
-        self.solution = []
-        self.solution_single = []
-        self.solution_multiple = []
-        self.nodes_explored_single = []
-        self.nodes_explored_multiple = []
-        self.num_explored_single = []
-        self.num_explored_multiple = 0
-        self.path_length_single = []
-        self.path_length_multiple = 0
-        self.visited_by_depth_all = []
+    def solve_ids(self, filename=None, limit=30):
+        self._begin_solve()
 
         current_start = self.start
-        remaining_goals = list(self.goals)
+        remaining_goals = self._goal_index()
 
         while remaining_goals:
+            if self._leg_unreachable(remaining_goals, current_start):
+                return self._fail_unreachable(filename, "IDS", current_start, count_failed_leg=False)
             found = False
             goal_explored = []
+            goal_count = 0
             visited_by_depth_combined = {}
 
             for depth in range(1, limit + 1):
                 self._current_explored = []
                 path = []
                 visited = set()
-                visited_by_depth = {}
+                visited_by_depth = {} if self._record else None
 
                 result, found_goal = self._dls_recursive(
                     current=current_start,
@@ -517,71 +1277,63 @@ class Maze:
                 )
 
                 goal_explored.extend(self._current_explored)
+                goal_count += len(visited)
 
                 # Combine visited_by_depth
-                for d, nodes in visited_by_depth.items():
-                    if d not in visited_by_depth_combined:
-                        visited_by_depth_combined[d] = []
-                    visited_by_depth_combined[d].extend(nodes)
+                if visited_by_depth is not None:
+                    for d, nodes in visited_by_depth.items():
+                        if d not in visited_by_depth_combined:
+                            visited_by_depth_combined[d] = []
+                        visited_by_depth_combined[d].extend(nodes)
 
                 if result == "found":
-                    complete_path = [current_start] + path
-                    self.solution_single.append(complete_path)
-                    self.solution_multiple.extend(complete_path)
-                    self.nodes_explored_single.append(goal_explored.copy())
-                    self.nodes_explored_multiple.extend(goal_explored)
-                    self.num_explored_single.append(len(goal_explored))
-                    self.num_explored_multiple += len(goal_explored)
-                    self.path_length_single.append(len(complete_path))
-                    self.path_length_multiple += len(complete_path)
-                    self.visited_by_depth_all.append(visited_by_depth_combined)
+                    # the path holds the cells entered after the start, like the paths of the other solvers
+                    self.solution_single.append(path)
+                    self.solution_multiple.extend(path)
+                    if self._record:
+                        self.nodes_explored_single.append(goal_explored.copy())
+                        self.nodes_explored_multiple.extend(goal_explored)
+                        self.visited_by_depth_all.append(visited_by_depth_combined)
+                    self.num_explored_single.append(goal_count)
+                    self.num_explored_multiple += goal_count
+                    self.path_length_single.append(len(path))
+                    self.path_length_multiple += len(path)
 
                     current_start = found_goal
                     remaining_goals.remove(found_goal)
                     found = True
                     break  # Stop further depth increases
 
+            self._count_recursive_leg(goal_count, goal_explored)
             if not found:
-                self.time_taken = time.time() - start_time
-                self.print_results(filename, "IDS")
-                return False
+                return self._finish(filename, "IDS", False)
 
-        self.time_taken = time.time() - start_time
-        self.print_results(filename, "IDS")
-        return True
+        return self._finish(filename, "IDS", True)
 
 
     ''' SOLVING IDAS'''
-    def solve_idas(self, filename, limit):
-        start_time = time.time()
-        # Reset data
-        self.solution = []
-        self.solution_single = []
-        self.solution_multiple = []
-        self.nodes_explored_single = []
-        self.nodes_explored_multiple = []
-        self.num_explored_single = []
-        self.num_explored_multiple = 0
-        self.path_length_single = []
-        self.path_length_multiple = 0
-        self.visited_by_depth_all = []
+    def solve_idas(self, filename=None, limit=30):
+        self._begin_solve()
         
         current_start = self.start
         remaining_goals = list(self.goals)
         
         while remaining_goals:
             current_goal = remaining_goals.pop(0)
-            threshold = manhattan_distance(current_start, current_goal)
+            if self._leg_unreachable([current_goal], current_start):
+                return self._fail_unreachable(filename, "IDAS", current_start, count_failed_leg=False)
+            threshold = self.heuristic(current_start, current_goal)
             found = False
             iterations = 0
             goal_explored = []
+            self._explored_count = 0
             visited_by_depth_combined = {}
             
             while iterations < limit:
                 self._current_explored = []
                 path = []
                 path.append(current_start)
-                visited_by_depth = {}
+                visited_by_depth = {} if self._record else None
                 
                 result = self._idas_search(
                     current=current_start, 
@@ -596,22 +1348,25 @@ class Maze:
                 goal_explored.extend(self._current_explored)
                 
                 # Combine visited_by_depth for this goal
-                for d, nodes in visited_by_depth.items():
-                    if d not in visited_by_depth_combined:
-                        visited_by_depth_combined[d] = []
-                    visited_by_depth_combined[d].extend(nodes)
+                if visited_by_depth is not None:
+                    for d, nodes in visited_by_depth.items():
+                        if d not in visited_by_depth_combined:
+                            visited_by_depth_combined[d] = []
+                        visited_by_depth_combined[d].extend(nodes)
                 
                 if result == "found":
-                    complete_path = [current_start] + path
+                    # the search path begins with the start, which is not entered
+                    complete_path = path[1:]
                     self.solution_single.append(complete_path)
                     self.solution_multiple.extend(complete_path)
-                    self.nodes_explored_single.append(goal_explored.copy())
-                    self.nodes_explored_multiple.extend(goal_explored)
-                    self.num_explored_single.append(len(goal_explored))
-                    self.num_explored_multiple += len(goal_explored)
+                    if self._record:
+                        self.nodes_explored_single.append(goal_explored.copy())
+                        self.nodes_explored_multiple.extend(goal_explored)
+                        self.visited_by_depth_all.append(visited_by_depth_combined)
+                    self.num_explored_single.append(self._explored_count)
+                    self.num_explored_multiple += self._explored_count
                     self.path_length_single.append(len(complete_path))
                     self.path_length_multiple += len(complete_path)
-                    self.visited_by_depth_all.append(visited_by_depth_combined)
                     current_start = current_goal
                     found = True
                     break
@@ -622,24 +1377,25 @@ class Maze:
                 
                 iterations += 1
             
+            self._count_recursive_leg(self._explored_count, goal_explored)
             if not found:
-                self.time_taken = time.time() - start_time
-                self.print_results(filename, "IDAS")
-                return False
+                return self._finish(filename, "IDAS", False)
         
-        self.time_taken = time.time() - start_time
-        self.print_results(filename, "IDAS")
-        return True
+        return self._finish(filename, "IDAS", True)
 
     def _idas_search(self, current, goal, g_cost, threshold, path, visited_by_depth, depth):
-        self._current_explored.append(current)
+        self._explored_count += 1
+        if depth > self.stats.peak_frontier:
+            self.stats.peak_frontier = depth
         
-        # Track visited nodes by depth
-        if depth not in visited_by_depth:
-            visited_by_depth[depth] = []
-        visited_by_depth[depth].append(current)
+        # Track visited nodes by depth (visited_by_depth is None when the exploration is not recorded)
+        if visited_by_depth is not None:
+            self._current_explored.append(current)
+            if depth not in visited_by_depth:
+                visited_by_depth[depth] = []
+            visited_by_depth[depth].append(current)
         
-        f_cost = g_cost + manhattan_distance(current, goal)
+        f_cost = g_cost + self.heuristic(current, goal)
         
         if f_cost > threshold:
             return f_cost
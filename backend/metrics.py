@@ -0,0 +1,143 @@
+'''
+Minimal Prometheus metrics for the server, rendered in the text exposition format at /metrics.
+There is no external dependency or service: every metric keeps its values in memory and
+update costs are a dictionary lookup and a few additions under a lock, so it stays off the solve hot path.
++ Counter: a value that only goes up (requests, rejections, ...)
++ Gauge: a value that goes up and down, or is read from a callback at scrape time (in-flight solves, cache sizes, ...)
++ Histogram: observations counted into cumulative buckets (latency, grid size, ...)
+'''
+from bisect import bisect_left
+import threading
+
+
+''' Define a function to format the labels of a sample as {name="value",...} '''
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in pairs) + '}'
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+        self.callback = callback # optional function returning {labels: value} (or a single value) at scrape time
+
+    def current_items(self):
+        if self.callback is not None:
+            values = self.callback()
+            return sorted(values.items()) if isinstance(values, dict) else [((), values)]
+        with self.lock:
+            return sorted(self.values.items())
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+    def samples(self):
+        return []
+
+    def render(self):
+        return '\n'.join(self.header() + self.samples())
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        return [f'{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}' for labels, value in self.current_items()]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value, *labels):
+        with self.lock:
+            self.values[labels] = value
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        # values maps labels -> [bucket counts..., sum, count]
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.values.get(labels)
+            if counts is None:
+                counts = self.values[labels] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def samples(self):
+        with self.lock:
+            items = sorted((labels, list(counts)) for labels, counts in self.values.items())
+        lines = []
+        for labels, counts in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = (('le', format_value(bound)),)
+                lines.append(f'{self.name}_bucket{format_labels(self.labelnames, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{format_labels(self.labelnames, labels)} {format_value(counts[-2])}')
+            lines.append(f'{self.name}_count{format_labels(self.labelnames, labels)} {counts[-1]}')
+        return lines
+
+
+''' Define a function to build exponential bucket bounds: start, start * factor, ... (count bounds) '''
+def exponential_buckets(start, factor, count):
+    return [start * factor ** i for i in range(count)]
+
+
+"""
+The Registry keeps the metrics in registration order and renders all of them for the /metrics endpoint.
+"""
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=(), callback=None):
+        return self.register(Counter(name, documentation, labelnames, callback))
+
+    def gauge(self, name, documentation, labelnames=(), callback=None):
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(self, name, documentation, buckets, labelnames=()):
+        return self.register(Histogram(name, documentation, buckets, labelnames))
+
+    def render(self):
+        return '\n'.join(metric.render() for metric in self.metrics) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
@@ -0,0 +1,220 @@
+'''
+Level-synchronous parallel BFS, with the grid split into tiles owned by worker processes.
++ The occupancy grid (one byte per cell) and the distance array (one int32 per cell, -1 when not reached)
+are placed once in multiprocessing.shared_memory, and every worker attaches to both.
++ The tiles are bands of rows. A worker only writes the distances of its own tile and keeps the
+frontier of its tile in its own memory.
++ For each level, every worker expands its frontier: a neighbor in its tile gets its distance and joins the
+next frontier, a neighbor in another tile is sent back to the coordinator (only the cells at the tile
+boundaries cross processes), which hands it to the owner of that tile with the next level.
++ The search stops at the first level that reaches a goal. The goal and its path are the ones of serial BFS:
+the cells on a shortest path to the goals at that distance are found backward on the shared distances, then
+the path walks forward from the start, always taking the first move (up, left, down, right) that stays on them.
+'''
+from multiprocessing import shared_memory
+from array import array
+
+from workers import CONTEXT
+
+MOVES = ((0, -1), (-1, 0), (0, 1), (1, 0))
+
+
+''' Define the function run in each worker process, it owns the rows [row_start, row_end) '''
+def _tile_worker(grid_name, distance_name, size, row_start, row_end, connection):
+    rows, cols = size
+    grid_shm = shared_memory.SharedMemory(name=grid_name)
+    distance_shm = shared_memory.SharedMemory(name=distance_name)
+    grid = grid_shm.buf[:rows * cols]
+    distance = distance_shm.buf[:rows * cols * 4].cast('i')
+    low, high = row_start * cols, row_end * cols
+    frontier = []
+    goals = set()
+    try:
+        while True:
+            command = connection.recv()
+            if command[0] == 'stop':
+                break
+            if command[0] == 'reset':
+                _, start, goals = command
+                distance[low:high] = array('i', [-1]) * (high - low)
+                frontier = []
+                if low <= start < high:
+                    distance[start] = 0
+                    frontier.append(start)
+                connection.send([start] if start in goals else [])
+                continue
+
+            # 'step': add the cells found by the other tiles at this level, then expand the level
+            _, level, incoming = command
+            found = []
+            for index in incoming:
+                if distance[index] == -1:
+                    distance[index] = level
+                    frontier.append(index)
+                    if index in goals:
+                        found.append(index)
+            next_frontier = []
+            outbox = []
+            for index in frontier:
+                y, x = divmod(index, cols)
+                for dx, dy in MOVES:
+                    nx, ny = x + dx, y + dy
+                    if not (0 <= nx < cols and 0 <= ny < rows):
+                        continue
+                    neighbor = ny * cols + nx
+                    if grid[neighbor]:
+                        continue
+                    if low <= neighbor < high:
+                        if distance[neighbor] == -1:
+                            distance[neighbor] = level + 1
+                            next_frontier.append(neighbor)
+                            if neighbor in goals:
+                                found.append(neighbor)
+                    else:
+                        outbox.append(neighbor)
+            explored = len(frontier)
+            frontier = next_frontier
+            connection.send((found, outbox, explored, len(frontier)))
+    finally:
+        connection.close()
+        # the memoryviews have to be released before the shared memory can be closed
+        distance.release()
+        grid.release()
+        grid_shm.close()
+        distance_shm.close()
+
+
+class ParallelBFS:
+    def __init__(self, grid, workers=2):
+        '''grid is an OccupancyGrid, the rows are split in `workers` bands of about the same size'''
+        self.size = grid.size
+        rows, cols = grid.size
+        self.workers = max(1, min(workers, rows))
+        self.grid_shm = shared_memory.SharedMemory(create=True, size=max(1, rows * cols))
+        self.grid_shm.buf[:rows * cols] = bytes(grid.buffer)
+        self.distance_shm = shared_memory.SharedMemory(create=True, size=max(4, rows * cols * 4))
+        self.grid = self.grid_shm.buf[:rows * cols]
+        self.distance = self.distance_shm.buf[:rows * cols * 4].cast('i')
+
+        band = -(-rows // self.workers)
+        self.bands = [(start, min(rows, start + band)) for start in range(0, rows, band)]
+        self.connections = []
+        self.processes = []
+        try:
+            for row_start, row_end in self.bands:
+                receiver, sender = CONTEXT.Pipe()
+                process = CONTEXT.Process(
+                    target=_tile_worker,
+                    args=(self.grid_shm.name, self.distance_shm.name, self.size, row_start, row_end, sender),
+                    daemon=True
+                )
+                self.connections.append(receiver)
+                process.start()
+                sender.close()
+                self.processes.append(process)
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _owner(self, index):
+        return index // self.size[1] // (self.bands[0][1] - self.bands[0][0])
+
+    def search(self, start, goals):
+        '''
+        BFS from start to the nearest goal. Returns a dict with the goal reached (None if none), its distance,
+        the path (the cells after start), the number of levels and of explored cells.
+        '''
+        rows, cols = self.size
+        result = {'goal': None, 'distance': None, 'path': [], 'levels': 0, 'explored': 0}
+        x, y = start
+        if not (0 <= x < cols and 0 <= y < rows) or self.grid[y * cols + x]:
+            return result
+        targets = {gy * cols + gx for gx, gy in goals if 0 <= gx < cols and 0 <= gy < rows}
+        start_index = y * cols + x
+        # every worker only gets the goals of its own tile
+        found = []
+        for band, connection in enumerate(self.connections):
+            connection.send(('reset', start_index, {goal for goal in targets if self._owner(goal) == band}))
+        for connection in self.connections:
+            found.extend(connection.recv())
+
+        level = 0
+        inboxes = [[] for _ in self.connections]
+        while not found:
+            for connection, inbox in zip(self.connections, inboxes):
+                connection.send(('step', level, inbox))
+            inboxes = [[] for _ in self.connections]
+            active = 0
+            for connection in self.connections:
+                tile_found, outbox, explored, next_size = connection.recv()
+                found.extend(tile_found)
+                result['explored'] += explored
+                active += next_size
+                for neighbor in outbox:
+                    inboxes[self._owner(neighbor)].append(neighbor)
+            level += 1
+            if not found and not active and not any(inboxes):
+                break
+        result['levels'] = level
+
+        if found:
+            # every cell closer than the nearest goal has its distance, the goals found can be one level apart
+            nearest = min(self.distance[index] for index in found)
+            result['path'] = self._first_path(start_index, targets, nearest)
+            result['goal'] = result['path'][-1] if result['path'] else start
+            result['distance'] = nearest
+        return result
+
+    def _free_neighbors(self, index):
+        rows, cols = self.size
+        y, x = divmod(index, cols)
+        neighbors = []
+        for dx, dy in MOVES:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < cols and 0 <= ny < rows and not self.grid[ny * cols + nx]:
+                neighbors.append(ny * cols + nx)
+        return neighbors
+
+    def _first_path(self, start, targets, depth):
+        # Serial BFS dequeues the cells of a level in the order of their paths from the start, compared move by move.
+        # The goals at depth are the ones with that distance, and the ones next to depth - 1 that their tile has not
+        # received yet; the cone keeps, in every level, the cells on a shortest path to one of them.
+        cone = {depth: {goal for goal in targets if self.distance[goal] == depth or (
+            depth > 0 and self.distance[goal] == -1 and not self.grid[goal]
+            and any(self.distance[neighbor] == depth - 1 for neighbor in self._free_neighbors(goal)))}}
+        for level in range(depth - 1, 0, -1):
+            cone[level] = {neighbor for cell in cone[level + 1] for neighbor in self._free_neighbors(cell)
+                           if self.distance[neighbor] == level}
+        cols = self.size[1]
+        path = []
+        current = start
+        for level in range(1, depth + 1):
+            current = next(neighbor for neighbor in self._free_neighbors(current) if neighbor in cone[level])
+            path.append((current % cols, current // cols))
+        return path
+
+    def close(self):
+        for connection, process in zip(self.connections, self.processes):
+            try:
+                connection.send(('stop',))
+            except OSError:
+                pass
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for connection in self.connections:
+            connection.close()
+        self.connections, self.processes = [], []
+        if self.grid_shm is not None:
+            self.distance.release()
+            self.grid.release()
+            for shm in (self.grid_shm, self.distance_shm):
+                shm.close()
+                shm.unlink()
+            self.grid_shm = self.distance_shm = None
@@ -0,0 +1,136 @@
+'''
+Persistent result cache shared by the server processes of one host.
++ The solve responses are kept in a SQLite database in WAL mode, so every uvicorn worker reads and writes
+the same file (the readers do not block the writer) and the warm results survive restarts and deploys.
++ An entry is keyed by a canonical hash of the grid (the maze id of sessions.py), the start, the goals,
+the algorithm and every option that changes the response (see result_key).
++ The payload is the JSON of the MazeResponse compressed with zlib. A hit returns the JSON as it was
+first sent, with the time_taken and stats of the run that produced it.
++ The total payload size is kept by triggers in the database itself, and the least recently used entries
+are evicted when it goes over max_bytes, whichever process inserted them. The access time of an entry is only
+written again when it is older than touch_seconds, so most hits are plain reads that do not take the write lock.
+'''
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+CREATE TABLE IF NOT EXISTS totals (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO totals VALUES ('bytes', 0);
+CREATE TRIGGER IF NOT EXISTS results_insert AFTER INSERT ON results BEGIN
+    UPDATE totals SET value = value + new.size WHERE name = 'bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS results_delete AFTER DELETE ON results BEGIN
+    UPDATE totals SET value = value - old.size WHERE name = 'bytes';
+END;
+'''
+
+
+''' Define a function to compute the cache key of a solve, from the maze id and the options that change the response '''
+def result_key(scope, maze_id, start, goals, algorithm, options):
+    canonical = json.dumps({
+        'scope': scope, # the endpoint, since the session solves label the components for every algorithm
+        'maze': maze_id,
+        'start': list(start),
+        'goals': [list(goal) for goal in goals],
+        'algorithm': algorithm,
+        'options': options
+    }, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, level=6, touch_seconds=60):
+        self.path = path # the database file, shared by all the processes that use the same path
+        self.max_bytes = max_bytes # bound of the compressed payloads
+        self.level = level # zlib compression level
+        self.touch_seconds = touch_seconds # how stale the access time of a hit can be before it is written again
+        self.local = threading.local() # one connection per thread, sqlite3 connections are not shared
+        self.hits = 0 # the counters are of this process only
+        self.misses = 0
+        self.evictions = 0
+        connection = self._connection()
+        connection.execute('PRAGMA journal_mode=WAL')
+        with connection:
+            connection.executescript(SCHEMA)
+
+    def _connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            # the other processes may hold the write lock, wait for it instead of failing
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self.local.connection = connection
+        return connection
+
+    def get(self, key):
+        '''Return the JSON payload of key, or None'''
+        connection = self._connection()
+        row = connection.execute('SELECT payload, accessed FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        now = time.time()
+        if now - row[1] >= self.touch_seconds:
+            # the eviction order only needs the access times to within touch_seconds
+            connection.execute('UPDATE results SET accessed = ? WHERE key = ?', (now, key))
+        return zlib.decompress(row[0])
+
+    def put(self, key, payload):
+        '''Store the JSON payload (bytes) of key, then evict the oldest entries over the budget'''
+        compressed = zlib.compress(payload, self.level)
+        if len(compressed) > self.max_bytes:
+            return False
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            # a replace would not run the delete trigger, so the old entry is removed first
+            connection.execute('DELETE FROM results WHERE key = ?', (key,))
+            connection.execute('INSERT INTO results VALUES (?, ?, ?, ?)', (key, compressed, len(compressed), time.time()))
+            self._evict(connection)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return True
+
+    def _evict(self, connection):
+        total = self.total_bytes(connection)
+        while total > self.max_bytes:
+            rows = connection.execute('SELECT key, size FROM results ORDER BY accessed LIMIT 64').fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                connection.execute('DELETE FROM results WHERE key = ?', (key,))
+                total -= size
+                self.evictions += 1
+
+    def total_bytes(self, connection=None):
+        connection = connection or self._connection()
+        return connection.execute("SELECT value FROM totals WHERE name = 'bytes'").fetchone()[0]
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def clear(self):
+        with self._connection() as connection:
+            connection.execute('DELETE FROM results')
+
+    def close(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self.local.connection = None
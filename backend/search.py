@@ -1,10 +1,163 @@
 import sys
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from multiprocessing import Pool
 from maze import *
+from external import PackedGrid
+
+'''
+Out-of-core mode: 'python search.py <file_name> external [--memory-mb M] [--workdir DIR]' runs BFS with its layers
+on disk (see external.py): the maze file is converted line by line into a bit-packed grid in DIR, so the walls are
+never read into memory, and the sort buffers stay within M megabytes.
+
+Auto mode: 'python search.py <file_name> auto' runs the engine chosen from the features of the maze (see autoselect.py)
+and prints it after the result.
+
+Parallel mode: 'python search.py <file_name> parallel [--workers N]' runs the tile-partitioned BFS of parallel.py
+with N worker processes (one per CPU core by default).
+
+Batch mode: 'python search.py --serve [--workers N] [--cache-size K]' keeps one interpreter (or N worker
+processes) running and reads one JSON job per line from stdin, so a batch of mazes pays the Python startup
+and the imports once instead of once per maze. A job gives either a maze file or an inline grid:
+    {"id": 1, "file": "test/maze_0.txt", "algorithm": "bfs"}
+    {"id": 2, "maze": [[0, 1], [0, 0]], "start": [0, 0], "goals": [[1, 1]], "algorithm": "as", "limit": 30}
+and one JSON result line is written per job, in the order of the jobs, with the timing and the counts.
+The parsed maze files are kept in a small LRU cache (per worker), keyed by path and modification time.
+'''
+
+# the parsed maze files of this process, see load_maze_file()
+maze_cache = OrderedDict()
+maze_cache_size = 64
+
+
+''' Define a function to read a maze file through the cache '''
+def load_maze_file(path):
+    key = (path, os.stat(path).st_mtime_ns)
+    if key in maze_cache:
+        maze_cache.move_to_end(key)
+        return maze_cache[key]
+    size, start, goals, walls = read_maze(path)
+    # the walls are only read by the solvers, a frozenset lets set_wall() copy them before any change
+    parsed = (size, start, goals, frozenset(walls), ComponentLabels(size, set(walls)))
+    maze_cache[key] = parsed
+    while len(maze_cache) > maze_cache_size:
+        maze_cache.popitem(last=False)
+    return parsed
+
+
+''' Define a function to build the Maze of one job '''
+def build_job_maze(job):
+    if 'file' in job:
+        size, start, goals, walls, components = load_maze_file(job['file'])
+        # a job may still override the start or the goals of the file
+        start = tuple(job['start']) if 'start' in job else start
+        goals = [tuple(goal) for goal in job['goals']] if 'goals' in job else list(goals)
+        maze = Maze(size, start, goals, walls)
+        maze.label_components(components)
+        return maze
+    size, walls = convert_maze_to_size_and_walls(job['maze'])
+    costs = None
+    if job.get('costs') is not None:
+        costs = {(x, y): cost for y, row in enumerate(job['costs']) for x, cost in enumerate(row) if cost != 1}
+    maze = Maze(size, tuple(job['start']), [tuple(goal) for goal in job['goals']], walls, costs=costs)
+    maze.label_components()
+    return maze
+
+
+''' Define a function to run one job line and return its result line '''
+def run_job(line):
+    started = time.perf_counter()
+    result = {}
+    try:
+        job = json.loads(line)
+        result['id'] = job.get('id')
+        algorithm = job['algorithm']
+        maze = build_job_maze(job)
+        # the result only has counts, so the explored nodes are not recorded unless the job asks for them
+        maze.trace = job.get('trace', 'counts')
+        options = {}
+        if 'weight' in job:
+            options['weight'] = job['weight']
+        if job.get('nearest_goal'):
+            options['nearest_goal'] = True
+        success = maze.solve(algorithm, limit=job.get('limit', 30), **options)
+        result.update({
+            'algorithm': algorithm,
+            'success': success,
+            'time_taken': maze.time_taken,
+            'num_explored_multiple': maze.num_explored_multiple,
+            'num_explored_single': maze.num_explored_single,
+            'path_length_multiple': maze.path_length_multiple,
+            'path_length_single': maze.path_length_single,
+            'path_cost_multiple': maze.path_cost_multiple
+        })
+        if maze.engine is not None:
+            result['engine'] = maze.engine
+        if job.get('solution'):
+            result['solution_multiple'] = maze.solution_multiple
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+    result['wall_time'] = time.perf_counter() - started
+    return json.dumps(result)
+
+
+def set_cache_size(size):
+    global maze_cache_size
+    maze_cache_size = size
+
+
+''' Define a function to answer the job lines of stdin until it is closed '''
+def serve(workers=1, cache_size=64):
+    set_cache_size(cache_size)
+    lines = (line for line in sys.stdin if line.strip())
+    if workers <= 1:
+        for line in lines:
+            print(run_job(line), flush=True)
+        return
+    with Pool(workers, initializer=set_cache_size, initargs=(cache_size,)) as pool:
+        # imap keeps the order of the jobs, the chunks amortize the messages between the processes
+        for output in pool.imap(run_job, lines, chunksize=8):
+            print(output, flush=True)
+
+
+''' Define a function to run the out-of-core BFS on a maze file, without reading its walls into memory '''
+def solve_external(text_file, memory_mb=64, workdir=None):
+    directory = tempfile.mkdtemp(prefix='packed-grid-', dir=workdir)
+    try:
+        grid, start, goals = PackedGrid.from_maze_file(text_file, os.path.join(directory, 'grid.bin'))
+        maze = Maze(grid.size, start, goals, grid)
+        print(maze.solve_external(text_file, memory_budget=memory_mb * 2 ** 20, workdir=directory))
+        grid.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
 
 def main():
+    if len(sys.argv) >= 2 and sys.argv[1] == '--serve':
+        options = dict(zip(sys.argv[2::2], sys.argv[3::2]))
+        serve(workers=int(options.get('--workers', 1)), cache_size=int(options.get('--cache-size', 64)))
+        return
+
+    if len(sys.argv) >= 3 and sys.argv[2] == 'external':
+        options = dict(zip(sys.argv[3::2], sys.argv[4::2]))
+        solve_external(sys.argv[1], int(options.get('--memory-mb', 64)), options.get('--workdir'))
+        return
+
+    if len(sys.argv) >= 3 and sys.argv[2] == 'parallel':
+        options = dict(zip(sys.argv[3::2], sys.argv[4::2]))
+        size, start, goals, walls = read_maze(sys.argv[1])
+        maze = Maze(size, start, goals, walls)
+        workers = int(options['--workers']) if '--workers' in options else None
+        print(maze.solve_parallel(sys.argv[1], workers=workers))
+        return
+
     # Check whether the command-line argument is acceptable or not
     if len(sys.argv) != 3:
-        print("The command should follow 'python search.py <file_name> method'!!")
+        print("The command should follow 'python search.py <file_name> method' or 'python search.py --serve [--workers N] [--cache-size K]'!!")
         return
 
     # Read the text file to form the maze
@@ -13,12 +166,15 @@ def main():
 
     # Initialize the maze with the size, start, goals and walls
     maze = Maze(size, start, goals, walls)
+    maze.label_components()
 
     # Solve the maze and return the result
     if sys.argv[2] == 'bfs' or sys.argv[2] == 'dfs':
         print(maze.solve_bfs_dfs(text_file, sys.argv[2]))
     elif sys.argv[2] == 'gbfs' or sys.argv[2] == 'as':
         print(maze.solve_gbfs_as(text_file, sys.argv[2]))
+    elif sys.argv[2] == 'ucs' or sys.argv[2] == 'was':
+        print(maze.solve_weighted(text_file, sys.argv[2]))
     elif sys.argv[2] == 'backtracking':
         print(maze.solve_backtracking(text_file))
     elif sys.argv[2] == 'depthlimited':
@@ -27,6 +183,9 @@ def main():
         print(maze.solve_ids(text_file, limit=30))
     elif sys.argv[2] == 'idas':
         print(maze.solve_idas(text_file, limit=30))
+    elif sys.argv[2] == 'auto':
+        print(maze.solve_auto(text_file))
+        print(f'engine: {maze.engine}')
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -9,11 +9,30 @@ We need to import some necessary modules, including:
 + uvicorn for running the server -> import uvicorn
 + other necessary modules for handling requests and responses.
 '''
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from maze import Maze
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from pydantic import BaseModel, ConfigDict
+from maze import Maze, TRACE_LEVELS
+from utils import convert_maze_to_size_and_walls
+from sessions import SessionStore, maze_id_for
+from resultcache import ResultCache, result_key
+from admission import AdmissionController, AdmissionRejected, estimate_cost, parse_limits
+from stats import PROFILE_MODES, run_profiled
+from frames import FRAME_MODES, build_frames
+from metrics import CONTENT_TYPE, Registry, exponential_buckets
+from grid import OccupancyGrid
+import compare
+from contextlib import AsyncExitStack
+from time import perf_counter
+from typing import Any
 import uvicorn
+import json
+import logging
+import os
+import sqlite3
 
 
 '''
@@ -21,6 +40,7 @@ import uvicorn
 Next, we need to create an instance of FastAPI and configure CORS middleware.
 '''
 app = FastAPI()
+logger = logging.getLogger('uvicorn.error') # the warnings of the server go to the uvicorn log
 app.add_middleware(
     CORSMiddleware,
     allow_origins=['https://maze-searching-visualizer.vercel.app', 'http://localhost:5173'], # this is the origin of the frontend app
@@ -35,12 +55,79 @@ Now, we have to use the BaseModel to create the data model for the request and r
 '''
 # In the request, we define the parameters that the users will send to the server.
 # This should follows the structure of the solving maze algorithms
-class MazeRequest(BaseModel):
+class SolveRequest(BaseModel):
+    start: tuple[int, int] # this is the starting point of the maze (x, y)
+    goals: list[tuple[int, int]] # this is the list of goals in the maze (x, y)
+    algorithm: str # this is the algorithm that the users want to use
+    depth_limit: int | None = None
+    phase_timing: bool = False # time the frontier, neighbor and heuristic calls separately (slower)
+    profile: str | None = None # run the solve under 'cprofile' or 'tracemalloc' and return the summary
+    # anytime A* (ARA*): return the best path found within the budget, see Maze.solve_anytime
+    time_budget_ms: float | None = None
+    expansion_budget: int | None = None
+    anytime_weight: float | None = None # the first inflation weight of the heuristic (default 3)
+    nearest_goal: bool = False # gbfs and as: head to any remaining goal (the nearest by path for as) instead of the closest by Manhattan distance
+    preprocess: bool = False # fill the dead ends and contract the corridors before searching (bfs, dfs, gbfs, as)
+    # downsample the exploration into about this many animation frames, see frames.py (the nodes_explored lists are then left empty)
+    frames: int | None = None
+    frame_mode: str = 'chunks' # 'chunks' (fixed-size) or 'layers' (whole BFS layers)
+    # 'full' returns the explored nodes, 'counts' only the explored counts of each goal, 'none' only the path and the total count
+    trace: str = 'full'
+
+class MazeRequest(SolveRequest):
+    maze: list[list[int]] # this is the 2D array of the maze
+    costs: list[list[int]] | None = None # this is the terrain cost (1 to 255) of entering each cell, same shape as the maze
+
+# For server-side sessions, the maze is registered once and later solve requests only reference it by id.
+class MazeRegisterRequest(BaseModel):
+    maze: list[list[int]] # this is the 2D array of the maze
+    costs: list[list[int]] | None = None # this is the terrain cost (1 to 255) of entering each cell, same shape as the maze
+
+class MazeRegisterResponse(BaseModel):
+    maze_id: str # this is the id to use in the /mazes/{maze_id}/solve endpoint
+    rows: int
+    cols: int
+    size_bytes: int # this is the memory accounted to the session on the server
+
+class SessionSolveRequest(SolveRequest):
+    pass
+
+# To stream a solve, the events of the search are sent every batch_size expanded nodes (see steps.py).
+# The events replace the profile, the phase timing and the frames of /solve, so those fields are refused (422).
+class StreamSolveRequest(BaseModel):
+    model_config = ConfigDict(extra='forbid')
     maze: list[list[int]] # this is the 2D array of the maze
+    costs: list[list[int]] | None = None # this is the terrain cost (1 to 255) of entering each cell, same shape as the maze
     start: tuple[int, int] # this is the starting point of the maze (x, y)
     goals: list[tuple[int, int]] # this is the list of goals in the maze (x, y)
     algorithm: str # this is the algorithm that the users want to use
     depth_limit: int | None = None
+    # anytime A* (ARA*) and the goal choice of gbfs and as, like in SolveRequest
+    time_budget_ms: float | None = None
+    expansion_budget: int | None = None
+    anytime_weight: float | None = None
+    nearest_goal: bool = False
+    preprocess: bool = False # fill the dead ends and contract the corridors before searching (bfs, dfs, gbfs, as)
+    trace: str = 'full' # how much of the exploration the solver records besides the events, see Maze.trace
+    batch_size: int = 256
+
+# To compare algorithms, one maze is sent with the list of algorithms to run on it in parallel.
+class CompareRequest(BaseModel):
+    maze: list[list[int]] # this is the 2D array of the maze
+    start: tuple[int, int]
+    goals: list[tuple[int, int]]
+    algorithms: list[str] # this is the list of algorithms to run
+    depth_limit: int | None = None
+    timeout_ms: float = 10000 # this is the time each algorithm gets before its worker is stopped
+    timeouts_ms: dict[str, float] | None = None # this overrides timeout_ms for some algorithms
+
+# The search statistics collected by the solvers, see stats.py
+class SearchStatsModel(BaseModel):
+    phase_ns: dict[str, int] # time spent in each phase in nanoseconds
+    pushes: int
+    pops: int
+    reexpansions: int
+    peak_frontier: int
 
 # Then, we will define the structure of the response that the server will send back to the users.
 # Because the backend will send back to the users so we want to make sure all the values in the response will be used in the frontend.
@@ -56,26 +143,282 @@ class MazeResponse(BaseModel):
     num_explored_single: list[int] # this is the list of number of nodes explored for each single path
     path_length_single: list[int] # this is the list of path lengths for each single goal
     path_length_multiple: int # this is the length of the path that was found for all the goals
+    path_cost_single: list[int] = [] # this is the list of terrain costs of the path to each single goal
+    path_cost_multiple: int = 0 # this is the terrain cost of the path for all the goals (the length on unit cost mazes)
+    stats: SearchStatsModel | None = None # this is the per-phase timing and the search counters
+    profile: dict[str, Any] | None = None # this is the profiler summary when the request asked for one
+    suboptimality_bound: float | None = None # for anytime A*, the path cost is at most this times the optimal cost
+    budget_exhausted: bool = False # for anytime A*, whether the search stopped because the budget ran out
+    trace_cells: list[int] | None = None # when frames were asked, the explored cells as y * cols + x in exploration order
+    trace_frames: list[tuple[int, int]] | None = None # this is the [start, end) range of trace_cells shown in each frame
+    trace_leg_frames: list[int] | None = None # this is the first frame of each goal's search
+    engine: str | None = None # for 'auto', the engine that was run (e.g. 'was' or 'bfs+preprocess')
+    engine_features: dict[str, float] | None = None # for 'auto', the maze features the engine was chosen from
+
+# The result of one algorithm in a comparison, the fields after wall_time are only set when status is 'ok'
+class AlgorithmComparison(BaseModel):
+    status: str # this is 'ok', 'timeout' or 'error'
+    wall_time: float # this is the time the worker ran for, in seconds
+    error: str | None = None
+    success: bool | None = None
+    time_taken: float | None = None
+    num_explored_multiple: int | None = None
+    num_explored_single: list[int] | None = None
+    path_length_multiple: int | None = None
+    path_length_single: list[int] | None = None
+    path_cost_multiple: int | None = None
+    solution_multiple: list[tuple[int, int]] | None = None
+    stats: SearchStatsModel | None = None
+
+class CompareResponse(BaseModel):
+    results: dict[str, AlgorithmComparison] # this maps each algorithm to its result
+    wall_time: float # this is the time the whole comparison took, in seconds
 
 '''
 --------------------------- STEP 4 ---------------------------
 Now, we will create some endpoints to handle the requests from the users.
 + / - to get the welcome message - Mainly for debugging purposes - GET
 + /solve - to solve the maze with the given parameters - POST
-+ def a function change the maze into size and walls to pass into the solving algorithm
++ /mazes - to register a maze once and get back its id - POST
++ /mazes/{maze_id}/solve - to solve a registered maze with only the start, goals and algorithm - POST
++ /compare - to run several algorithms on one maze in parallel and compare them - POST
++ /metrics - to scrape the Prometheus metrics of the server - GET
++ the responses of /solve and /mazes/{maze_id}/solve can be kept in a result cache shared by the server processes (see resultcache.py)
++ the maze is changed into size and walls with convert_maze_to_size_and_walls (utils.py) to pass into the solving algorithm
 '''
-def convert_maze_to_size_and_walls(maze: list[list[int]]):
-    rows = len(maze)
-    cols = len(maze[0]) if rows > 0 else 0
-    size = (rows, cols) # Get the size of the maze as (rows, cols)
-    walls = set()
-    
+# The terrain costs are sent as a 2D array like the maze, only the cells that do not cost 1 are kept
+def convert_costs(costs: list[list[int]] | None, size):
+    if costs is None:
+        return None
+    rows, cols = size
+    if len(costs) != rows or any(len(row) != cols for row in costs):
+        raise HTTPException(status_code=400, detail=f'Invalid costs format. Costs should be a 2D array of the same size as the maze ({rows}x{cols}).')
+    converted = {}
     for i in range(rows):
         for j in range(cols):
-            if maze[i][j] == 1:
-                walls.add((j, i))  # Store walls as (x, y) tuples
-    
-    return size, walls
+            if not 1 <= costs[i][j] <= 255:
+                raise HTTPException(status_code=400, detail=f'Invalid cost {costs[i][j]} at ({j}, {i}). Costs should be integers from 1 to 255.')
+            if costs[i][j] != 1:
+                converted[(j, i)] = costs[i][j]
+    return converted
+
+# The registered mazes are kept in a memory-bounded LRU store, configured with environment variables.
+session_store = SessionStore(
+    max_bytes=int(os.environ.get('MAZE_SESSION_MAX_BYTES', 256 * 1024 * 1024)),
+    max_sessions=int(os.environ.get('MAZE_SESSION_MAX_COUNT', 1024))
+)
+
+# The solve requests go through admission control (see admission.py), configured with environment variables:
+# the largest estimated cost accepted, and the concurrency:queue slots of each algorithm (and of the comparisons)
+admission = AdmissionController(
+    max_cost=int(os.environ.get('MAZE_ADMISSION_MAX_COST', 20_000_000)),
+    limits=parse_limits(os.environ.get('MAZE_ADMISSION_LIMITS', 'backtracking=1:4,depthlimited=2:8,ids=1:4,idas=1:4,compare=2:8,default=4:32'))
+)
+
+# The solve responses are kept in a SQLite file shared by all the server processes of the host when
+# MAZE_RESULT_CACHE_PATH is set, bounded by MAZE_RESULT_CACHE_MAX_BYTES of compressed responses
+result_cache = ResultCache(
+    os.environ['MAZE_RESULT_CACHE_PATH'],
+    max_bytes=int(os.environ.get('MAZE_RESULT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+) if os.environ.get('MAZE_RESULT_CACHE_PATH') else None
+
+# The metrics exposed at /metrics, see metrics.py
+metrics = Registry()
+REQUESTS = metrics.counter('maze_http_requests_total', 'HTTP requests by method, route and status code.', ('method', 'route', 'status'))
+RESPONSE_BYTES = metrics.histogram('maze_http_response_bytes', 'Size of the HTTP response bodies in bytes.', exponential_buckets(256, 4, 10), ('route',))
+SOLVES_IN_FLIGHT = metrics.gauge('maze_solves_in_flight', 'Solves currently running.')
+SOLVE_LATENCY = metrics.histogram('maze_solve_latency_seconds', 'Time to run one solve, by algorithm.', exponential_buckets(0.0005, 2, 16), ('algorithm',))
+GRID_CELLS = metrics.histogram('maze_grid_cells', 'Number of cells (rows * cols) of the solved grids.', exponential_buckets(16, 4, 10))
+NODES_EXPLORED = metrics.histogram('maze_nodes_explored', 'Nodes explored by one solve, by algorithm.', exponential_buckets(8, 4, 11), ('algorithm',))
+metrics.counter('maze_session_cache_hits_total', 'Solve requests that found their registered maze.', callback=lambda: session_store.hits)
+metrics.counter('maze_session_cache_misses_total', 'Solve requests whose maze id was unknown or evicted.', callback=lambda: session_store.misses)
+metrics.counter('maze_session_cache_evictions_total', 'Registered mazes evicted from the session store.', callback=lambda: session_store.evictions)
+metrics.gauge('maze_session_cache_hit_ratio', 'Session cache hits divided by lookups.', callback=lambda: session_store.hits / max(1, session_store.hits + session_store.misses))
+metrics.gauge('maze_sessions', 'Registered mazes currently kept on the server.', callback=lambda: len(session_store.sessions))
+metrics.gauge('maze_session_bytes', 'Memory accounted to the registered mazes.', callback=lambda: session_store.total_bytes())
+metrics.counter('maze_admission_rejections_total', 'Solve requests rejected by admission control, by algorithm and reason.', ('algorithm', 'reason'), callback=lambda: admission.rejections)
+metrics.gauge('maze_admission_queued', 'Solve requests waiting for a slot of their algorithm.', ('algorithm',), callback=admission.queued)
+if result_cache is not None:
+    metrics.counter('maze_result_cache_hits_total', 'Solve requests answered from the result cache (this process).', callback=lambda: result_cache.hits)
+    metrics.counter('maze_result_cache_misses_total', 'Cacheable solve requests not found in the result cache (this process).', callback=lambda: result_cache.misses)
+    metrics.counter('maze_result_cache_evictions_total', 'Results evicted from the result cache by this process.', callback=lambda: result_cache.evictions)
+    metrics.gauge('maze_result_cache_bytes', 'Compressed size of the results in the shared result cache.', callback=lambda: result_cache.total_bytes())
+RESULT_CACHE_ERRORS = metrics.counter('maze_result_cache_errors_total', 'Result cache reads and writes that failed, by operation.', ('operation',))
+metrics.gauge('maze_compare_queued_workers', 'Comparison workers waiting for a free process slot.', callback=lambda: compare.queued_workers)
+
+# Map frontend algorithm names to backend algorithm names
+algorithm_mapping = {
+    'bfs': 'bfs',
+    'dfs': 'dfs',
+    'gbfs': 'gbfs',  # Changed from 'greedy' to 'gbfs'
+    'as': 'as',      # Changed from 'astar' to 'as'
+    'backtracking': 'backtracking',
+    'depthlimited': 'depthlimited',
+    'ids': 'ids',    # Changed from 'iddfs' to 'ids'
+    'idas': 'idas',  # Changed from 'idastar' to 'idas'
+    'ucs': 'ucs',    # uniform cost search (Dijkstra) on the terrain costs
+    'was': 'was',    # A* on the terrain costs, weighted by anytime_weight
+    'auto': 'auto'   # the engine expected to be the fastest with a shortest path, chosen from the maze features (see autoselect.py)
+}
+
+def validate_maze(maze):
+    if not maze or not isinstance(maze, list) or not all(isinstance(row, list) for row in maze):
+        raise HTTPException(status_code=400, detail='Invalid maze format. Maze should be a 2D array of integers.')
+    if any(len(row) != len(maze[0]) for row in maze):
+        raise HTTPException(status_code=400, detail='Invalid maze format. Every row of the maze should have the same length.')
+
+def validate_solve_options(request):
+    # The options are checked before the result cache and the admission control,
+    # so an invalid request is never answered from the cache and never holds a slot
+    if request.trace not in TRACE_LEVELS:
+        raise HTTPException(status_code=400, detail=f"Unknown trace level: {request.trace}. Use one of {', '.join(TRACE_LEVELS)}.")
+    if request.frames is not None and request.trace != 'full':
+        raise HTTPException(status_code=400, detail="Frames are built from the explored nodes, they need trace 'full'.")
+    if request.profile and request.profile not in PROFILE_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown profile mode: {request.profile}. Use one of {', '.join(PROFILE_MODES)}.")
+    if request.frames is not None and (request.frames < 1 or request.frame_mode not in FRAME_MODES):
+        raise HTTPException(status_code=400, detail=f"Invalid frames: frames should be at least 1 and frame_mode one of {', '.join(FRAME_MODES)}.")
+
+def validate_start_and_goals(start, goals):
+    # Check whether the start point is valid or not.
+    if not isinstance(start, tuple) or len(start) != 2 or not all(isinstance(coordinate, int) for coordinate in start):
+        raise HTTPException(status_code=400, detail='Invalid start point format. Start point should be a tuple of two integers (x, y).')
+
+    # Check whether the end points are valid or not.
+    if not isinstance(goals, list) or not all(isinstance(goal, tuple) and len(goal) == 2 and all(isinstance(coordinate, int) for coordinate in goal) for goal in goals):
+        raise HTTPException(status_code=400, detail='Invalid goals format. Goals should be a list of tuples (x, y).')
+
+def run_algorithm(maze_instance, request):
+    # Get the correct algorithm name
+    algorithm = algorithm_mapping.get(request.algorithm)
+    if not algorithm:
+        raise HTTPException(status_code=400, detail=f"Unknown algorithm: {request.algorithm}")
+
+    # Now, we will call the solve method of the maze instance with the given algorithm and search strategy.
+    return maze_instance.solve(algorithm, limit=request.depth_limit or 100, **solve_options(algorithm, request))
+
+def solve_options(algorithm, request):
+    # The options of the solvers that take more than the depth limit
+    options = {}
+    if algorithm == "was":
+        options = dict(weight=request.anytime_weight)
+    elif algorithm in ["gbfs", "as"]:
+        options = dict(
+            time_budget=None if request.time_budget_ms is None else request.time_budget_ms / 1000,
+            expansion_budget=request.expansion_budget,
+            weight=request.anytime_weight,
+            nearest_goal=request.nearest_goal
+        )
+    return options
+
+def run_request(maze_instance, request):
+    # Run the solve, optionally under a profiler, and return (result, profile summary)
+    maze_instance.phase_timing = request.phase_timing
+    maze_instance.trace = request.trace
+    label = request.algorithm if request.algorithm in algorithm_mapping else 'unknown'
+    SOLVES_IN_FLIGHT.inc()
+    start = perf_counter()
+    try:
+        if not request.profile:
+            return run_algorithm(maze_instance, request), None
+        return run_profiled(lambda: run_algorithm(maze_instance, request), request.profile)
+    finally:
+        SOLVES_IN_FLIGHT.dec()
+        SOLVE_LATENCY.observe(perf_counter() - start, label)
+        GRID_CELLS.observe(maze_instance.size[0] * maze_instance.size[1])
+        NODES_EXPLORED.observe(maze_instance.num_explored_multiple, label)
+
+async def run_admitted(request, size, work):
+    # Wait for a slot of the algorithm (or reject the request) before any search work starts,
+    # then run work() in a worker thread so a long solve does not block the other requests
+    if request.algorithm not in algorithm_mapping:
+        raise HTTPException(status_code=400, detail=f"Unknown algorithm: {request.algorithm}")
+    cost = estimate_cost(size[0] * size[1], len(request.goals), request.algorithm, request.depth_limit)
+    try:
+        async with admission.admit(request.algorithm, cost):
+            return await run_in_threadpool(work)
+    except AdmissionRejected as e:
+        raise rejection_error(e)
+
+def rejection_error(e):
+    headers = {'Retry-After': str(e.retry_after)} if e.retry_after is not None else None
+    return HTTPException(status_code=e.status_code, detail=e.detail, headers=headers)
+
+def cacheable(request):
+    # The profiled, phase-timed and time-budgeted solves are not reproducible, so they are never cached
+    # (the ragged mazes, whose rows could hash like the rows of another maze, are rejected by validate_maze)
+    return result_cache is not None and not (request.profile or request.phase_timing or request.time_budget_ms is not None)
+
+def cache_key_for(scope, maze_id, request):
+    # every field of SolveRequest changes the response, except the ones already in the key
+    options = request.model_dump(include=set(SolveRequest.model_fields) - {'start', 'goals', 'algorithm'})
+    return result_key(scope, maze_id, request.start, request.goals, request.algorithm, options)
+
+async def cached_response(cache_key):
+    # The cached JSON is sent as it is, without validating it into a MazeResponse again
+    if cache_key is None:
+        return None
+    try:
+        payload = await run_in_threadpool(result_cache.get, cache_key)
+    except sqlite3.Error as e:
+        # the cache only saves work, so a locked or broken database is a miss, not a failed request
+        RESULT_CACHE_ERRORS.inc('get')
+        logger.warning('Result cache read failed: %s', e)
+        return None
+    return None if payload is None else Response(content=payload, media_type='application/json')
+
+def store_response(cache_key, response):
+    if cache_key is not None:
+        try:
+            result_cache.put(cache_key, response.model_dump_json().encode())
+        except sqlite3.Error as e:
+            # the solve is done, so it is answered even when it cannot be kept (database locked, disk full, ...)
+            RESULT_CACHE_ERRORS.inc('put')
+            logger.warning('Result cache write failed: %s', e)
+    return response
+
+def build_response(maze_instance, result, algorithm, profile=None, frames=None, frame_mode='chunks'):
+    with maze_instance.stats.phase('serialize'):
+        trace = {}
+        if frames is not None:
+            # the frames replace the per-node lists, which grow with the search instead of the grid
+            trace_cells, trace_frames, trace_leg_frames = build_frames(maze_instance, frames, frame_mode)
+            trace = dict(trace_cells=trace_cells, trace_frames=trace_frames, trace_leg_frames=trace_leg_frames)
+        response = MazeResponse(
+            success=result,
+            algorithm=algorithm,
+            solution_single=maze_instance.solution_single,
+            solution_multiple=maze_instance.solution_multiple,
+            time_taken=maze_instance.time_taken,
+            nodes_explored_single=maze_instance.nodes_explored_single if frames is None else [],
+            nodes_explored_multiple=maze_instance.nodes_explored_multiple if frames is None else [],
+            num_explored_multiple=maze_instance.num_explored_multiple,
+            num_explored_single=maze_instance.num_explored_single,
+            path_length_single=maze_instance.path_length_single,
+            path_length_multiple=maze_instance.path_length_multiple,
+            path_cost_single=maze_instance.path_cost_single,
+            path_cost_multiple=maze_instance.path_cost_multiple,
+            profile=profile,
+            suboptimality_bound=maze_instance.suboptimality_bound,
+            budget_exhausted=maze_instance.budget_exhausted,
+            engine=maze_instance.engine,
+            engine_features=maze_instance.engine_features,
+            **trace
+        )
+    response.stats = SearchStatsModel(**maze_instance.stats.as_dict())
+    return response
+
+# Count every request and its response size by route template (so maze ids do not become labels)
+@app.middleware('http')
+async def record_request_metrics(request: Request, call_next):
+    response = await call_next(request)
+    route = request.scope.get('route')
+    path = route.path if route is not None else 'unmatched'
+    REQUESTS.inc(request.method, path, str(response.status_code))
+    size = response.headers.get('content-length')
+    if size is not None:
+        RESPONSE_BYTES.observe(int(size), path)
+    return response
 
 @app.get('/')
 async def welcome():
@@ -85,21 +428,21 @@ async def welcome():
 async def solve_maze(request: MazeRequest):
     # Here, we will handle the request and solve the maze using the given parameters.
     try:
-        # First, we need to check whether the maze is valid or not.
-        if not request.maze or not isinstance(request.maze, list) or not all(isinstance(row, list) for row in request.maze):
-            raise HTTPException(status_code=400, detail='Invalid maze format. Maze should be a 2D array of integers.')
-        
-        # Second, we need to check whether the start point is valid or not.
-        if not isinstance(request.start, tuple) or len(request.start) != 2 or not all(isinstance(coordinate, int) for coordinate in request.start):
-            raise HTTPException(status_code=400, detail='Invalid start point format. Start point should be a tuple of two integers (x, y).')
-
-        # Third, we need to check whether the end points are valid or not.
-        if not isinstance(request.goals, list) or not all(isinstance(goal, tuple) and len(goal) == 2 and all(isinstance(coordinate, int) for coordinate in goal) for goal in request.goals):
-            raise HTTPException(status_code=400, detail='Invalid goals format. Goals should be a list of tuples (x, y).')
+        # First, we need to check whether the maze, the start point and the end points are valid or not.
+        validate_maze(request.maze)
+        validate_start_and_goals(request.start, request.goals)
+        validate_solve_options(request)
         
         # If everything is valid, we will call the solving algorithm with the given parameters.
         # First, we need to convert the maze to size and walls to pass into the solving algorithm.
         size, walls = convert_maze_to_size_and_walls(request.maze)
+        costs = convert_costs(request.costs, size)
+
+        # A solve that was already answered (by any server process) is sent back from the result cache.
+        cache_key = cache_key_for('solve', maze_id_for(request.maze, request.costs), request) if cacheable(request) else None
+        cached = await cached_response(cache_key)
+        if cached is not None:
+            return cached
 
         # Then, we need to set the start point with the correct format.
         start = tuple(request.start)
@@ -108,65 +451,179 @@ async def solve_maze(request: MazeRequest):
         goals = [tuple(goal) for goal in request.goals]
 
         # Now, we can call the solving algorithm with the given parameters.
-        # Now, we will create a maze instance with teh parameters.
-        maze_instance = Maze(size, start, goals, walls)
-
-        # Map frontend algorithm names to backend algorithm names
-        algorithm_mapping = {
-            'bfs': 'bfs',
-            'dfs': 'dfs',
-            'gbfs': 'gbfs',  # Changed from 'greedy' to 'gbfs'
-            'as': 'as',      # Changed from 'astar' to 'as'
-            'backtracking': 'backtracking',
-            'depthlimited': 'depthlimited',
-            'ids': 'ids',    # Changed from 'iddfs' to 'ids'
-            'idas': 'idas'   # Changed from 'idastar' to 'idas'
-        }
-
-        # Get the correct algorithm name
-        algorithm = algorithm_mapping.get(request.algorithm)
-        if not algorithm:
-            raise HTTPException(status_code=400, detail=f"Unknown algorithm: {request.algorithm}")
-
-        # Now, we will call the solve method of the maze instance with the given algorithm and search strategy.
-        if algorithm in ["bfs", "dfs"]:
-            result = maze_instance.solve_bfs_dfs(algorithm=algorithm)
-        elif algorithm in ["gbfs", "as"]:
-            result = maze_instance.solve_gbfs_as(algorithm=algorithm)
-        elif algorithm == "backtracking":
-            result = maze_instance.solve_backtracking()
-        elif algorithm == "depthlimited":
-            result = maze_instance.solve_depthlimited(limit=request.depth_limit or 100)
-        elif algorithm == "ids":
-            result = maze_instance.solve_ids(limit=request.depth_limit or 100)
-        elif algorithm == "idas":
-            result = maze_instance.solve_idas()
-        else:
-            raise HTTPException(status_code=400, detail=f"Unknown algorithm: {algorithm}")
-
-        return MazeResponse(
-            success=result,
-            algorithm=request.algorithm,
-            solution_single=maze_instance.solution_single,
-            solution_multiple=maze_instance.solution_multiple,
-            time_taken=maze_instance.time_taken,
-            nodes_explored_single=maze_instance.nodes_explored_single,
-            nodes_explored_multiple=maze_instance.nodes_explored_multiple,
-            num_explored_multiple=maze_instance.num_explored_multiple,
-            num_explored_single=maze_instance.num_explored_single,
-            path_length_single=maze_instance.path_length_single,
-            path_length_multiple=maze_instance.path_length_multiple
-        )
+        def work():
+            # Now, we will create a maze instance with teh parameters.
+            maze_instance = Maze(size, start, goals, walls, costs=costs)
+            # labeling costs about one BFS, which pays off for the solvers that repeat their search on unreachable goals
+            if request.algorithm in compare.LABELED_ALGORITHMS:
+                maze_instance.label_components()
+            if request.preprocess:
+                maze_instance.preprocess()
+
+            result, profile = run_request(maze_instance, request)
+            return store_response(cache_key, build_response(maze_instance, result, request.algorithm, profile, request.frames, request.frame_mode))
+
+        return await run_admitted(request, size, work)
     
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+# Solve a maze and stream the search while it runs, one JSON event per line (expanded cells, frontier sizes, legs, result).
+# The search only advances as the client reads, and it is stopped (and its memory freed) when the client disconnects.
+@app.post('/solve/stream')
+async def solve_maze_stream(request: StreamSolveRequest):
+    validate_maze(request.maze)
+    validate_start_and_goals(request.start, request.goals)
+    algorithm = algorithm_mapping.get(request.algorithm)
+    if not algorithm:
+        raise HTTPException(status_code=400, detail=f"Unknown algorithm: {request.algorithm}")
+    if request.trace not in TRACE_LEVELS:
+        raise HTTPException(status_code=400, detail=f"Unknown trace level: {request.trace}. Use one of {', '.join(TRACE_LEVELS)}.")
+    if request.batch_size < 1:
+        raise HTTPException(status_code=400, detail='Invalid batch_size: it should be at least 1.')
+    size, walls = convert_maze_to_size_and_walls(request.maze)
+    costs = convert_costs(request.costs, size)
+
+    # The slot of the algorithm is taken before any search work starts and held until the stream ends,
+    # so the rejections are still answered before the stream starts
+    slot = AsyncExitStack()
+    try:
+        await slot.enter_async_context(admission.admit(
+            request.algorithm, estimate_cost(size[0] * size[1], len(request.goals), request.algorithm, request.depth_limit)))
+    except AdmissionRejected as e:
+        raise rejection_error(e)
+
+    def prepare():
+        # the labels, the reduced graph and the engine chosen by 'auto' cost about one pass over the grid
+        maze_instance = Maze(size, tuple(request.start), [tuple(goal) for goal in request.goals], walls, costs=costs)
+        if request.algorithm in compare.LABELED_ALGORITHMS:
+            maze_instance.label_components()
+        if request.preprocess:
+            maze_instance.preprocess()
+        maze_instance.trace = request.trace
+        return maze_instance, maze_instance.iter_solve(algorithm, limit=request.depth_limit or 100, batch_size=request.batch_size,
+                                                       **solve_options(algorithm, request))
+
+    try:
+        maze_instance, events = await run_in_threadpool(prepare)
+    except BaseException:
+        await slot.aclose()
+        raise
+
+    async def stream():
+        # the streamed solves are measured like the other solves, from the first event to the end of the stream
+        SOLVES_IN_FLIGHT.inc()
+        start = perf_counter()
+        try:
+            # every step runs in a worker thread, so a long search does not block the other requests
+            async for event in iterate_in_threadpool(events):
+                yield json.dumps(event.as_dict()) + '\n'
+        finally:
+            events.close()
+            await slot.aclose()
+            SOLVES_IN_FLIGHT.dec()
+            SOLVE_LATENCY.observe(perf_counter() - start, request.algorithm)
+            GRID_CELLS.observe(size[0] * size[1])
+            NODES_EXPLORED.observe(maze_instance.num_explored_multiple, request.algorithm)
+
+    # the background task releases the slot when the body was never iterated (closing the stack twice does nothing)
+    return StreamingResponse(stream(), media_type='application/x-ndjson', background=BackgroundTask(slot.aclose))
+
+# Register a maze once; the converted grid and neighbor table are kept on the server under the returned id.
+@app.post('/mazes', response_model=MazeRegisterResponse)
+async def register_maze(request: MazeRegisterRequest):
+    validate_maze(request.maze)
+    size, walls = convert_maze_to_size_and_walls(request.maze)
+    costs = convert_costs(request.costs, size)
+    maze_id = maze_id_for(request.maze, request.costs)
+    try:
+        session = session_store.register(maze_id, size, walls, costs)
+    except MemoryError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return MazeRegisterResponse(maze_id=maze_id, rows=size[0], cols=size[1], size_bytes=session.nbytes)
+
+# Solve a registered maze; only the start, goals and algorithm are sent.
+@app.post('/mazes/{maze_id}/solve', response_model=MazeResponse)
+async def solve_registered_maze(maze_id: str, request: SessionSolveRequest):
+    try:
+        session = session_store.get(maze_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f'Unknown or evicted maze id: {maze_id}. Please register the maze again.')
+    try:
+        validate_start_and_goals(request.start, request.goals)
+        validate_solve_options(request)
+        cache_key = cache_key_for('session', maze_id, request) if cacheable(request) else None
+        cached = await cached_response(cache_key)
+        if cached is not None:
+            return cached
+
+        def work():
+            maze_instance = session.new_maze(tuple(request.start), [tuple(goal) for goal in request.goals],
+                                             labeled=request.algorithm in compare.LABELED_ALGORITHMS)
+            if request.preprocess:
+                # the session provides its cached reduced graph
+                maze_instance.preprocess()
+            result, profile = run_request(maze_instance, request)
+            return store_response(cache_key, build_response(maze_instance, result, request.algorithm, profile, request.frames, request.frame_mode))
+
+        return await run_admitted(request, session.size, work)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+# Run several algorithms on one maze in parallel worker processes sharing the grid
+@app.post('/compare', response_model=CompareResponse)
+async def compare_algorithms(request: CompareRequest):
+    validate_maze(request.maze)
+    validate_start_and_goals(request.start, request.goals)
+    unknown = [name for name in request.algorithms if name not in algorithm_mapping]
+    if unknown or not request.algorithms:
+        raise HTTPException(status_code=400, detail=f"Unknown algorithms: {unknown}" if unknown else 'No algorithm to compare.')
+
+    grid = OccupancyGrid.from_rows(request.maze)
+    timeouts = {name: value / 1000 for name, value in (request.timeouts_ms or {}).items()}
+    # a comparison starts one worker process per algorithm, so it takes a slot of its own gate for all of them
+    cells = grid.size[0] * grid.size[1]
+    cost = sum(estimate_cost(cells, len(request.goals), name, request.depth_limit) for name in dict.fromkeys(request.algorithms))
+    start = perf_counter()
+    try:
+        async with admission.admit('compare', cost):
+            results = await run_in_threadpool(
+                compare.compare_algorithms,
+                grid,
+                tuple(request.start),
+                [tuple(goal) for goal in request.goals],
+                [algorithm_mapping[name] for name in request.algorithms],
+                limit=request.depth_limit or 100,
+                timeouts=timeouts,
+                default_timeout=request.timeout_ms / 1000
+            )
+    except AdmissionRejected as e:
+        raise rejection_error(e)
+    for name, result in results.items():
+        SOLVE_LATENCY.observe(result['wall_time'], name)
+        if result['status'] == 'ok':
+            NODES_EXPLORED.observe(result['num_explored_multiple'], name)
+    return CompareResponse(results=results, wall_time=perf_counter() - start)
+
+@app.delete('/mazes/{maze_id}')
+async def delete_maze(maze_id: str):
+    if not session_store.delete(maze_id):
+        raise HTTPException(status_code=404, detail=f'Unknown maze id: {maze_id}')
+    return {'deleted': maze_id}
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+# Prometheus metrics endpoint
+@app.get("/metrics")
+async def metrics_endpoint():
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=5000)
\ No newline at end of file
@@ -0,0 +1,179 @@
+'''
+Server-side maze sessions.
+A client registers a maze grid once and receives a maze id, then sends solve requests that only carry
+the start, goals and algorithm. Each session keeps the converted grid (size and walls), the neighbor
+table and any other derived data (distance fields, heuristics, ...) so repeated solves skip all the
+preprocessing. Sessions live in a memory-bounded LRU store.
+'''
+from collections import OrderedDict
+import hashlib
+import sys
+import threading
+import types
+
+from maze import Maze
+from graph import ReducedGraph
+from components import ComponentLabels
+
+
+# objects shared by the whole process (classes, functions, modules), never counted in the size of a session
+SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+''' Define a function to estimate how many bytes a (nested) Python object takes in memory, including the attributes of objects '''
+def estimate_size(obj):
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, SHARED_TYPES):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, '__dict__'):
+            # e.g. a ReducedGraph or ComponentLabels, whose data is in its attributes
+            stack.append(vars(current))
+    return total
+
+
+''' Define a function to compute a stable id for a maze grid, so registering the same grid twice reuses the session '''
+def maze_id_for(maze, costs=None):
+    digest = hashlib.sha1()
+    digest.update(f'{len(maze)}x{len(maze[0]) if maze else 0}:'.encode())
+    for row in maze:
+        digest.update(bytes(1 if cell == 1 else 0 for cell in row))
+    if costs is not None:
+        # the same walls with other terrain costs are another maze
+        digest.update(b'costs:')
+        for row in costs:
+            digest.update(bytes(row))
+    return digest.hexdigest()[:16]
+
+
+"""
+A MazeSession holds everything that only depends on the grid:
++ size, walls and costs: the converted grid passed into Maze
++ neighbors: the precomputed possible moves of every cell
++ derived: any other cached data keyed by name (distance fields, heuristics, component labels, ...)
++ reduced: the reduced graphs of the last max_reduced start and goal sets, in least-recently-used order
+(a reduced graph keeps the start and the goals as nodes, so every new set of them needs its own graph)
+"""
+class MazeSession:
+    def __init__(self, maze_id, size, walls, costs=None, max_reduced=4):
+        self.maze_id = maze_id
+        self.size = size
+        self.walls = frozenset(walls)
+        self.costs = costs
+        self.neighbors = Maze(size, None, [], self.walls).build_neighbors()
+        self.derived = {}
+        self.reduced = OrderedDict() # (start, goals) -> (ReducedGraph, its accounted bytes)
+        self.max_reduced = max_reduced
+        self.lock = threading.Lock()
+        self.nbytes = estimate_size(self.walls) + estimate_size(self.neighbors) + estimate_size(self.costs)
+        # called with the session after its derived data grew, so the store can evict over its budget
+        self.on_grow = None
+
+    def new_maze(self, start, goals, labeled=False):
+        maze = Maze(self.size, start, goals, self.walls, neighbors=self.neighbors, costs=self.costs)
+        if labeled:
+            # only the depth first solvers take the labels, like the /solve endpoint
+            maze.label_components(self.get_derived('components', lambda: ComponentLabels(self.size, self.walls)))
+        # preprocess() (explicit or chosen by 'auto') reuses the reduced graphs cached by the session
+        maze.graph_provider = self.reduced_graph
+        return maze
+
+    def get_derived(self, key, build):
+        '''Return the cached derived data for key, building (and accounting for) it on first use'''
+        with self.lock:
+            grew = key not in self.derived
+            if grew:
+                self.derived[key] = build()
+                self.nbytes += estimate_size(self.derived[key])
+            value = self.derived[key]
+        if grew and self.on_grow is not None:
+            self.on_grow(self)
+        return value
+
+    def reduced_graph(self, maze):
+        '''The reduced graph only depends on the grid and on the cells it keeps (the start and the goals)'''
+        key = (maze.start, tuple(maze.goals))
+        with self.lock:
+            grew = key not in self.reduced
+            if grew:
+                graph = ReducedGraph(maze, [maze.start] + list(maze.goals))
+                self.reduced[key] = (graph, estimate_size(graph))
+                self.nbytes += self.reduced[key][1]
+                while len(self.reduced) > self.max_reduced:
+                    _, (_, nbytes) = self.reduced.popitem(last=False)
+                    self.nbytes -= nbytes
+            self.reduced.move_to_end(key)
+            graph = self.reduced[key][0]
+        if grew and self.on_grow is not None:
+            self.on_grow(self)
+        return graph
+
+
+"""
+The SessionStore keeps the sessions in least-recently-used order and evicts the oldest ones
+whenever the total accounted size goes over max_bytes or the number of sessions goes over max_sessions.
+"""
+class SessionStore:
+    def __init__(self, max_bytes=256 * 1024 * 1024, max_sessions=1024):
+        self.max_bytes = max_bytes
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def total_bytes(self):
+        return sum(session.nbytes for session in self.sessions.values())
+
+    def register(self, maze_id, size, walls, costs=None):
+        with self.lock:
+            if maze_id in self.sessions:
+                self.sessions.move_to_end(maze_id)
+                return self.sessions[maze_id]
+        session = MazeSession(maze_id, size, walls, costs)
+        if session.nbytes > self.max_bytes:
+            raise MemoryError(f'Maze needs {session.nbytes} bytes which is more than the session budget of {self.max_bytes} bytes')
+        session.on_grow = self._session_grew
+        with self.lock:
+            self.sessions[maze_id] = session
+            self.sessions.move_to_end(maze_id)
+            self._evict()
+        return session
+
+    def _session_grew(self, session):
+        with self.lock:
+            if self.sessions.get(session.maze_id) is session:
+                self._evict()
+
+    def get(self, maze_id):
+        with self.lock:
+            session = self.sessions.get(maze_id)
+            if session is None:
+                self.misses += 1
+                raise KeyError(maze_id)
+            self.hits += 1
+            self.sessions.move_to_end(maze_id)
+            return session
+
+    def delete(self, maze_id):
+        with self.lock:
+            return self.sessions.pop(maze_id, None) is not None
+
+    def _evict(self):
+        # derived data grows after registration, so the budget is re-checked on every insert and every growth
+        total = self.total_bytes()
+        while self.sessions and (total > self.max_bytes or len(self.sessions) > self.max_sessions):
+            _, session = self.sessions.popitem(last=False)
+            total -= session.nbytes
+            self.evictions += 1
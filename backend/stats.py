@@ -0,0 +1,134 @@
+'''
+Search statistics for the Maze solvers.
+Times are measured with perf_counter_ns and split into phases:
++ setup: resetting the results and preparing the first leg
++ frontier: adding, removing and looking up nodes in the frontier
++ neighbors: generating the possible moves of a cell
++ heuristic: evaluating the heuristic function
++ reconstruct: rebuilding the path once a goal is reached
++ serialize: printing the results (CLI) or building the response (API)
+The frontier, neighbors and heuristic phases need a timer around every call, so they are only
+collected when phase timing is switched on; the counters and the other phases are always collected.
+'''
+from contextlib import contextmanager
+from time import perf_counter_ns
+import cProfile
+import pstats
+import threading
+import tracemalloc
+
+PHASES = ('setup', 'frontier', 'neighbors', 'heuristic', 'reconstruct', 'serialize')
+PROFILE_MODES = ('cprofile', 'tracemalloc')
+
+# held while a tracemalloc profile runs, since starting and stopping the tracing is global to the process
+TRACEMALLOC_LOCK = threading.Lock()
+
+
+class SearchStats:
+    def __init__(self):
+        self.phase_ns = dict.fromkeys(PHASES, 0)
+        self.pushes = 0 # nodes added to the frontier (or recursive calls for the depth first solvers)
+        self.pops = 0 # nodes removed from the frontier
+        self.reexpansions = 0 # cells expanded again within the same leg (IDS, IDA*), needs the full trace
+        self.peak_frontier = 0 # largest frontier size (or recursion depth) seen
+        self.start_ns = perf_counter_ns()
+
+    def elapsed(self):
+        '''Seconds since the stats were created'''
+        return (perf_counter_ns() - self.start_ns) / 1e9
+
+    def add_phase(self, phase, start_ns):
+        self.phase_ns[phase] += perf_counter_ns() - start_ns
+
+    @contextmanager
+    def phase(self, name):
+        start_ns = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.phase_ns[name] += perf_counter_ns() - start_ns
+
+    def collect_frontier(self, frontier):
+        '''Add the counters of a finished frontier to the totals'''
+        self.pushes += frontier.pushes
+        self.pops += frontier.pops
+        self.peak_frontier = max(self.peak_frontier, frontier.peak)
+
+    def as_dict(self):
+        return {
+            'phase_ns': dict(self.phase_ns),
+            'pushes': self.pushes,
+            'pops': self.pops,
+            'reexpansions': self.reexpansions,
+            'peak_frontier': self.peak_frontier
+        }
+
+
+''' Define a function to wrap fn so every call is added to the given phase '''
+def timed(fn, stats, phase):
+    phase_ns = stats.phase_ns
+
+    def wrapper(*args, **kwargs):
+        start_ns = perf_counter_ns()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            phase_ns[phase] += perf_counter_ns() - start_ns
+    return wrapper
+
+
+"""
+The TimedFrontier wraps any Frontier and adds the time spent in its operations to the frontier phase.
+The counters (pushes, pops, peak) are read from the wrapped frontier.
+"""
+class TimedFrontier:
+    def __init__(self, frontier, stats):
+        self.inner = frontier
+        self.add = timed(frontier.add, stats, 'frontier')
+        self.remove = timed(frontier.remove, stats, 'frontier')
+        self.isEmpty = timed(frontier.isEmpty, stats, 'frontier')
+        self.contain_state = timed(frontier.contain_state, stats, 'frontier')
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+
+''' Define a function to run fn() under cProfile or tracemalloc and return (result, summary) '''
+def run_profiled(fn, mode, top=15):
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        result = profiler.runcall(fn)
+        profile_stats = pstats.Stats(profiler)
+        entries = []
+        for (filename, line, function), (_, calls, tottime, cumtime, _) in profile_stats.stats.items():
+            entries.append({
+                'function': f'{filename}:{line}({function})',
+                'calls': calls,
+                'tottime': tottime,
+                'cumtime': cumtime
+            })
+        entries.sort(key=lambda entry: entry['tottime'], reverse=True)
+        return result, {'mode': mode, 'total_calls': profile_stats.total_calls, 'hot_functions': entries[:top]}
+
+    if mode == 'tracemalloc':
+        # tracemalloc traces the whole process, so the profiles run one at a time
+        with TRACEMALLOC_LOCK:
+            already_tracing = tracemalloc.is_tracing()
+            if not already_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+            try:
+                result = fn()
+                current, peak = tracemalloc.get_traced_memory()
+                after = tracemalloc.take_snapshot()
+            finally:
+                if not already_tracing:
+                    tracemalloc.stop()
+        allocations = [
+            {'location': str(diff.traceback), 'size_diff': diff.size_diff, 'count_diff': diff.count_diff}
+            for diff in after.compare_to(before, 'lineno')[:top]
+        ]
+        return result, {'mode': mode, 'current_bytes': current, 'peak_bytes': peak, 'top_allocations': allocations}
+
+    raise ValueError(f'Unknown profile mode: {mode}')
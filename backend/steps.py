@@ -0,0 +1,71 @@
+'''
+The events yielded by Maze.iter_solve(), the stepwise version of the solvers.
+A search is reported as a sequence of:
++ Expanded: a batch of cells expanded in this order (batch_size of them, fewer at the end of a leg)
++ FrontierSize: the number of nodes in the frontier after the batch
++ LegCompleted: a goal was reached, with the path of the leg and the number of nodes it explored
++ SolveFinished: the last event, with the result and the totals of the search
+The batches keep the overhead low: the solver only stops every batch_size expansions.
+Every event has a kind and as_dict(), so it can be written as one JSON line.
+'''
+
+
+class StepEvent:
+    kind = 'event'
+    __slots__ = ('leg',)
+
+    def __init__(self, leg):
+        self.leg = leg # index of the goal being searched for (0 for the first leg)
+
+    def as_dict(self):
+        data = {'kind': self.kind}
+        for cls in reversed(type(self).__mro__):
+            for name in getattr(cls, '__slots__', ()):
+                data[name] = getattr(self, name)
+        return data
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={value!r}' for name, value in self.as_dict().items() if name != 'kind')
+        return f'{type(self).__name__}({fields})'
+
+
+class Expanded(StepEvent):
+    kind = 'expanded'
+    __slots__ = ('cells',)
+
+    def __init__(self, leg, cells):
+        super().__init__(leg)
+        self.cells = cells # list of (x, y) in expansion order
+
+
+class FrontierSize(StepEvent):
+    kind = 'frontier'
+    __slots__ = ('size',)
+
+    def __init__(self, leg, size):
+        super().__init__(leg)
+        self.size = size
+
+
+class LegCompleted(StepEvent):
+    kind = 'leg'
+    __slots__ = ('goal', 'path', 'explored')
+
+    def __init__(self, leg, goal, path, explored):
+        super().__init__(leg)
+        self.goal = goal # the goal reached at the end of the leg
+        self.path = path # the cells of the path of the leg
+        self.explored = explored # number of nodes explored in the leg
+
+
+class SolveFinished(StepEvent):
+    kind = 'result'
+    __slots__ = ('success', 'num_explored', 'path_length', 'path_cost', 'time_taken')
+
+    def __init__(self, leg, success, num_explored, path_length, path_cost, time_taken):
+        super().__init__(leg)
+        self.success = success
+        self.num_explored = num_explored
+        self.path_length = path_length
+        self.path_cost = path_cost
+        self.time_taken = time_taken
@@ -0,0 +1,9 @@
+'''
+Setup of the regression tests, run with 'python -m pytest tests' from the backend folder.
+The modules of the backend import each other by name, so the backend folder is put on the path first;
+the helpers shared by the tests are in helpers.py.
+'''
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
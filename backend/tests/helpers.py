@@ -0,0 +1,56 @@
+'''
+Helpers shared by the regression tests: loading and building mazes, solving fresh copies of them
+and checking the reported paths. The backend folder is put on the path by conftest.py.
+'''
+import os
+
+from maze import Maze
+from utils import read_maze
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_DIR = os.path.join(BACKEND, 'test')
+
+# a few mazes of the test folder, with one and several goals, some of them unreachable
+SAMPLE = range(0, 1000, 37)
+
+
+''' Define a function to load a maze of the test folder '''
+def load_maze(index):
+    size, start, goals, walls = read_maze(os.path.join(TEST_DIR, f'maze_{index}.txt'))
+    return Maze(size, start, goals, set(walls))
+
+
+''' Define a function to build a maze from rows of text, '#' is a wall, 'S' the start and 'G' a goal (in reading order) '''
+def maze_from_text(text, costs=None):
+    rows = text.strip().splitlines()
+    walls, goals, start = set(), [], None
+    for y, row in enumerate(rows):
+        for x, cell in enumerate(row):
+            if cell == '#':
+                walls.add((x, y))
+            elif cell == 'S':
+                start = (x, y)
+            elif cell == 'G':
+                goals.append((x, y))
+    return Maze((len(rows), len(rows[0])), start, goals, walls, costs=costs)
+
+
+''' Define a function to run an algorithm on a fresh copy of a maze and return it '''
+def solved(maze, algorithm, **options):
+    copy = Maze(maze.size, maze.start, list(maze.goals), set(maze.walls), costs=maze.costs)
+    copy.trace = options.pop('trace', 'full')
+    copy.solve(algorithm, **options)
+    return copy
+
+
+''' Define a function to check that the paths of a solved maze walk from the start through every goal reached '''
+def assert_valid_walk(maze):
+    current = maze.start
+    for leg, cells in enumerate(maze.solution_single):
+        for cell in cells:
+            assert abs(cell[0] - current[0]) + abs(cell[1] - current[1]) == 1, (leg, current, cell)
+            assert cell not in maze.walls
+            current = cell
+        assert current in maze.goals
+        assert maze.path_length_single[leg] == len(cells)
+    assert maze.path_length_multiple == len(maze.solution_multiple) == sum(maze.path_length_single)
@@ -0,0 +1,58 @@
+'''
+Admission control: costs, 413 for oversized solves, bounded slots and queues with a 429 when both are full.
+'''
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected, estimate_cost, parse_limits
+
+
+def test_costs_and_limits():
+    assert estimate_cost(100, 2, 'bfs') == 200
+    assert estimate_cost(100, 2, 'ids', depth_limit=30) == 6000
+    assert estimate_cost(100, 0, 'as') == 100
+    assert parse_limits('ids=1:2, default=4:32') == {'ids': (1, 2), 'default': (4, 32)}
+
+
+def test_oversized_solves_are_rejected():
+    async def run():
+        controller = AdmissionController(max_cost=1000)
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.admit('bfs', 1001):
+                pass
+        return controller, rejected.value
+
+    controller, rejection = asyncio.run(run())
+    assert rejection.status_code == 413 and rejection.retry_after is None
+    assert controller.rejections == {('bfs', 'too_large'): 1}
+
+
+def test_full_queue_is_rejected_and_slots_are_released():
+    async def run():
+        controller = AdmissionController(limits={'ids': (1, 1)})
+        release = asyncio.Event()
+        order = []
+
+        async def solve(name):
+            async with controller.admit('ids', 10):
+                order.append(name)
+                await release.wait()
+
+        running = asyncio.create_task(solve('first'))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(solve('second'))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await solve('third')
+        release.set()
+        await asyncio.gather(running, queued)
+        return controller, rejected.value, order
+
+    controller, rejection, order = asyncio.run(run())
+    assert rejection.status_code == 429 and rejection.retry_after >= 1
+    assert order == ['first', 'second']
+    gate = controller.gate('ids')
+    assert gate.running == 0 and gate.waiting == 0 and not gate.semaphore.locked()
+    # the other algorithms have their own slots
+    assert controller.gate('bfs').concurrency == 4
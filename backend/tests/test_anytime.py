@@ -0,0 +1,46 @@
+'''
+Anytime A* (ARA*): the budgets stop the refinement, every leg still returns a path with its bound.
+'''
+import random
+
+from helpers import SAMPLE, load_maze, solved
+from maze import Maze
+
+
+def scattered_walls(size, density, seed, keep):
+    rng = random.Random(seed)
+    rows, cols = size
+    return {(x, y) for y in range(rows) for x in range(1, cols - 1) if rng.random() < density} - set(keep)
+
+
+def test_every_leg_gets_a_path_when_the_budget_runs_out():
+    start, goals = (0, 0), [(29, 0), (29, 29)]
+    maze = Maze((30, 30), start, goals, scattered_walls((30, 30), 0.25, 1, [start] + goals))
+    shortest = solved(maze, 'bfs')
+    for budget in (0, 25, 150):
+        anytime = solved(maze, 'as', expansion_budget=budget)
+        assert anytime.solution_single and len(anytime.solution_single) == 2
+        for length, best in zip(anytime.path_length_single, shortest.path_length_single):
+            assert best <= length <= anytime.suboptimality_bound * best + 1e-9
+
+
+def test_open_grid_with_a_tiny_budget():
+    maze = Maze((20, 20), (0, 0), [(19, 0), (19, 19)], set())
+    anytime = solved(maze, 'as', expansion_budget=25)
+    assert anytime.path_length_single == [19, 19]
+    assert anytime.suboptimality_bound >= 1.0
+
+
+def test_zero_time_budget_still_solves():
+    maze = load_maze(3)
+    anytime = solved(maze, 'as', time_budget=0)
+    assert bool(anytime.solution_single) == bool(solved(maze, 'bfs').solution_single)
+
+
+def test_unlimited_anytime_matches_bfs_lengths():
+    for index in SAMPLE:
+        maze = load_maze(index)
+        anytime, bfs = solved(maze, 'as', weight=2.0), solved(maze, 'bfs')
+        assert bool(anytime.solution_single) == bool(bfs.solution_single)
+        if len(maze.goals) == 1 and bfs.solution_single:
+            assert anytime.path_length_single == bfs.path_length_single
@@ -0,0 +1,50 @@
+'''
+The 'auto' algorithm: the chosen engine returns the shortest paths, and reuses the reduced graphs of a session.
+'''
+from helpers import SAMPLE, load_maze, solved
+from maze import Maze
+from benchmark import auto_corpus
+from sessions import MazeSession
+
+
+def corridor_maze(size=21):
+    # a serpentine of corridors, so auto picks BFS on the reduced graph when there are several goals
+    walls = set()
+    for y in range(1, size, 2):
+        gap = size - 1 if (y // 2) % 2 == 0 else 0
+        walls |= {(x, y) for x in range(size) if x != gap}
+    return walls
+
+
+def test_auto_lengths_match_bfs():
+    for index in SAMPLE:
+        maze = load_maze(index)
+        auto, bfs = solved(maze, 'auto'), solved(maze, 'bfs')
+        assert auto.path_length_single == bfs.path_length_single, (index, auto.engine)
+
+
+def test_auto_reuses_the_session_reduced_graph():
+    session = MazeSession('m', (21, 21), corridor_maze())
+    goals = [(20, 20), (0, 10)]
+    first = session.new_maze((0, 0), goals)
+    first.solve('auto')
+    assert first.engine == 'bfs+preprocess'
+    second = session.new_maze((0, 0), goals)
+    second.solve('auto')
+    assert second.graph is first.graph and len(session.reduced) == 1
+    assert second.path_length_single == solved(Maze((21, 21), (0, 0), goals, corridor_maze()), 'bfs').path_length_single
+
+
+def test_changing_a_wall_drops_the_session_graphs():
+    session = MazeSession('m', (21, 21), corridor_maze())
+    maze = session.new_maze((0, 0), [(20, 20), (0, 10)])
+    maze.preprocess()
+    shared = maze.graph
+    maze.set_wall((20, 1), wall=False)
+    assert maze.graph is not shared and maze.graph_provider is None
+
+
+def test_calibration_corpus_is_found_from_another_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    corpus = auto_corpus(per_group=0)
+    assert len(corpus) == 100 and all(group == 'test' for group, _ in corpus)
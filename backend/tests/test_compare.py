@@ -0,0 +1,53 @@
+'''
+The /compare workers: shared grid, shared component labels, and the same results as a local solve.
+'''
+import random
+
+import pytest
+
+from helpers import SAMPLE, load_maze
+from maze import Maze
+from compare import LABELED_ALGORITHMS, compare_algorithms
+from components import ComponentLabels, GridLabels
+from grid import OccupancyGrid
+
+
+def rows_of(maze):
+    rows, cols = maze.size
+    return [[1 if (x, y) in maze.walls else 0 for x in range(cols)] for y in range(rows)]
+
+
+def test_grid_labels_match_the_component_labels():
+    rng = random.Random(2)
+    walls = {(rng.randrange(15), rng.randrange(12)) for _ in range(70)}
+    grid, labels = OccupancyGrid.from_walls((12, 15), walls), ComponentLabels((12, 15), walls)
+    shared = GridLabels.label(grid)
+    cells = [(x, y) for y in range(12) for x in range(15)]
+    for a in cells:
+        assert shared.component_size(a) == labels.component_size(a)
+        for b in cells:
+            assert shared.reachable(a, b) == labels.reachable(a, b)
+
+
+def test_workers_report_the_local_results():
+    algorithms = ['bfs', 'as', 'ucs', 'backtracking', 'depthlimited', 'ids', 'idas']
+    for index in list(SAMPLE)[:6]:
+        maze = load_maze(index)
+        results = compare_algorithms(OccupancyGrid.from_rows(rows_of(maze)), maze.start, maze.goals, algorithms, limit=100)
+        for algorithm in algorithms:
+            local = Maze(maze.size, maze.start, list(maze.goals), set(maze.walls))
+            local.trace = 'counts'
+            # the workers label the components like the server does for the depth first solvers
+            if algorithm in LABELED_ALGORITHMS:
+                local.label_components()
+            success = local.solve(algorithm, limit=100)
+            result = results[algorithm]
+            assert result['status'] == 'ok', result
+            assert result['success'] == success
+            assert result['path_length_single'] == local.path_length_single
+            assert result['num_explored_multiple'] == local.num_explored_multiple
+
+
+def test_ragged_rows_are_rejected():
+    with pytest.raises(ValueError):
+        OccupancyGrid.from_rows([[0, 0, 0], [0, 0], [0, 0, 0]])
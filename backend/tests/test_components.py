@@ -0,0 +1,63 @@
+'''
+Connected component labels: unreachable goals are answered without searching, with the same counts,
+and the labels follow the walls that change.
+'''
+from helpers import SAMPLE, load_maze, maze_from_text, solved
+from maze import Maze
+from components import ComponentLabels
+
+
+def test_labels_give_the_results_of_the_full_search():
+    for index in SAMPLE:
+        maze = load_maze(index)
+        for algorithm in ('bfs', 'as', 'ucs', 'ids'):
+            plain = solved(maze, algorithm, limit=100)
+            labeled = Maze(maze.size, maze.start, list(maze.goals), set(maze.walls))
+            labeled.label_components()
+            success = labeled.solve(algorithm, limit=100)
+            assert success == (len(plain.solution_single) == len(maze.goals)), (index, algorithm)
+            assert labeled.path_length_single == plain.path_length_single, (index, algorithm)
+            if algorithm in ('bfs', 'ucs'):
+                # the exhaustive searches explore the whole region of the start before failing
+                assert labeled.num_explored_multiple == plain.num_explored_multiple, (index, algorithm)
+
+
+def test_walled_in_goal_is_unreachable_without_searching():
+    maze = maze_from_text('''
+S....#.
+.....#G
+.....##
+''')
+    maze.label_components()
+    assert maze.solve('bfs') is False
+    assert maze.num_explored_multiple == 15 and maze.nodes_explored_multiple == []
+
+
+def test_labels_follow_wall_changes():
+    maze = maze_from_text('''
+S.#..
+..#.G
+..#..
+''')
+    maze.label_components()
+    assert not maze.components.reachable(maze.start, maze.goals[0])
+    maze.set_wall((2, 1), wall=False)
+    assert maze.components.reachable(maze.start, maze.goals[0])
+    assert maze.solve('bfs') is True
+    maze.set_wall((2, 1))
+    fresh = ComponentLabels(maze.size, set(maze.walls))
+    cells = [(x, y) for y in range(3) for x in range(5)]
+    assert all(maze.components.reachable(a, b) == fresh.reachable(a, b) for a in cells for b in cells)
+    assert all(maze.components.component_size(cell) == fresh.component_size(cell) for cell in cells)
+
+
+def test_start_on_a_wall_reaches_the_region_of_its_neighbors():
+    maze = maze_from_text('''
+.#.#.
+#S..G
+.#.#.
+''')
+    maze.walls.add(maze.start)
+    labels = maze.label_components()
+    assert labels.reachable(maze.start, maze.goals[0])
+    assert maze.solve('ids', limit=100) is True
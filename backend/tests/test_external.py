@@ -0,0 +1,56 @@
+'''
+External-memory BFS: the same path lengths as BFS, with the grid packed in a file and tiny sort budgets.
+'''
+import os
+
+import pytest
+
+from helpers import TEST_DIR, SAMPLE, assert_valid_walk, load_maze, solved
+from maze import Maze
+from external import ExternalBFS, PackedGrid
+
+
+def test_external_lengths_match_bfs(tmp_path):
+    for index in SAMPLE:
+        maze = load_maze(index)
+        bfs = solved(maze, 'bfs')
+        # a budget of a few items forces many sort runs and merges
+        success = maze.solve_external(memory_budget=400, workdir=str(tmp_path))
+        assert success == (len(bfs.solution_single) == len(maze.goals)), index
+        assert maze.solution_single == bfs.solution_single, index
+        assert_valid_walk(maze)
+    assert os.listdir(tmp_path) == []
+
+
+def test_packed_grid_from_the_maze_file(tmp_path):
+    path = os.path.join(TEST_DIR, 'maze_7.txt')
+    grid, start, goals = PackedGrid.from_maze_file(path, str(tmp_path / 'grid.bin'))
+    maze = load_maze(7)
+    try:
+        assert grid.size == tuple(maze.size) and start == maze.start and goals == maze.goals
+        cells = [(x, y) for y in range(grid.size[0]) for x in range(grid.size[1])]
+        assert {cell for cell in cells if cell in grid} == set(maze.walls)
+        packed = Maze(grid.size, start, goals, grid)
+        packed.solve_external(workdir=str(tmp_path))
+        assert packed.path_length_single == solved(maze, 'bfs').path_length_single
+    finally:
+        grid.close()
+
+
+def test_goals_at_the_same_distance_are_reached_in_bfs_order(tmp_path):
+    walls = {(0, 1), (1, 2), (1, 5), (5, 1), (3, 3), (5, 0), (5, 3)}
+    maze = Maze((6, 6), (1, 1), [(1, 4), (4, 2), (2, 4)], walls)
+    bfs = solved(maze, 'bfs')
+    assert bfs.path_length_single == [4, 1, 5]
+    maze.solve_external(workdir=str(tmp_path))
+    assert maze.solution_single == bfs.solution_single
+
+
+def test_goals_outside_of_the_grid_are_rejected(tmp_path):
+    grid = PackedGrid.create(str(tmp_path / 'grid.bin'), (4, 4))
+    try:
+        # (5, 0) would be the index of (1, 1)
+        with pytest.raises(ValueError):
+            ExternalBFS(grid, workdir=str(tmp_path)).search((0, 0), [(5, 0)])
+    finally:
+        grid.close()
@@ -0,0 +1,55 @@
+'''
+Compressed first-move tables: the walks have the lengths (and costs) of BFS and UCS, before and after a save and load.
+'''
+import random
+
+import pytest
+
+from helpers import SAMPLE, assert_valid_walk, load_maze, solved
+from maze import Maze
+
+
+def test_table_walks_match_bfs():
+    for index in list(SAMPLE)[:10]:
+        maze = load_maze(index)
+        bfs = solved(maze, 'bfs')
+        maze.build_first_moves()
+        for algorithm in ('bfs', 'as'):
+            maze.solve(algorithm)
+            if len(maze.goals) == 1 or algorithm == 'bfs':
+                assert maze.path_length_single == bfs.path_length_single, (index, algorithm)
+            if maze.solution_single:
+                assert_valid_walk(maze)
+
+
+def test_every_pair_is_shortest(tmp_path):
+    maze = load_maze(11)
+    cells = [(x, y) for y in range(maze.size[0]) for x in range(maze.size[1]) if (x, y) not in maze.walls]
+    path = str(tmp_path / 'table.fmt')
+    maze.build_first_moves(processes=2, path=path)
+    table = maze.load_first_moves(path)
+    try:
+        for goal in cells[::3]:
+            for start in cells[::2]:
+                walk = table.path(start, goal)
+                expected = solved(Maze(maze.size, start, [goal], maze.walls), 'bfs').path_length_single
+                assert (len(walk[1]) if walk else None) == (expected[0] if expected else None), (start, goal)
+    finally:
+        table.close()
+
+
+def test_terrain_costs_match_ucs():
+    rng = random.Random(5)
+    costs = {(x, y): rng.randint(1, 9) for y in range(10) for x in range(10)}
+    maze = Maze((10, 10), (0, 0), [(9, 9), (9, 0), (0, 9)], {(4, y) for y in range(8)}, costs=costs)
+    ucs = solved(maze, 'ucs')
+    maze.build_first_moves()
+    maze.solve('ucs')
+    assert maze.path_cost_single == ucs.path_cost_single
+
+
+def test_table_of_another_size_is_refused(tmp_path):
+    path = str(tmp_path / 'table.fmt')
+    Maze((3, 3), (0, 0), [(2, 2)], set()).build_first_moves(path=path)
+    with pytest.raises(ValueError):
+        Maze((4, 3), (0, 0), [(2, 2)], set()).load_first_moves(path)
@@ -0,0 +1,33 @@
+'''
+Trace downsampling: the frames cover every explored cell once per leg, in order, within the frame budget.
+'''
+from helpers import SAMPLE, load_maze, solved
+from maze import Maze
+from frames import build_frames
+
+
+def test_frames_cover_the_exploration():
+    for index in SAMPLE:
+        maze = solved(load_maze(index), 'bfs')
+        cols = maze.size[1]
+        for mode in ('chunks', 'layers'):
+            cells, frames, leg_frames = build_frames(maze, 10, mode)
+            expected = []
+            for explored in maze.nodes_explored_single:
+                seen = set()
+                expected += [y * cols + x for x, y in explored if not ((x, y) in seen or seen.add((x, y)))]
+            assert cells[:len(expected)] == expected
+            # the frames are contiguous and start a new one at every leg
+            assert frames[0][0] == 0 and frames[-1][1] == len(cells)
+            assert all(previous[1] == current[0] for previous, current in zip(frames, frames[1:]))
+            assert leg_frames == sorted(leg_frames) and len(leg_frames) >= len(maze.solution_single)
+            assert len(frames) <= 10 + len(leg_frames) * 2
+
+
+def test_layer_frames_follow_the_bfs_layers():
+    maze = solved(Maze((9, 9), (4, 4), [(0, 0)], set()), 'bfs')
+    cells, frames, _ = build_frames(maze, 100, 'layers')
+    distance = lambda cell: abs(cell % 9 - 4) + abs(cell // 9 - 4)
+    for start, end in frames:
+        # with more frames than layers, every frame is one whole layer
+        assert len({distance(cell) for cell in cells[start:end]}) == 1
@@ -0,0 +1,53 @@
+'''
+The goal index: the same closest goal (and tie-breaking) as min() over the list of goals, however many goals there are.
+'''
+import random
+
+from helpers import solved
+from maze import Maze
+from goals import GoalIndex
+from utils import manhattan_distance
+
+
+def closest(goals, state):
+    # the behaviour the index replaces: the first listed goal among the closest ones
+    return min(goals, key=lambda goal: manhattan_distance(state, goal))
+
+
+def test_nearest_matches_min_while_goals_are_removed():
+    rng = random.Random(7)
+    size = (40, 60)
+    goals = [(rng.randrange(60), rng.randrange(40)) for _ in range(300)] # with duplicates
+    index, remaining = GoalIndex(goals, size), list(goals)
+    while remaining:
+        state = (rng.randrange(60), rng.randrange(40))
+        assert index.nearest(state) == closest(remaining, state)
+        assert index.min_distance(state) == manhattan_distance(state, closest(remaining, state))
+        goal = rng.choice(remaining)
+        index.remove(goal)
+        remaining.remove(goal)
+        assert len(index) == len(remaining) and (goal in index) == (goal in remaining)
+    assert index.nearest((0, 0)) is None and index.min_distance((0, 0)) == 0
+
+
+def test_ties_go_to_the_first_listed_goal():
+    index = GoalIndex([(4, 0), (0, 4), (2, 2)], (5, 5))
+    assert index.nearest((0, 0)) == (4, 0)
+    index.remove((4, 0))
+    assert index.nearest((0, 0)) == (0, 4)
+
+
+def test_many_goals_are_all_visited():
+    rng = random.Random(1)
+    goals = list({(rng.randrange(30), rng.randrange(30)) for _ in range(200)} - {(0, 0)})
+    maze = Maze((30, 30), (0, 0), goals, set())
+    for algorithm in ('bfs', 'as', 'ucs'):
+        result = solved(maze, algorithm)
+        assert sorted(cells[-1] for cells in result.solution_single) == sorted(goals)
+    # BFS takes the closest goal by path, which is the closest by Manhattan distance on an open grid
+    bfs = solved(maze, 'bfs')
+    remaining, current = list(goals), (0, 0)
+    for cells in bfs.solution_single:
+        assert len(cells) == manhattan_distance(current, closest(remaining, current))
+        remaining.remove(cells[-1])
+        current = cells[-1]
@@ -0,0 +1,15 @@
+'''
+The load test helpers, independent of the directory they are run from.
+'''
+from loadtest import build_corpus, parse_mix
+
+
+def test_corpus_is_found_from_another_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    corpus = build_corpus(large_count=1, large_size=20)
+    assert len(corpus['small']) == 1000
+    assert len(corpus['large']) == 1 and len(corpus['large'][0]['maze']) == 20
+
+
+def test_parse_mix():
+    assert parse_mix('bfs=3, as=1.5,') == {'bfs': 3.0, 'as': 1.5}
@@ -0,0 +1,28 @@
+'''
+The Prometheus metrics: counters, callbacks and cumulative histogram buckets.
+'''
+from metrics import Registry, exponential_buckets
+
+
+def test_counter_and_callback_samples():
+    registry = Registry()
+    requests = registry.counter('requests_total', 'Requests.', ('route',))
+    registry.gauge('queued', 'Queued.', ('algorithm',), callback=lambda: {('ids',): 2})
+    requests.inc('/solve')
+    requests.inc('/solve', amount=2)
+    text = registry.render()
+    assert '# TYPE requests_total counter' in text
+    assert 'requests_total{route="/solve"} 3' in text
+    assert 'queued{algorithm="ids"} 2' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram('latency_seconds', 'Latency.', exponential_buckets(1, 2, 3), ('algorithm',))
+    for value in (0.5, 1.5, 3, 10):
+        latency.observe(value, 'bfs')
+    lines = registry.render().splitlines()
+    buckets = [line.rsplit(' ', 1)[1] for line in lines if line.startswith('latency_seconds_bucket')]
+    assert buckets == ['1', '2', '3', '4']
+    assert 'latency_seconds_count{algorithm="bfs"} 4' in lines
+    assert any(line.startswith('latency_seconds_bucket{algorithm="bfs",le="+Inf"}') for line in lines)
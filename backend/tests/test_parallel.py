@@ -0,0 +1,28 @@
+'''
+Parallel BFS: the same path lengths as BFS whatever the number of worker bands.
+'''
+from helpers import SAMPLE, assert_valid_walk, load_maze, solved
+from maze import Maze
+
+
+def test_parallel_lengths_match_bfs():
+    for index in list(SAMPLE)[:10]:
+        maze = load_maze(index)
+        bfs = solved(maze, 'bfs')
+        for workers in (1, 3):
+            maze = load_maze(index)
+            success = maze.solve_parallel(workers=workers)
+            assert success == (len(bfs.solution_single) == len(maze.goals)), (index, workers)
+            assert maze.solution_single == bfs.solution_single, (index, workers)
+            assert_valid_walk(maze)
+
+
+def test_goals_at_the_same_distance_are_reached_in_bfs_order():
+    walls = {(0, 1), (1, 2), (1, 5), (5, 1), (3, 3), (5, 0), (5, 3)}
+    goals = [(1, 4), (4, 2), (2, 4)]
+    bfs = solved(Maze((6, 6), (1, 1), goals, walls), 'bfs')
+    # with three bands, the goals of a level can be found by their tile one step apart
+    for workers in (1, 2, 3):
+        maze = Maze((6, 6), (1, 1), list(goals), set(walls))
+        maze.solve_parallel(workers=workers)
+        assert maze.solution_single == bfs.solution_single, workers
@@ -0,0 +1,52 @@
+'''
+Path reporting of every solver: the paths hold the cells entered after the start of each leg,
+so the length is the number of steps and the cost is the sum of the terrain costs of those cells.
+'''
+import random
+
+from helpers import SAMPLE, assert_valid_walk, load_maze, solved
+from maze import ALGORITHMS, Maze
+
+SOLVERS = [algorithm for algorithm in ALGORITHMS if algorithm != 'auto']
+
+
+def test_every_solver_reports_steps_and_costs_alike():
+    for index in SAMPLE:
+        maze = load_maze(index)
+        for algorithm in SOLVERS:
+            result = solved(maze, algorithm, limit=100)
+            assert_valid_walk(result)
+            # unit costs: the cost of a path is its length
+            assert result.path_cost_single == result.path_length_single, (index, algorithm)
+
+
+def test_idas_path_does_not_repeat_the_start():
+    maze = Maze((4, 4), (0, 0), [(3, 3), (0, 3)], {(1, 1), (2, 1), (1, 2)})
+    idas = solved(maze, 'idas')
+    assert idas.path_length_single[0] == 6
+    assert idas.path_cost_single == idas.path_length_single
+    assert_valid_walk(idas)
+
+
+def test_optimal_solvers_agree_with_bfs_on_single_goals():
+    for index in SAMPLE:
+        maze = load_maze(index)
+        if len(maze.goals) != 1:
+            continue
+        bfs = solved(maze, 'bfs')
+        for algorithm in ('as', 'ucs', 'was', 'idas'):
+            assert solved(maze, algorithm, limit=100).path_length_single == bfs.path_length_single, (index, algorithm)
+
+
+def test_terrain_costs_are_the_cells_entered():
+    rng = random.Random(3)
+    costs = {(x, y): rng.randint(1, 9) for y in range(8) for x in range(8)}
+    maze = Maze((8, 8), (0, 0), [(7, 7), (0, 7)], {(3, y) for y in range(6)}, costs=costs)
+    ucs = solved(maze, 'ucs')
+    for algorithm in SOLVERS:
+        result = solved(maze, algorithm, limit=100)
+        assert_valid_walk(result)
+        assert result.path_cost_single == [sum(costs[cell] for cell in cells) for cells in result.solution_single]
+    # UCS reaches the cheapest remaining goal first
+    assert ucs.path_cost_single[0] == min(solved(Maze(maze.size, maze.start, [goal], maze.walls, costs=costs), 'ucs').path_cost_multiple
+                                          for goal in maze.goals)
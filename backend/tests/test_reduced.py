@@ -0,0 +1,43 @@
+'''
+Dead-end filling and corridor contraction: the searches on the reduced graph return paths of the same
+length as on the grid, expanded back into valid walks.
+'''
+from helpers import SAMPLE, assert_valid_walk, load_maze, maze_from_text, solved
+
+
+def test_reduced_bfs_matches_bfs():
+    for index in SAMPLE:
+        maze = load_maze(index)
+        bfs = solved(maze, 'bfs')
+        maze.preprocess()
+        maze.solve('bfs')
+        assert maze.path_length_single == bfs.path_length_single, index
+        if maze.solution_single:
+            assert_valid_walk(maze)
+
+
+def test_reduced_astar_heads_to_the_closest_goal():
+    for index in SAMPLE:
+        maze = load_maze(index)
+        if len(maze.goals) != 1:
+            continue
+        bfs = solved(maze, 'bfs')
+        maze.preprocess()
+        maze.solve('as')
+        assert maze.path_length_single == bfs.path_length_single, index
+
+
+def test_corridors_are_contracted():
+    maze = maze_from_text('''
+#########
+#S.....G#
+###.#####
+###.#####
+#########
+''')
+    graph = maze.preprocess()
+    # the dead end below the corridor is filled, then the corridor from the start to the goal is one edge
+    assert graph.summary() == {'nodes': 2, 'edges': 1, 'dead_end_cells': 2}
+    maze.solve('bfs')
+    assert maze.path_length_single == [6]
+    assert maze.num_explored_multiple == 2
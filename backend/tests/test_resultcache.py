@@ -0,0 +1,47 @@
+'''
+The persistent result cache: keys, eviction and access times.
+'''
+import os
+
+from resultcache import ResultCache, result_key
+
+
+def test_keys_change_with_every_input():
+    base = result_key('solve', 'm', (0, 0), [(1, 1)], 'bfs', {'trace': 'full'})
+    assert base == result_key('solve', 'm', (0, 0), [(1, 1)], 'bfs', {'trace': 'full'})
+    others = [
+        result_key('session', 'm', (0, 0), [(1, 1)], 'bfs', {'trace': 'full'}),
+        result_key('solve', 'n', (0, 0), [(1, 1)], 'bfs', {'trace': 'full'}),
+        result_key('solve', 'm', (0, 1), [(1, 1)], 'bfs', {'trace': 'full'}),
+        result_key('solve', 'm', (0, 0), [(1, 1), (2, 2)], 'bfs', {'trace': 'full'}),
+        result_key('solve', 'm', (0, 0), [(1, 1)], 'dfs', {'trace': 'full'}),
+        result_key('solve', 'm', (0, 0), [(1, 1)], 'bfs', {'trace': 'none'}),
+    ]
+    assert len({base, *others}) == len(others) + 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    # random payloads do not compress, so three of them fit in the budget
+    cache = ResultCache(str(tmp_path / 'cache.db'), max_bytes=350, touch_seconds=0)
+    payloads = {f'k{index}': os.urandom(100) for index in range(5)}
+    cache.put('k0', payloads['k0'])
+    cache.put('k1', payloads['k1'])
+    assert cache.get('k0') == payloads['k0'] # k0 is now more recent than k1
+    for key in ('k2', 'k3', 'k4'):
+        cache.put(key, payloads[key])
+    assert cache.total_bytes() <= 350 and len(cache) == 3
+    assert cache.get('k1') is None
+    assert cache.get('k4') == payloads['k4']
+    assert cache.evictions > 0
+
+
+def test_hits_only_rewrite_stale_access_times(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache.db'), touch_seconds=3600)
+    cache.put('k', b'{}')
+    connection = cache._connection()
+    stored = connection.execute("SELECT accessed FROM results WHERE key = 'k'").fetchone()[0]
+    assert cache.get('k') == b'{}'
+    assert connection.execute("SELECT accessed FROM results WHERE key = 'k'").fetchone()[0] == stored
+    connection.execute("UPDATE results SET accessed = 0 WHERE key = 'k'")
+    cache.get('k')
+    assert connection.execute("SELECT accessed FROM results WHERE key = 'k'").fetchone()[0] > 0
@@ -0,0 +1,155 @@
+'''
+The HTTP API, run in process with the TestClient (needs fastapi and httpx, skipped otherwise).
+'''
+import json
+import sqlite3
+
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('httpx')
+pytest.importorskip('uvicorn')
+from fastapi.testclient import TestClient
+
+import server
+from helpers import SAMPLE, load_maze
+
+
+def maze_body(index, algorithm, **fields):
+    maze = load_maze(index)
+    rows, cols = maze.size
+    grid = [[1 if (x, y) in maze.walls else 0 for x in range(cols)] for y in range(rows)]
+    return dict(maze=grid, start=list(maze.start), goals=[list(goal) for goal in maze.goals], algorithm=algorithm, **fields)
+
+
+@pytest.fixture
+def client():
+    with TestClient(server.app) as client:
+        yield client
+
+
+def test_solve_matches_the_solver(client):
+    for index in SAMPLE:
+        body = maze_body(index, 'bfs', trace='none')
+        response = client.post('/solve', json=body)
+        assert response.status_code == 200
+        maze = load_maze(index)
+        assert response.json()['success'] == maze.solve('bfs')
+        assert response.json()['path_length_single'] == maze.path_length_single
+
+
+def test_stream_releases_its_slot(client):
+    body = maze_body(0, 'auto', batch_size=4)
+    with client.stream('POST', '/solve/stream', json=body) as response:
+        lines = [json.loads(line) for line in response.iter_lines() if line]
+    assert lines[-1]['kind'] == 'result'
+    assert server.admission.gate('auto').running == 0
+
+
+def test_stream_rejection_comes_before_the_preprocessing(client, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError('the maze was prepared before admission')
+    monkeypatch.setattr(server.admission, 'max_cost', 1)
+    monkeypatch.setattr(server.Maze, 'preprocess', fail)
+    response = client.post('/solve/stream', json=maze_body(0, 'bfs', preprocess=True))
+    assert response.status_code == 413
+    assert server.admission.gate('bfs').running == 0
+
+
+class BrokenCache:
+    hits = misses = evictions = 0
+
+    def get(self, key):
+        raise sqlite3.OperationalError('database is locked')
+
+    def put(self, key, payload):
+        raise sqlite3.OperationalError('database or disk is full')
+
+
+def test_cache_errors_still_answer_the_solve(client, monkeypatch):
+    monkeypatch.setattr(server, 'result_cache', BrokenCache())
+    response = client.post('/solve', json=maze_body(0, 'bfs'))
+    assert response.status_code == 200
+    assert response.json()['success'] == load_maze(0).solve('bfs')
+
+
+def test_ragged_mazes_are_rejected(client):
+    body = maze_body(0, 'bfs')
+    body['maze'][1] = body['maze'][1][:-1]
+    for route in ('/solve', '/compare'):
+        fields = dict(body, algorithms=['bfs']) if route == '/compare' else body
+        assert client.post(route, json=fields).status_code == 400
+
+
+def test_metrics_count_the_solves(client):
+    client.post('/solve', json=maze_body(0, 'dfs'))
+    text = client.get('/metrics').text
+    assert 'maze_solve_latency_seconds_count{algorithm="dfs"}' in text
+    assert 'maze_http_requests_total{method="POST",route="/solve",status="200"}' in text
+
+
+def test_oversized_solve_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(server.admission, 'max_cost', 1)
+    response = client.post('/solve', json=maze_body(0, 'ids'))
+    assert response.status_code == 413
+
+
+def test_frames_replace_the_explored_lists(client):
+    body = client.post('/solve', json=maze_body(0, 'bfs', frames=5)).json()
+    assert body['nodes_explored_multiple'] == [] and body['trace_frames']
+    assert body['trace_frames'][-1][1] == len(body['trace_cells'])
+    assert client.post('/solve', json=maze_body(0, 'bfs', frames=5, trace='counts')).status_code == 400
+
+
+def test_registered_maze_solves_like_the_solve_endpoint(client):
+    body = maze_body(0, 'bfs')
+    # a start on a wall still moves into its free neighbors
+    body['maze'][1][1], body['maze'][4][4] = 1, 0
+    body.update(start=[1, 1], goals=[[4, 4]])
+    maze_id = client.post('/mazes', json=dict(maze=body['maze'])).json()['maze_id']
+    compared = ('success', 'solution_single', 'path_length_single', 'num_explored_multiple')
+    for algorithm in ('bfs', 'dfs', 'gbfs', 'as', 'ucs', 'was', 'auto', 'ids'):
+        fields = dict(start=body['start'], goals=body['goals'], algorithm=algorithm, trace='none')
+        direct = client.post('/solve', json=dict(body, **fields)).json()
+        session = client.post(f'/mazes/{maze_id}/solve', json=fields).json()
+        assert direct['success'], algorithm
+        assert [session[key] for key in compared] == [direct[key] for key in compared], algorithm
+
+
+def test_compare_goes_through_admission(client, monkeypatch):
+    body = maze_body(0, 'bfs', algorithms=['bfs', 'as'])
+    # the cost of the comparison is the sum of the costs of its algorithms
+    single = server.estimate_cost(len(body['maze']) * len(body['maze'][0]), len(body['goals']), 'bfs')
+    monkeypatch.setattr(server.admission, 'max_cost', 2 * single - 1)
+    assert client.post('/compare', json=body).status_code == 413
+    assert server.admission.rejections[('compare', 'too_large')] >= 1
+    monkeypatch.setattr(server.admission, 'max_cost', 2 * single)
+    assert client.post('/compare', json=body).status_code == 200
+    assert server.admission.gate('compare').running == 0 and server.compare.queued_workers == 0
+
+
+def test_stream_refuses_the_fields_it_does_not_support(client):
+    for field in (dict(profile='cprofile'), dict(phase_timing=True), dict(frames=5)):
+        assert client.post('/solve/stream', json=maze_body(0, 'bfs', **field)).status_code == 422, field
+
+
+def test_stream_is_counted_in_the_metrics(client):
+    def count():
+        return server.SOLVE_LATENCY.values.get(('ucs',), [0])[-1]
+    before = count()
+    with client.stream('POST', '/solve/stream', json=maze_body(0, 'ucs')) as response:
+        list(response.iter_lines())
+    assert count() == before + 1
+    assert 'maze_solves_in_flight 0' in client.get('/metrics').text
+
+
+class FullCache(BrokenCache):
+    def get(self, key):
+        return b'{"cached": true}'
+
+
+def test_invalid_options_are_refused_before_the_cache_and_admission(client, monkeypatch):
+    monkeypatch.setattr(server, 'result_cache', FullCache())
+    monkeypatch.setattr(server.admission, 'max_cost', 1)
+    for fields in (dict(trace='everything'), dict(profile='perf'), dict(frames=0), dict(frames=5, trace='none')):
+        assert client.post('/solve', json=maze_body(0, 'bfs', **fields)).status_code == 400, fields
@@ -0,0 +1,59 @@
+'''
+Server-side maze sessions: size accounting of the derived data and LRU eviction.
+'''
+import pickle
+
+from helpers import maze_from_text
+from maze import Maze
+from sessions import MazeSession, SessionStore, estimate_size
+from graph import ReducedGraph
+from components import ComponentLabels
+
+
+def test_derived_objects_are_counted_by_their_attributes():
+    maze = Maze((30, 30), (0, 0), [(29, 29)], set())
+    graph = ReducedGraph(maze, [maze.start] + maze.goals)
+    labels = ComponentLabels(maze.size, set())
+    assert estimate_size(graph) > len(pickle.dumps(graph))
+    assert estimate_size(labels) > 30 * 30 * 8
+
+
+def test_session_grows_with_its_derived_data():
+    session = MazeSession('a', (20, 20), set())
+    before = session.nbytes
+    session.new_maze((0, 0), [(19, 19)], labeled=True)
+    assert session.nbytes > before + estimate_size(session.derived['components']) // 2
+
+
+def test_growth_after_registration_evicts_the_oldest_session():
+    bare = MazeSession('probe', (30, 30), set()).nbytes
+    store = SessionStore(max_bytes=int(bare * 2.1))
+    first = store.register('first', (30, 30), set())
+    second = store.register('second', (30, 30), set())
+    assert list(store.sessions) == ['first', 'second']
+    # the labels of the components are built on the first solve of the second maze
+    second.new_maze((0, 0), [(29, 29)], labeled=True)
+    assert 'first' not in store.sessions and store.evictions == 1
+    assert store.total_bytes() <= store.max_bytes
+
+
+def test_register_twice_reuses_the_session():
+    store = SessionStore()
+    maze = maze_from_text('''
+S..
+.#.
+..G
+''')
+    first = store.register('m', maze.size, maze.walls)
+    assert store.register('m', maze.size, maze.walls) is first
+    assert store.get('m') is first and store.hits == 1
+
+
+def test_reduced_graphs_are_bounded_per_session():
+    session = MazeSession('a', (20, 20), set(), max_reduced=2)
+    base = session.nbytes
+    graphs = [session.reduced_graph(session.new_maze((0, 0), [(19, y)], labeled=True)) for y in range(5)]
+    assert len(session.reduced) == 2
+    assert session.reduced_graph(session.new_maze((0, 0), [(19, 4)], labeled=True)) is graphs[-1]
+    held = sum(nbytes for _, nbytes in session.reduced.values())
+    assert session.nbytes == base + estimate_size(session.derived['components']) + held
@@ -0,0 +1,45 @@
+'''
+Search statistics and the profiler hook.
+'''
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from helpers import SAMPLE, load_maze
+from stats import run_profiled
+
+
+def test_concurrent_tracemalloc_profiles():
+    first_started, first_done = threading.Event(), threading.Event()
+
+    def first():
+        def work():
+            first_started.set()
+            threading.Event().wait(0.1) # the second profile is requested meanwhile
+            return [bytearray(1024) for _ in range(200)]
+        try:
+            return run_profiled(work, 'tracemalloc')
+        finally:
+            first_done.set()
+
+    def second():
+        def work():
+            # without the lock, the first profile stops the tracing while this one still runs
+            first_done.wait(1)
+            return [bytearray(1024) for _ in range(200)]
+        first_started.wait(1)
+        return run_profiled(work, 'tracemalloc')
+
+    with ThreadPoolExecutor(2) as pool:
+        futures = [pool.submit(first), pool.submit(second)]
+        results = [future.result() for future in futures]
+    for result, summary in results:
+        assert len(result) == 200
+        assert summary['peak_bytes'] >= 200 * 1024
+
+
+def test_counters_follow_the_explored_nodes():
+    for index in SAMPLE:
+        maze = load_maze(index)
+        maze.solve('bfs')
+        assert maze.stats.pops >= maze.num_explored_multiple
+        assert maze.stats.pushes >= maze.stats.pops
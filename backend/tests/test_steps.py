@@ -0,0 +1,32 @@
+'''
+The stepwise solver API: the events add up to the result of solve(), and closing the generator stops the search.
+'''
+from helpers import SAMPLE, load_maze, solved
+from maze import Maze
+from steps import Expanded, LegCompleted, SolveFinished
+
+
+def test_events_add_up_to_the_solve():
+    for index in list(SAMPLE)[:10]:
+        maze = load_maze(index)
+        for algorithm in ('bfs', 'dfs', 'gbfs', 'as', 'ucs', 'was', 'ids', 'auto'):
+            reference = solved(maze, algorithm, limit=50)
+            events = list(load_maze(index).iter_solve(algorithm, limit=50, batch_size=3))
+            expanded = [cell for event in events if isinstance(event, Expanded) for cell in event.cells]
+            legs = [event for event in events if isinstance(event, LegCompleted)]
+            finished = events[-1]
+            assert isinstance(finished, SolveFinished)
+            assert expanded == reference.nodes_explored_multiple, (index, algorithm)
+            assert [leg.path for leg in legs] == reference.solution_single
+            assert finished.num_explored == reference.num_explored_multiple
+            assert finished.path_length == reference.path_length_multiple
+
+
+def test_closing_early_frees_the_search():
+    maze = Maze((40, 40), (0, 0), [(39, 39)], set())
+    events = maze.iter_solve('bfs', batch_size=10)
+    first = next(events)
+    assert isinstance(first, Expanded) and len(first.cells) == 10
+    events.close()
+    assert maze.explored == set() and maze.nodes_explored_multiple == []
+    assert maze.num_explored_multiple == 10
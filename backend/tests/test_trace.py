@@ -0,0 +1,20 @@
+'''
+Trace levels: 'counts' and 'none' skip the explored lists but keep the paths and the totals of 'full'.
+'''
+from helpers import SAMPLE, load_maze, solved
+from maze import ALGORITHMS
+
+
+def test_levels_keep_the_results():
+    for index in list(SAMPLE)[:10]:
+        maze = load_maze(index)
+        for algorithm in ALGORITHMS:
+            full = solved(maze, algorithm, limit=50)
+            counts = solved(maze, algorithm, limit=50, trace='counts')
+            none = solved(maze, algorithm, limit=50, trace='none')
+            for other in (counts, none):
+                assert other.solution_single == full.solution_single, (index, algorithm)
+                assert other.num_explored_multiple == full.num_explored_multiple, (index, algorithm)
+                assert other.nodes_explored_multiple == [] and other.nodes_explored_single == []
+            assert counts.num_explored_single == full.num_explored_single
+            assert none.num_explored_single == []
@@ -0,0 +1,33 @@
+'''
+The JSONL worker mode of search.py: one result line per job, in order, with the counts of a direct solve.
+'''
+import json
+import os
+import subprocess
+import sys
+
+from helpers import BACKEND, load_maze, solved
+from search import run_job
+
+
+def test_file_and_inline_jobs():
+    maze = load_maze(5)
+    result = json.loads(run_job(json.dumps({'id': 1, 'file': os.path.join(BACKEND, 'test', 'maze_5.txt'), 'algorithm': 'bfs'})))
+    assert result['id'] == 1 and 'error' not in result
+    assert result['path_length_single'] == solved(maze, 'bfs').path_length_single
+
+    inline = {'id': 2, 'maze': [[0, 1], [0, 0]], 'start': [0, 0], 'goals': [[1, 1]], 'algorithm': 'as'}
+    result = json.loads(run_job(json.dumps(inline)))
+    assert result['success'] is True and result['path_length_multiple'] == 2
+
+
+def test_bad_jobs_report_an_error():
+    result = json.loads(run_job('{"id": 3, "algorithm": "bfs"}'))
+    assert result['id'] == 3 and 'error' in result
+
+
+def test_serve_keeps_the_order_of_the_jobs():
+    jobs = [{'id': index, 'file': os.path.join('test', f'maze_{index}.txt'), 'algorithm': 'dfs'} for index in range(6)]
+    output = subprocess.run([sys.executable, 'search.py', '--serve', '--workers', '2'], cwd=BACKEND, text=True,
+                            input=''.join(json.dumps(job) + '\n' for job in jobs), capture_output=True, timeout=60).stdout
+    assert [json.loads(line)['id'] for line in output.splitlines()] == list(range(6))
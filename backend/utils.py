@@ -44,4 +44,19 @@ def manhattan_distance(current_node, goal_node):
     x_current, y_current = current_node
     x_goal, y_goal = goal_node
     distance = abs(x_goal - x_current) + abs(y_goal - y_current)
-    return distance
\ No newline at end of file
+    return distance
+
+
+# define the convert_maze_to_size_and_walls function to change the 2D array of the API (1 is a wall) into size and walls
+def convert_maze_to_size_and_walls(maze):
+    rows = len(maze)
+    cols = len(maze[0]) if rows > 0 else 0
+    size = (rows, cols) # Get the size of the maze as (rows, cols)
+    walls = set()
+    
+    for i in range(rows):
+        for j in range(cols):
+            if maze[i][j] == 1:
+                walls.add((j, i))  # Store walls as (x, y) tuples
+    
+    return size, walls
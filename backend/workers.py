@@ -0,0 +1,12 @@
+'''
+The multiprocessing context of the worker processes (the /compare workers and the parallel BFS tiles).
+forkserver avoids forking the (multi-threaded) server process itself, and the workers are forked from
+a server process that has already imported the main module and the solvers, so they start in milliseconds.
+'''
+import multiprocessing
+
+if 'forkserver' in multiprocessing.get_all_start_methods():
+    CONTEXT = multiprocessing.get_context('forkserver')
+    CONTEXT.set_forkserver_preload(['__main__', 'compare', 'parallel'])
+else:
+    CONTEXT = multiprocessing.get_context('spawn')
@@ -44,6 +44,9 @@ const MazeSolver = () => {
     { id: 'idas', name: 'Iterative Deepening A*' }
   ];
 
+  // The server groups the explored nodes into at most about this many frames, so large searches stay cheap to send and animate
+  const MAX_FRAMES = 300;
+
   const isIterativeAlgorithm = () => {
     return config.algorithm === 'ids' || config.algorithm === 'idas';
   };
@@ -333,6 +336,51 @@ const MazeSolver = () => {
     }
   };
 
+  // Animate the frames sent by the server (trace_frames are [start, end) ranges of trace_cells), one update per frame
+  const animateFrames = async (cells, frames, pathNodes) => {
+    const speedMap = { slow: 150, normal: 75, fast: 30, instant: 0 };
+    const delay = speedMap[config.speed];
+
+    setVisualization(prev => ({
+      ...prev,
+      explored: new Map(),
+      path: [],
+      currentDepth: 0,
+      maxDepth: 0
+    }));
+
+    const explored = new Map();
+    for (let frame = 0; frame < frames.length; frame++) {
+      const [start, end] = frames[frame];
+      for (let i = start; i < end; i++) {
+        explored.set(cells[i], frame);
+      }
+      setVisualization(prev => ({
+        ...prev,
+        explored: new Map(explored),
+        currentIteration: frame + 1
+      }));
+      if (delay > 0) await new Promise(resolve => setTimeout(resolve, delay));
+    }
+
+    // Animate path
+    for (const [x, y] of pathNodes) {
+      const index = coordToIndex([x, y]);
+      setVisualization(prev => ({
+        ...prev,
+        path: [...prev.path, index]
+      }));
+      if (delay > 0) await new Promise(resolve => setTimeout(resolve, delay * 2));
+    }
+  };
+
+  // The frames of one goal's search, from trace_leg_frames
+  const legFrames = (data, leg) => {
+    const first = data.trace_leg_frames[leg] ?? data.trace_frames.length;
+    const last = data.trace_leg_frames[leg + 1] ?? data.trace_frames.length;
+    return data.trace_frames.slice(first, last);
+  };
+
   const handleSolve = async () => {
     if (!startPos) {
       alert('Please set a start position first!');
@@ -356,7 +404,8 @@ const MazeSolver = () => {
         maze: convertMazeToGrid(),
         start: startPos,
         goals: goals,
-        algorithm: config.algorithm
+        algorithm: config.algorithm,
+        frames: MAX_FRAMES
       };
 
       if (isDepthLimitedAlgorithm()) {
@@ -374,7 +423,9 @@ const MazeSolver = () => {
       const data = await response.json();
       setResult(data);
 
-      if (data.success) {
+      if (data.success && data.trace_frames) {
+        await animateFrames(data.trace_cells, data.trace_frames, data.solution_multiple || []);
+      } else if (data.success) {
         await animateVisualization(
           data.nodes_explored_multiple || [],
           data.solution_multiple || [],
@@ -664,10 +715,14 @@ const MazeSolver = () => {
                         <button key={i}
                           onClick={() => {
                             setVisualization(prev => ({ ...prev, selectedGoal: i }));
-                            animateVisualization(
-                              result.nodes_explored_single[i] || [],
-                              result.solution_single[i] || []
-                            );
+                            if (result.trace_frames) {
+                              animateFrames(result.trace_cells, legFrames(result, i), result.solution_single[i] || []);
+                            } else {
+                              animateVisualization(
+                                result.nodes_explored_single[i] || [],
+                                result.solution_single[i] || []
+                              );
+                            }
                           }}
                           className={`px-3 py-2 text-xs rounded-lg font-medium transition-all duration-200 ${visualization.selectedGoal === i
                               ? 'bg-blue-500 text-white shadow-md scale-105'